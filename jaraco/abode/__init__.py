@@ -2,7 +2,8 @@
 An Abode alarm Python library.
 """
 
+from .async_client import AsyncClient
 from .client import Client
 from .exceptions import AuthenticationException, Exception
 
-__all__ = ['Exception', 'Client', 'AuthenticationException']
+__all__ = ['Exception', 'Client', 'AsyncClient', 'AuthenticationException']
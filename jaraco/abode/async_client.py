@@ -0,0 +1,222 @@
+"""
+An asyncio interface to an Abode system.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import logging
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import jaraco
+
+from . import command
+from .client import Client
+from .exceptions import AuthenticationException
+from .helpers import errors as ERROR
+from .helpers import urls
+from .state import Stateful
+from .transport import Transport
+
+log = logging.getLogger(__name__)
+
+
+class _Async:
+    """
+    Proxy an object such that its methods return awaitables. Commands
+    (see :mod:`jaraco.abode.command`) send their requests through the
+    client; other methods run in a worker thread. Other attributes are
+    passed through.
+    """
+
+    def __init__(self, target, client):
+        self._target = target
+        self._client = client
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+        run = self._command if hasattr(attr, 'steps') else self._call
+        return functools.partial(run, attr)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self._target!r})'
+
+    @property
+    def target(self):
+        """The underlying (synchronous) object."""
+        return self._target
+
+    async def _command(self, method, *args, **kwargs):
+        gen = command.steps(method, *args, **kwargs)
+        return self._wrap(await command.drive_async(gen, self._client.send_request))
+
+    async def _call(self, func, *args, **kwargs):
+        return self._wrap(await asyncio.to_thread(func, *args, **kwargs))
+
+    def _wrap(self, result):
+        if isinstance(result, Stateful):
+            return _Async(result, self._client)
+        if isinstance(result, list):
+            return list(map(self._wrap, result))
+        return result
+
+
+def _response(response):
+    """
+    Adapt the (read) httpx ``response`` to the
+    :class:`requests.Response` that commands expect.
+    """
+    result = requests.Response()
+    result.status_code = response.status_code
+    result.reason = response.reason_phrase
+    result.url = str(response.url)
+    result.headers = CaseInsensitiveDict(response.headers)
+    result.encoding = response.charset_encoding
+    result._content = response.content
+    return result
+
+
+class AsyncClient(_Async):
+    """
+    Asyncio client to an Abode system.
+
+    Exposes the same surface as :class:`Client`, but methods (including
+    those of the devices and automations it returns) are coroutines.
+    State is managed by the same Device, Automation, and Stateful
+    classes, whose requests are expressed as commands, so behavior is
+    identical to the synchronous client.
+
+    Requests are sent by httpx on the event loop (install the
+    ``async`` extra), over at most ``max_concurrency`` connections,
+    so that in-flight calls consume neither a thread nor a worker.
+    Methods that are not commands, such as a camera's downloads of
+    media, run in a worker thread over the synchronous client.
+
+    Unlike Client, this class never performs I/O on construction;
+    await ``login``, ``get_devices`` or ``get_automations`` instead.
+    """
+
+    def __init__(self, username=None, password=None, max_concurrency=10):
+        import httpx
+
+        transport = Transport(pool_maxsize=max_concurrency)
+        client = Client(username, password, transport=transport)
+        super().__init__(client, self)
+        timeout = transport.adapter.timeout
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout,) * 2
+        self._http = httpx.AsyncClient(
+            base_url=urls.BASE,
+            cookies=client._session.cookies,
+            limits=httpx.Limits(max_connections=max_concurrency),
+            timeout=httpx.Timeout(read, connect=connect),
+        )
+
+    @functools.cached_property
+    def _auth_lock(self):
+        # created on first use, within the event loop
+        return asyncio.Lock()
+
+    @functools.cached_property
+    def _reconcile_lock(self):
+        return asyncio.Lock()
+
+    async def login(self, username=None, password=None, mfa_code=None):
+        """Explicit Abode login."""
+        async with self._auth_lock:
+            await self._drive(self._target._login_steps(username, password, mfa_code))
+
+    async def refresh_token(self):
+        """Renew the OAuth token, as :meth:`Client.refresh_token`."""
+        async with self._auth_lock:
+            await self._drive(self._target._refresh_steps())
+
+    async def logout(self):
+        """Explicit Abode logout."""
+        await self._drive(self._target._logout_steps())
+        self._http.cookies = self._target._session.cookies
+
+    async def send_request(self, method, path, headers=None, data=None):
+        """
+        Send requests to Abode, as :meth:`Client.send_request`.
+        """
+        client = self._target
+        if client._stale and method.lower() != 'get':
+            await self._reconcile()
+
+        headers = dict(headers or {})
+        attempt = functools.partial(self._send_request, method, path, headers, data)
+        try:
+            return await attempt()
+        except AuthenticationException:
+            await self._reauthenticate(rejected=headers.get('ABODE-API-KEY'))
+        except jaraco.abode.Exception:
+            log.info("Retrying request...")
+            client.auth_stats.record(logins_avoided=1)
+        return await attempt()
+
+    async def _send_request(self, method, path, headers, data):
+        await self._authenticate()
+        body = self._target._prepare(headers, data)
+
+        try:
+            response = await self._send_raw(method, path, headers, content=body)
+        except requests.RequestException:
+            log.info("Abode connection reset...")
+            raise jaraco.abode.Exception(ERROR.REQUEST) from None
+
+        return Client._checked(response)
+
+    async def _send_raw(self, method, path, headers=None, data=None, content=None):
+        """
+        Send a request, as :meth:`Client._send_raw`, raising
+        :mod:`requests` exceptions for failures to connect.
+        """
+        import httpx
+
+        try:
+            response = await self._http.request(
+                method.upper(), path, headers=headers, json=data, content=content
+            )
+        except httpx.TransportError as exc:
+            raise requests.ConnectionError(exc) from exc
+        return _response(response)
+
+    def _drive(self, gen):
+        return command.drive_async(gen, self._send_raw)
+
+    async def _authenticate(self):
+        client = self._target
+        if client._token_current(client.refresh_margin):
+            return
+        async with self._auth_lock:
+            await self._drive(client._authenticate_steps())
+
+    async def _reauthenticate(self, rejected):
+        async with self._auth_lock:
+            await self._drive(self._target._reauthenticate_steps(rejected))
+
+    async def _reconcile(self):
+        client = self._target
+        async with self._reconcile_lock:
+            if 'devices' in client._stale:
+                await self.get_devices(refresh=True)
+            if 'automations' in client._stale:
+                await self.get_automations(refresh=True)
+
+    async def close(self):
+        """Log out and close the connections."""
+        try:
+            await self.logout()
+        finally:
+            await self._http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
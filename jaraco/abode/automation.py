@@ -7,8 +7,9 @@ from typing import Any
 import jaraco.abode
 
 from ._itertools import single
+from .command import Request, command
+from .helpers import debug, urls
 from .helpers import errors as ERROR
-from .helpers import urls
 from .state import Stateful
 
 log = logging.getLogger(__name__)
@@ -20,15 +21,14 @@ class Automation(Stateful):
     _desc_t = '{name} (ID: {id}, Enabled: {enabled})'
     _url_t = urls.AUTOMATION_ID
 
+    @command
     def enable(self, enable: bool):
         """Enable or disable the automation."""
         path = urls.AUTOMATION_ID.format(id=self.id)
 
-        response = self._client.send_request(
-            method="patch", path=path, data={'enabled': enable}
-        )
+        response = yield Request(method="patch", path=path, data={'enabled': enable})
 
-        state: dict[str, Any] = single(response.json())
+        state: dict[str, Any] = single(self._client.codec.parse(response))
 
         if state['id'] != self._state['id'] or state['enabled'] != enable:
             raise jaraco.abode.Exception(ERROR.INVALID_AUTOMATION_EDIT_RESPONSE)
@@ -37,13 +37,14 @@ class Automation(Stateful):
 
         log.info("Set automation %s enable to: %s", self.name, self.enabled)
         log.debug("Automation URL (patch): %s", path)
-        log.debug("Automation response: %s", response.text)
+        log.debug("Automation response: %s", debug.Body(response))
 
+    @command
     def trigger(self):
         """Trigger the automation."""
         path = urls.AUTOMATION_APPLY.format(id=self.id)
 
-        self._client.send_request(method="post", path=path)
+        yield Request(method="post", path=path)
 
         log.info("Automation triggered: %s", self.name)
 
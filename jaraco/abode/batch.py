@@ -0,0 +1,135 @@
+"""
+Apply commands to many devices concurrently.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+
+import jaraco
+
+from .helpers import errors as ERROR
+
+log = logging.getLogger(__name__)
+
+
+class Result:
+    """
+    The outcome of a command on a device.
+
+    ``error`` is the exception raised by the command, if any.
+    """
+
+    def __init__(self, device, action, args, error=None):
+        self.device = device
+        self.action = action
+        self.args = args
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        outcome = 'ok' if self.ok else repr(self.error)
+        return f'<Result {self.action}{self.args!r} on {self.device!r}: {outcome}>'
+
+
+class DeviceBatch:
+    """
+    A set of device commands to be applied together.
+
+    Each command is a device (or device id), an action, and the
+    action's arguments, where the action is one of :attr:`actions`.
+    Commands are applied concurrently over the client's session by
+    at most ``max_concurrency`` workers; a failed command does not
+    affect the others.
+
+    >>> batch = DeviceBatch(client=None)
+    >>> batch.lock('ZW:1').set_level('ZW:2', 50)
+    DeviceBatch(['lock', 'set_level'])
+    >>> batch.add('ZW:3', 'explode')
+    Traceback (most recent call last):
+    ...
+    ValueError: Unsupported action: explode
+    """
+
+    actions = (
+        'set_status',
+        'set_level',
+        'lock',
+        'unlock',
+        'switch_on',
+        'switch_off',
+    )
+
+    def __init__(self, client, commands=()):
+        self._client = client
+        self.commands = []
+        for device, action, *args in commands:
+            self.add(device, action, *args)
+
+    def __repr__(self):
+        actions = [action for _, action, _ in self.commands]
+        return f'{self.__class__.__name__}({actions!r})'
+
+    def add(self, device, action, *args):
+        """Add a command to the batch."""
+        if action not in self.actions:
+            raise ValueError(f"Unsupported action: {action}")
+        self.commands.append((device, action, args))
+        return self
+
+    def set_status(self, device, status):
+        return self.add(device, 'set_status', status)
+
+    def set_level(self, device, level):
+        return self.add(device, 'set_level', level)
+
+    def lock(self, device):
+        return self.add(device, 'lock')
+
+    def unlock(self, device):
+        return self.add(device, 'unlock')
+
+    def switch_on(self, device):
+        return self.add(device, 'switch_on')
+
+    def switch_off(self, device):
+        return self.add(device, 'switch_off')
+
+    def apply(self, max_concurrency=10):
+        """
+        Apply the commands, returning a :class:`Result` for each,
+        in order.
+        """
+        if not self.commands:
+            return []
+        if any(isinstance(device, str) for device, _, _ in self.commands):
+            # load devices once, rather than in each worker
+            self._client.get_devices()
+        workers = min(max_concurrency, len(self.commands))
+        with concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix='AbodeBatch'
+        ) as pool:
+            return list(pool.map(self._run, self.commands))
+
+    def _run(self, command):
+        device, action, args = command
+        result = Result(device, action, args)
+        try:
+            result.device = self._resolve(device)
+            getattr(result.device, action)(*args)
+        except Exception as exc:
+            log.warning("Failed to %s %s: %s", action, device, exc)
+            result.error = exc
+        return result
+
+    def _resolve(self, device):
+        if not isinstance(device, str):
+            return device
+        resolved = self._client.get_device(device)
+        if resolved is None:
+            raise jaraco.abode.Exception(ERROR.INVALID_DEVICE_ID)
+        return resolved
@@ -0,0 +1,127 @@
+"""
+Capture and download images from many cameras concurrently.
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import contextlib
+import logging
+import pathlib
+import time
+
+import jaraco
+
+from .helpers import errors as ERROR
+
+log = logging.getLogger(__name__)
+
+
+class Result:
+    """
+    The outcome of a capture from a camera.
+
+    ``timings`` records the seconds spent in each stage completed:
+
+    - ``capture``: requesting the capture;
+    - ``event``: awaiting the capture's timeline event;
+    - ``locate``: resolving the image location;
+    - ``download``: downloading the image to ``path``.
+
+    ``error`` is the exception that ended the capture, if any.
+    ``fresh`` is False if the capture's event did not arrive in time
+    and the camera's previous latest image was downloaded instead.
+    """
+
+    def __init__(self, camera, path):
+        self.camera = camera
+        self.path = path
+        self.timings = {}
+        self.error = None
+        self.fresh = True
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def elapsed(self):
+        return sum(self.timings.values())
+
+    @contextlib.contextmanager
+    def timing(self, stage):
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[stage] = time.monotonic() - start
+
+    def __repr__(self):
+        outcome = ('ok' if self.fresh else 'stale') if self.ok else repr(self.error)
+        return f'<Result {self.camera!r} in {self.elapsed:.2f}s: {outcome}>'
+
+
+def capture_all(cameras, dest, timeout=30, max_concurrency=10):
+    """
+    Capture a new image from each camera and download it to
+    ``<dest>/<device id>.jpg``, with any colons in the device id
+    replaced by underscores (e.g. ``ZB_00000003.jpg``), returning a
+    :class:`Result` for each camera, in order.
+
+    Captures are requested concurrently, each awaiting its timeline
+    event (see :meth:`jaraco.abode.devices.camera.Camera.capture`)
+    from which the image is located. If the event does not arrive
+    within ``timeout`` seconds, the camera's latest image is used and
+    the result marked as not ``fresh``.
+    """
+    cameras = list(cameras)
+    if not cameras:
+        return []
+    dest = pathlib.Path(dest)
+    dest.mkdir(parents=True, exist_ok=True)
+    workers = min(max_concurrency, len(cameras))
+    with concurrent.futures.ThreadPoolExecutor(
+        workers, thread_name_prefix='AbodeCapture'
+    ) as pool:
+        return list(pool.map(lambda camera: _capture(camera, dest, timeout), cameras))
+
+
+def _capture(camera, dest, timeout):
+    result = Result(camera, dest / (camera.id.replace(':', '_') + '.jpg'))
+    try:
+        _run(camera, result, timeout)
+    except Exception as exc:
+        log.warning("Failed to capture from %s: %s", camera.id, exc)
+        result.error = exc
+    return result
+
+
+def _run(camera, result, timeout):
+    with result.timing('capture'):
+        pending = camera.capture(wait=True, timeout=timeout)
+        # a refused capture fails immediately
+        if pending.done() and pending.exception():
+            raise pending.exception()
+    with result.timing('event'):
+        event = _await(pending)
+        result.fresh = event is not None
+    with result.timing('locate'):
+        located = (
+            camera.update_image_location(event)
+            if event is not None
+            else camera.refresh_image()
+        )
+        if not located:
+            raise jaraco.abode.Exception(ERROR.CAM_IMAGE_REFRESH_NO_FILE)
+    with result.timing('download'):
+        camera.image_to_file(result.path, get_image=False)
+
+
+def _await(pending):
+    try:
+        return pending.result()
+    except jaraco.abode.Exception as exc:
+        if exc.errcode != ERROR.CAM_CAPTURE_TIMEOUT[0]:
+            raise
+        log.info("Capture event not received; using the latest image")
+        return None
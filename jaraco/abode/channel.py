@@ -0,0 +1,217 @@
+"""
+A lomond websocket over a socket connected and read by its owner.
+"""
+
+from __future__ import annotations
+
+import socket
+import ssl
+import threading
+import time
+import urllib.parse
+
+from lomond import errors, events, proxy
+from lomond.frame import Frame
+from lomond.opcode import Opcode
+
+_WOULD_BLOCK = (BlockingIOError, ssl.SSLWantReadError, ssl.SSLWantWriteError)
+
+
+class Channel:
+    """
+    A :class:`lomond.WebSocket` over a socket that the owner reads
+    (such as when it is ready on a selector), feeding the data to
+    :meth:`feed`.
+
+    lomond's own session both connects and reads in a loop on the
+    calling thread; a Channel instead stands in as the websocket's
+    session, providing the interface by which the websocket sends
+    frames, and otherwise uses only lomond's public interface, so
+    that the owner decides where the blocking work of connecting is
+    done and when the socket is read.
+
+    Once connected, the socket is non-blocking. Data that cannot be
+    sent at once is buffered, and ``on_blocked`` is called (from the
+    sending thread) so that the owner may call :meth:`flush` when the
+    socket is writable.
+
+    ``on_close_sent`` is called when the websocket sends a close
+    frame, from the sending thread, so that the owner may wait for
+    the server to answer.
+
+    As with lomond's own session, the connection is made through the
+    websocket's HTTP(S) proxy, if any.
+    """
+
+    connect_timeout = 30
+    """Seconds to connect and complete any TLS handshake."""
+
+    buffer_size = 64 * 1024
+    """Maximum bytes read from the socket at a time."""
+
+    def __init__(self, websocket, on_close_sent=None, on_blocked=None):
+        self.websocket = websocket
+        self.on_close_sent = on_close_sent
+        self.on_blocked = on_blocked
+        self.sock = None
+        self._lock = threading.Lock()
+        self._outgoing = bytearray()
+        self._start = time.monotonic()
+        websocket.reset()
+        websocket.state.session = self
+
+    @property
+    def session_time(self):
+        """Seconds since the channel was created."""
+        return time.monotonic() - self._start
+
+    def connect(self):
+        """
+        Connect to the websocket's host and send the upgrade request.
+        Blocks for name resolution, the connection, any proxy tunnel,
+        and any TLS handshake, so is best done off any event loop.
+        """
+        websocket = self.websocket
+        url = websocket.proxies.get('https' if websocket.is_secure else 'http')
+        sock = self._tunnel(url) if url else self._connect(*self._address)
+        try:
+            if websocket.is_secure:
+                sock = self._wrap(sock, websocket.host)
+            sock.sendall(websocket.build_request())
+            sock.setblocking(False)
+        except BaseException:
+            sock.close()
+            raise
+        self.sock = sock
+
+    @property
+    def _address(self):
+        return self.websocket.host, self.websocket.port
+
+    def _connect(self, host, port):
+        sock = socket.create_connection((host, port), timeout=self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    def _wrap(self, sock, host):
+        context = self.websocket.ssl_context or ssl.create_default_context()
+        return context.wrap_socket(sock, server_hostname=host)
+
+    def _tunnel(self, url):
+        """Connect to the host through the HTTP proxy at url."""
+        parsed = urllib.parse.urlparse(url)
+        secure = parsed.scheme == 'https'
+        sock = self._connect(parsed.hostname, parsed.port or (443 if secure else 80))
+        try:
+            if secure:
+                sock = self._wrap(sock, parsed.hostname)
+            sock.sendall(
+                proxy.build_request(
+                    *self._address,
+                    proxy_username=parsed.username,
+                    proxy_password=parsed.password,
+                )
+            )
+            parser = proxy.ProxyParser()
+            while not any(parser.feed(self._recv_blocking(sock))):
+                pass
+        except proxy.ProxyFail as fail:
+            sock.close()
+            raise errors.ConnectFail(*fail.args) from None
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    @staticmethod
+    def _recv_blocking(sock):
+        data = sock.recv(1024)
+        if not data:
+            raise errors.ConnectFail('proxy closed the connection')
+        return data
+
+    def feed(self, data):
+        """Feed data read from the socket, yielding websocket events."""
+        for event in self.websocket.feed(data):
+            if isinstance(event, events.Ping):
+                try:
+                    self.websocket.send_pong(event.data)
+                except errors.WebSocketError:
+                    pass
+            yield event
+
+    def recv(self, count=None):
+        """
+        Read up to count (or ``buffer_size``) bytes from the socket,
+        or None if none can be read without blocking (such as when
+        only part of a TLS record has arrived).
+        """
+        try:
+            return self.sock.recv(count or self.buffer_size)
+        except _WOULD_BLOCK:
+            return None
+
+    def pending(self):
+        """Bytes already decrypted but not yet read, with TLS."""
+        return self.sock.pending() if isinstance(self.sock, ssl.SSLSocket) else 0
+
+    def write(self, data):
+        """
+        Send data, buffering what cannot be sent without blocking, in
+        which case ``on_blocked`` is called.
+        """
+        with self._lock:
+            if self.sock is None:
+                raise errors.WebSocketUnavailable('not connected')
+            was_blocked = bool(self._outgoing)
+            self._outgoing += data
+            blocked = not self._flush()
+        if blocked and not was_blocked and self.on_blocked is not None:
+            self.on_blocked()
+
+    def flush(self):
+        """
+        Send buffered data, returning True once none remains. Call
+        when the socket is writable after ``on_blocked``.
+        """
+        with self._lock:
+            if self.sock is None:
+                return True
+            return self._flush()
+
+    def _flush(self):
+        try:
+            while self._outgoing:
+                sent = self.sock.send(self._outgoing)
+                del self._outgoing[:sent]
+        except _WOULD_BLOCK:
+            return False
+        except OSError as error:
+            raise errors.TransportFail('socket fail; {}', error) from None
+        return True
+
+    def send(self, opcode, data):
+        """Send a frame (part of the session interface)."""
+        self.write(Frame(opcode, payload=bytearray(data)).to_bytes())
+        if opcode == Opcode.CLOSE and self.on_close_sent is not None:
+            self.on_close_sent()
+
+    def send_compressed(self, opcode, data):
+        """Send a compressed frame (part of the session interface)."""
+        self.write(Frame(opcode, payload=bytearray(data), rsv1=1).to_bytes())
+
+    def force_disconnect(self):
+        self.close()
+
+    def close(self):
+        """Close the socket, if open."""
+        with self._lock:
+            sock, self.sock = self.sock, None
+            self._outgoing.clear()
+        if sock is None:
+            return
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        sock.close()
@@ -232,17 +232,20 @@ def _create_client_instance(args):
         username=args.username,
         password=args.password,
         get_devices=args.mfa is None,
+        persist_session=True,
     )
 
 
 @contextlib.contextmanager
-def _log_errors_and_logout(client):
+def _log_errors(client):
+    """
+    Log Abode errors. The session is left open for reuse by the
+    next invocation.
+    """
     try:
         yield client
     except jaraco.abode.Exception as exc:
         log.error(exc)
-    finally:
-        client.logout()
 
 
 def _device_print(dev, append=''):
@@ -528,5 +531,5 @@ def main():
 
     setup_logging(log_level=logging.INFO + 10 * (args.quiet - args.debug))
 
-    with _log_errors_and_logout(_create_client_instance(args)) as client:
+    with _log_errors(_create_client_instance(args)) as client:
         Dispatcher(client, args).dispatch()
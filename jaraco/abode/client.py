@@ -4,42 +4,83 @@ An Abode alarm Python library.
 
 import functools
 import logging
+import threading
+import time
 import uuid
 
-from more_itertools import consume
 from requests.exceptions import RequestException
 from requests_toolbelt import sessions
 
 import jaraco
-from jaraco.collections import Everything
-from jaraco.functools import retry
+from jaraco.functools import retry_call
 from jaraco.itertools import always_iterable
 from jaraco.net.http import cookies
 
-from . import config, settings
+from . import batch, capture, config, images, settings, snapshot, store
 from .automation import Automation
+from .codec import Codec
+from .command import Request, command, drive, steps
 from .devices import alarm as ALARM
 from .devices.base import Device, Unknown
 from .event_controller import EventController
 from .exceptions import AuthenticationException
+from .helpers import debug
 from .helpers import errors as ERROR
 from .helpers import urls
+from .index import DeviceIndex
+from .transport import Transport
 
 log = logging.getLogger(__name__)
 
 
-@retry(
-    retries=1,
-    cleanup=lambda: config.paths.user_data.joinpath('cookies.json').unlink(),
-    trap=Exception,
-)
-def _cookies():
-    return cookies.ShelvedCookieJar.create(config.paths.user_data)
+def _cookies(name='cookies.json'):
+    """
+    Load the cookie jar of the given name from the user data path,
+    discarding it if unreadable.
+    """
+    create = functools.partial(
+        cookies.ShelvedCookieJar.create, config.paths.user_data, name
+    )
+    cleanup = config.paths.user_data.joinpath(name).unlink
+    return retry_call(create, retries=1, cleanup=cleanup, trap=Exception)
+
+
+class AuthStats:
+    """
+    Counts of authentication activity.
+
+    ``logins_avoided`` counts the logins a fail-then-retry client would
+    have performed: on OAuth refreshes, on requests that found the token
+    already renewed by another thread, and on retries of transient errors.
+
+    >>> stats = AuthStats()
+    >>> stats.record(refreshes=1, logins_avoided=1)
+    >>> stats.refreshes, stats.logins_avoided
+    (1, 1)
+    """
+
+    def __init__(self):
+        self.logins = 0
+        self.refreshes = 0
+        self.logins_avoided = 0
+        self._lock = threading.Lock()
+
+    def record(self, **counts):
+        """Add to the named counts."""
+        with self._lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
 
 
 class Client:
     """Client to an Abode system."""
 
+    refresh_margin = 60
+    """
+    Seconds ahead of expiry within which a request first refreshes the
+    OAuth token.
+    """
+
     def __init__(
         self,
         username=None,
@@ -47,14 +88,45 @@ class Client:
         auto_login=False,
         get_devices=False,
         get_automations=False,
+        snapshot_max_age=None,
+        persist_session=False,
+        codec=None,
+        transport=None,
+        cookie_jar=None,
     ):
+        """
+        If ``snapshot_max_age`` is given, devices and automations are
+        stored on disk as they're retrieved, and on first access are
+        served from that snapshot (if no older than that many seconds)
+        until refreshed or until the first request that changes state.
+
+        If ``persist_session``, the tokens from a login are stored on
+        disk (readable only by the user) and reused by later clients
+        until Abode rejects them or ``logout`` is called.
+
+        Snapshots and tokens are stored for the account of
+        ``username``, or if not given, of the first ``login``.
+
+        ``codec`` is the :class:`jaraco.abode.codec.Codec` for JSON
+        payloads, defaulting to the fastest installed.
+
+        ``transport``, a :class:`jaraco.abode.transport.Transport`,
+        configures connection pooling, timeouts, and retries for API
+        requests and media downloads, and may be shared among clients.
+        ``cookie_jar`` replaces the cookie jar shared in the user data
+        path.
+        """
         self._session = None
         self._token = None
+        self._oauth_token = None
+        self._expires = None
         self._panel = None
         self._user = None
         self._username = username
         self._password = password
 
+        self.codec = codec or Codec.best()
+
         self._event_controller = EventController(self)
 
         self._default_alarm_mode = 'away'
@@ -63,8 +135,21 @@ class Client:
 
         self._automations = None
 
-        self._session = sessions.BaseUrlSession(urls.BASE)
-        self._session.cookies = _cookies()
+        self._snapshot_max_age = snapshot_max_age
+        self._stale = set()
+        self._reconcile_lock = threading.Lock()
+        self._persist_session = persist_session
+
+        self._auth_lock = threading.RLock()
+        self.auth_stats = AuthStats()
+
+        self.transport = transport or Transport()
+        self.media_session = self.transport.session()
+        """Session for downloads from outside Abode, such as camera images."""
+        self.images = images.ImageCache()
+        """Camera snapshots, decoded, shared by all cameras."""
+        self._session = self._new_session()
+        self._session.cookies = cookie_jar if cookie_jar is not None else _cookies()
 
         if auto_login:
             self.login()
@@ -75,10 +160,34 @@ class Client:
         if get_automations:
             self.get_automations()
 
+    @property
+    def _snapshot(self):
+        """
+        The :class:`jaraco.abode.snapshot.Snapshot`, if enabled and
+        the username is known.
+        """
+        if self._snapshot_max_age is None or self._username is None:
+            return None
+        return snapshot.Snapshot(self._username, self._snapshot_max_age)
+
+    @property
+    def _tokens(self):
+        """The stored :class:`jaraco.abode.store.Tokens`, as for ``_snapshot``."""
+        if not self._persist_session or self._username is None:
+            return None
+        return store.Tokens(self._username)
+
     def login(self, username=None, password=None, mfa_code=None):
         """Explicit Abode login."""
+        with self._auth_lock:
+            self._login(username, password, mfa_code)
 
+    def _login(self, username, password, mfa_code):
+        drive(self._login_steps(username, password, mfa_code), self._send_raw)
+
+    def _login_steps(self, username, password, mfa_code):
         self._token = None
+        self.auth_stats.record(logins=1)
 
         username = username or self._username
         password = password or self._password
@@ -99,9 +208,9 @@ class Client:
             login_data['mfa_code'] = mfa_code
             login_data['remember_me'] = 1
 
-        response = self._session.post(urls.LOGIN, json=login_data)
+        response = yield Request('post', urls.LOGIN, data=login_data)
         AuthenticationException.raise_for(response)
-        response_object = response.json()
+        response_object = self.codec.parse(response)
 
         # Check for multi-factor authentication
         if 'mfa_type' in response_object:
@@ -110,36 +219,162 @@ class Client:
 
             raise AuthenticationException(ERROR.UNKNOWN_MFA_TYPE)
 
-        oauth_response = self._session.get(urls.OAUTH_TOKEN)
+        oauth_response = yield Request('get', urls.OAUTH_TOKEN)
         AuthenticationException.raise_for(oauth_response)
-        oauth_response_object = oauth_response.json()
+        oauth_response_object = self.codec.parse(oauth_response)
 
         log.debug("Login URL: %s", urls.LOGIN)
-        log.debug("Login Response: %s", response.text)
+        log.debug("Login Response: %s", debug.Body(response))
 
         self._token = response_object['token']
         self._panel = response_object['panel']
         self._user = response_object['user']
-        self._oauth_token = oauth_response_object['access_token']
+        # the account, for state stored on disk, if not named up front
+        self._username = self._username or username
+        self._set_oauth(oauth_response_object)
 
         log.info("Login successful")
 
+    def refresh_token(self):
+        """
+        Renew the OAuth token from the current session, logging in
+        again only if Abode no longer honors the session.
+        """
+        with self._auth_lock:
+            drive(self._refresh_steps(), self._send_raw)
+
+    def _refresh_steps(self):
+        response = yield Request('get', urls.OAUTH_TOKEN)
+        if response.status_code >= 400:
+            log.info("OAuth refresh rejected; logging in")
+            yield from self._login_steps(None, None, None)
+            return
+        self._set_oauth(self.codec.parse(response))
+        self.auth_stats.record(refreshes=1, logins_avoided=1)
+
+        log.info("OAuth token refreshed")
+
+    def _set_oauth(self, claims):
+        """
+        Store the OAuth token from the claims.
+        """
+        self._oauth_token = claims['access_token']
+        expires_in = claims.get('expires_in')
+        self._expires = None if expires_in is None else time.time() + expires_in
+
+        if self._tokens is not None:
+            self._tokens.update(
+                token=self._token,
+                oauth_token=self._oauth_token,
+                expires=self._expires,
+                panel=self._panel,
+                user=self._user,
+            )
+
+    def _token_current(self, margin=0):
+        return bool(self._token) and (
+            self._expires is None or time.time() < self._expires - margin
+        )
+
+    def _authenticate(self):
+        """
+        Ensure a current token, refreshing it once within
+        ``refresh_margin`` of expiry. Concurrent callers share a single
+        restore, refresh, or login.
+        """
+        if self._token_current(self.refresh_margin):
+            return
+        with self._auth_lock:
+            drive(self._authenticate_steps(), self._send_raw)
+
+    def _authenticate_steps(self):
+        """
+        The steps of ``_authenticate``, once the authentication lock
+        is held.
+        """
+        if self._token_current(self.refresh_margin):
+            self.auth_stats.record(logins_avoided=1)
+            return
+        if not self._token and self._restore_session():
+            if self._token_current(self.refresh_margin):
+                return
+        if not self._token:
+            yield from self._login_steps(None, None, None)
+            return
+        try:
+            yield from self._refresh_steps()
+        except Exception as exc:
+            # the token not yet expired remains usable
+            if not self._token_current():
+                raise
+            log.warning("Failed to refresh OAuth token: %s", exc)
+
+    def _reauthenticate(self, rejected):
+        """
+        Log in again after Abode rejected the ``rejected`` token, unless
+        another thread already has.
+        """
+        with self._auth_lock:
+            drive(self._reauthenticate_steps(rejected), self._send_raw)
+
+    def _reauthenticate_steps(self, rejected):
+        if self._token and self._token != rejected:
+            self.auth_stats.record(logins_avoided=1)
+            return
+        yield from self._login_steps(None, None, None)
+
+    def _restore_session(self):
+        """
+        Restore the tokens persisted from a prior login, if enabled.
+        """
+        session = self._tokens and self._tokens.get()
+        if not session:
+            return False
+
+        self._token = session['token']
+        self._oauth_token = session['oauth_token']
+        self._expires = session.get('expires')
+        self._panel = session['panel']
+        self._user = session['user']
+
+        log.info("Restored session")
+        return True
+
+    def _new_session(self):
+        return self.transport.mount(sessions.BaseUrlSession(urls.BASE))
+
+    def _send_raw(self, method, path, headers=None, data=None):
+        """
+        Send a request without the API tokens (such as to log in),
+        encoding any data as JSON.
+        """
+        return getattr(self._session, method)(path, headers=headers, json=data)
+
     def logout(self):
         """Explicit Abode logout."""
+        drive(self._logout_steps(), self._send_raw)
+
+    def _logout_steps(self):
         if not self._token:
             return
 
         header_data = {'ABODE-API-KEY': self._token}
 
-        self._session = sessions.BaseUrlSession(urls.BASE)
+        if self._tokens is not None:
+            self._tokens.clear()
+
+        self._session = self._new_session()
         self._token = None
+        self._oauth_token = None
+        self._expires = None
         self._panel = None
         self._user = None
         self._devices = None
         self._automations = None
+        self._stale.clear()
 
         try:
-            response = self._session.post(urls.LOGOUT, headers=header_data)
+            response = yield Request('post', urls.LOGOUT, headers=header_data)
         except OSError as exc:
             log.warning("Caught exception during logout: %s", exc)
             return
@@ -147,70 +382,122 @@ class Client:
         AuthenticationException.raise_for(response)
 
         log.debug("Logout URL: %s", urls.LOGOUT)
-        log.debug("Logout Response: %s", response.text)
+        log.debug("Logout Response: %s", debug.Body(response))
 
         log.info("Logout successful")
 
+    @command
     def refresh(self):
         """Do a full refresh of all devices and automations."""
-        self.get_devices(refresh=True)
-        self.get_automations(refresh=True)
-
-    def get_devices(self, refresh=False, generic_type=None):
+        yield from steps(self.get_devices, refresh=True)
+        yield from steps(self.get_automations, refresh=True)
+
+    @command
+    def resync(self):
+        """
+        Refresh all devices and automations, returning the devices
+        whose state changed (or that are new). Unchanged devices are
+        left untouched.
+        """
+        changed = yield from steps(self._load_devices)
+        yield from steps(self.get_automations, refresh=True)
+        return changed
+
+    @command
+    def get_devices(self, refresh=False, generic_type=None, type_tag=None):
         """Get all devices from Abode."""
+        if self._devices is None and not refresh:
+            self._restore_devices()
+
         if refresh or self._devices is None:
-            self._load_devices()
+            yield from steps(self._load_devices)
 
-        spec_types = (
-            Everything() if generic_type is None else set(always_iterable(generic_type))
-        )
+        return list(self._devices.select(generic_type=generic_type, type_tag=type_tag))
 
-        return [
-            device
-            for device in self._devices.values()
-            if device.generic_type in spec_types
-        ]
+    def _restore_devices(self):
+        """Load devices from the snapshot, if enabled and fresh."""
+        if self._snapshot is None:
+            return
 
-    def _load_devices(self):
-        if self._devices is None:
-            self._devices = {}
+        devices = self._snapshot.load('devices')
+        panel = self._snapshot.load('panel')
+        if devices is None or panel is None:
+            return
 
+        log.info("Restoring devices from snapshot...")
+        self._panel = panel
+        self._apply_devices(devices)
+        self._stale.add('devices')
+
+    @command
+    def _load_devices(self, panel=True):
+        """
+        Load the devices and, unless ``panel`` is False, the panel
+        (the alarm), returning the devices changed or added.
+        """
         log.info("Updating all devices...")
-        response = self.send_request("get", urls.DEVICES)
-        devices = always_iterable(response.json())
+        response = yield Request("get", urls.DEVICES)
+        devices = self.codec.parse(response)
 
         log.debug("Get Devices URL (get): %s", urls.AUTOMATION)
-        log.debug("Get Devices Response: %s", response.text)
-
-        consume(map(self._load_device, devices))
+        log.debug("Get Devices Response: %s", debug.Body(response))
 
         # We will be treating the Abode panel itself as an armable device.
-        panel_response = self.send_request("get", urls.PANEL)
-        panel_json = panel_response.json()
+        if panel:
+            panel_response = yield Request("get", urls.PANEL)
+            panel_json = self.codec.parse(panel_response)
+
+            self._panel.update(panel_json)
+
+            log.debug("Get Mode Panel URL (get): %s", urls.AUTOMATION)
+            log.debug("Get Mode Panel Response: %s", debug.Body(response))
 
-        self._panel.update(panel_json)
+        changed = self._apply_devices(devices)
+        self._stale.discard('devices')
 
-        log.debug("Get Mode Panel URL (get): %s", urls.AUTOMATION)
-        log.debug("Get Mode Panel Response: %s", response.text)
+        if self._snapshot is not None:
+            self._snapshot.save(devices=devices, panel=self._panel)
+
+        return changed
+
+    def _apply_devices(self, devices):
+        """
+        Apply the device documents, returning the devices changed or added.
+        """
+        if self._devices is None:
+            self._devices = DeviceIndex()
+
+        changed = list(filter(None, map(self._load_device, always_iterable(devices))))
 
         alarm_device = self._devices.get(ALARM.id(1))
 
         if alarm_device:
-            alarm_device.update(self._panel)
+            if alarm_device.differs(self._panel):
+                alarm_device.update(self._panel)
+                self._devices.reindex(alarm_device)
+                changed.append(alarm_device)
         else:
             alarm_device = ALARM.create_alarm(self._panel, self)
             self._devices[alarm_device.id] = alarm_device
+            changed.append(alarm_device)
 
-    def _load_device(self, doc):
-        self._reuse_device(doc) or self._create_new_device(doc)
+        return changed
 
-    def _reuse_device(self, doc):
+    def _load_device(self, doc):
+        """Load the device document, returning the device if changed or new."""
         device = self._devices.get(doc['id'])
 
         if not device:
+            return self._create_new_device(doc)
+
+        return self._reuse_device(device, doc)
+
+    def _reuse_device(self, device, doc):
+        if not device.differs(doc):
             return
 
         device.update(doc)
+        self._devices.reindex(device)
         return device
 
     def _create_new_device(self, doc):
@@ -221,38 +508,81 @@ class Client:
             return
 
         self._devices[device.id] = device
+        return device
 
+    @command
     def get_device(self, device_id, refresh=False):
         """Get a single device."""
         if self._devices is None:
-            self.get_devices()
+            yield from steps(self.get_devices)
             refresh = False
 
         device = self._devices.get(device_id)
 
         if device and refresh:
-            device.refresh()
+            yield from steps(device.refresh)
+
+        return device
+
+    @command
+    def get_device_by_uuid(self, uuid, refresh=False):
+        """Get a single device by its uuid."""
+        if self._devices is None:
+            yield from steps(self.get_devices)
+            refresh = False
+
+        device = self._devices.by_uuid(uuid)
+
+        if device and refresh:
+            yield from steps(device.refresh)
+            self._devices.reindex(device)
 
         return device
 
+    @command
     def get_automations(self, refresh=False):
         """Get all automations."""
+        if self._automations is None and not refresh:
+            self._restore_automations()
+
         if refresh or self._automations is None:
-            self._update_all()
+            yield from steps(self._update_all)
 
         return list(self._automations.values())
 
+    def _restore_automations(self):
+        """Load automations from the snapshot, if enabled and fresh."""
+        if self._snapshot is None:
+            return
+
+        states = self._snapshot.load('automations')
+        if states is None:
+            return
+
+        log.info("Restoring automations from snapshot...")
+        self._apply_automations(states)
+        self._stale.add('automations')
+
+    @command
     def _update_all(self):
+        log.info("Updating all automations...")
+        resp = yield Request("get", urls.AUTOMATION)
+        log.debug("Get Automations URL (get): %s", urls.AUTOMATION)
+        log.debug("Get Automations Response: %s", debug.Body(resp))
+
+        states = self.codec.parse(resp)
+        self._apply_automations(states)
+        self._stale.discard('automations')
+
+        if self._snapshot is not None:
+            self._snapshot.save(automations=states)
+
+    def _apply_automations(self, states):
         if self._automations is None:
             # Set up the device libraries
             self._automations = {}
 
-        log.info("Updating all automations...")
-        resp = self.send_request("get", urls.AUTOMATION)
-        log.debug("Get Automations URL (get): %s", urls.AUTOMATION)
-        log.debug("Get Automations Response: %s", resp.text)
-
-        for state in always_iterable(resp.json()):
+        for state in always_iterable(states):
             # Attempt to reuse an existing automation object
             automation = self._automations.get(str(state['id']))
 
@@ -263,22 +593,47 @@ class Client:
                 automation = Automation(state, self)
                 self._automations[automation.id] = automation
 
+    @command
     def get_automation(self, automation_id, refresh=False):
         """Get a single automation."""
         if self._automations is None:
-            self.get_automations()
+            yield from steps(self.get_automations)
             refresh = False
 
         automation = self._automations.get(str(automation_id))
 
         if automation and refresh:
-            automation.refresh()
+            yield from steps(automation.refresh)
 
         return automation
 
+    def apply(self, commands, max_concurrency=10):
+        """
+        Apply commands to many devices concurrently.
+
+        Each command is a tuple of device (or device id), action, and
+        any arguments, e.g. ``(lock, 'lock')`` or ``('ZW:1', 'set_level', 50)``.
+        Return a :class:`jaraco.abode.batch.Result` for each command,
+        capturing any error rather than raising it.
+        """
+        return batch.DeviceBatch(self, commands).apply(max_concurrency)
+
+    def capture_all(self, dest, cameras=None, timeout=30, max_concurrency=10):
+        """
+        Capture a new image from each camera (by default, all cameras)
+        and download them to the dest directory concurrently.
+
+        Return a :class:`jaraco.abode.capture.Result` for each camera,
+        capturing any error rather than raising it.
+        """
+        if cameras is None:
+            cameras = self.get_devices(generic_type='camera')
+        return capture.capture_all(cameras, dest, timeout, max_concurrency)
+
+    @command
     def get_alarm(self, area='1', refresh=False):
         """Shortcut method to get the alarm device."""
-        return self.get_device(ALARM.id(area), refresh)
+        return (yield from steps(self.get_device, ALARM.id(area), refresh))
 
     def set_default_mode(self, default_mode):
         """Set the default mode when alarms are turned 'on'."""
@@ -287,41 +642,81 @@ class Client:
 
         self._default_alarm_mode = default_mode.lower()
 
+    @command
     def set_setting(self, name, value, area='1'):
         """Set an abode system setting to a given value."""
         setting = settings.Setting.load(name.lower(), value, area)
-        return self.send_request(method="put", path=setting.path, data=setting.data)
-
-    def send_request(self, method, path, headers=None, data=None):
-        """Send requests to Abode."""
-        attempt = functools.partial(self._send_request, method, path, headers, data)
-        return jaraco.functools.retry_call(
-            attempt,
-            retries=1,
-            cleanup=self.login,
-            trap=(jaraco.abode.Exception),
-        )
+        return (yield Request(method="put", path=setting.path, data=setting.data))
 
-    def _send_request(self, method, path, headers, data):
-        if not self._token:
-            self.login()
+    def send_request(self, method, path, headers=None, data=None, stream=False):
+        """
+        Send requests to Abode.
 
-        if not headers:
-            headers = {}
+        A request rejected for authentication is retried once after
+        logging in again; any other failure is retried once as is.
 
-        headers['Authorization'] = 'Bearer ' + self._oauth_token
-        headers['ABODE-API-KEY'] = self._token
+        With ``stream``, the response body is not read until accessed.
+        """
+        if self._stale and method.lower() != 'get':
+            self._reconcile()
 
+        headers = dict(headers or {})
+        attempt = functools.partial(
+            self._send_request, method, path, headers, data, stream
+        )
         try:
-            response = getattr(self._session, method)(path, headers=headers, json=data)
+            return attempt()
+        except AuthenticationException:
+            self._reauthenticate(rejected=headers.get('ABODE-API-KEY'))
+        except jaraco.abode.Exception:
+            log.info("Retrying request...")
+            self.auth_stats.record(logins_avoided=1)
+        return attempt()
+
+    def _send_request(self, method, path, headers, data, stream=False):
+        self._authenticate()
+        body = self._prepare(headers, data)
 
-            if response and response.status_code < 400:
-                return response
+        try:
+            response = getattr(self._session, method)(
+                path, headers=headers, data=body, stream=stream
+            )
         except RequestException:
             log.info("Abode connection reset...")
+            raise jaraco.abode.Exception(ERROR.REQUEST) from None
 
+        return self._checked(response)
+
+    def _prepare(self, headers, data):
+        """Add the tokens to headers, returning the body encoding data."""
+        headers['Authorization'] = 'Bearer ' + self._oauth_token
+        headers['ABODE-API-KEY'] = self._token
+
+        if data is None:
+            return None
+        headers['Content-Type'] = 'application/json'
+        return self.codec.dumps(data)
+
+    @staticmethod
+    def _checked(response):
+        """Return the response if successful, else raise."""
+        if response and response.status_code < 400:
+            return response
+        if response.status_code in (401, 403):
+            raise AuthenticationException(ERROR.REQUEST)
         raise jaraco.abode.Exception(ERROR.REQUEST)
 
+    def _reconcile(self):
+        """
+        Refresh anything restored from the snapshot before changing state.
+        Concurrent callers share a single refresh.
+        """
+        with self._reconcile_lock:
+            if 'devices' in self._stale:
+                self.get_devices(refresh=True)
+            if 'automations' in self._stale:
+                self.get_automations(refresh=True)
+
     @property
     def default_mode(self):
         """Get the default mode."""
@@ -0,0 +1,77 @@
+"""
+JSON encoding and decoding, accelerated where available.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+
+
+class Codec:
+    """
+    A JSON implementation.
+
+    >>> codec = Codec.stdlib()
+    >>> codec.loads(b'{"id": "ZW:1"}')
+    {'id': 'ZW:1'}
+    >>> codec.dumps({'status': '1'})
+    '{"status": "1"}'
+    >>> codec.loads_from('42["update"]', 2)
+    ['update']
+    """
+
+    def __init__(self, name, loads, dumps, raw_decode=None):
+        self.name = name
+        self.loads = loads
+        """Decode a document from str or (UTF-8) bytes."""
+        self.dumps = dumps
+        """Encode a document to str."""
+        self._raw_decode = raw_decode
+
+    def loads_from(self, text, index):
+        """
+        Decode the document in text beginning at index, in place where
+        the implementation allows, else from a copy of the remainder.
+        """
+        if self._raw_decode is not None:
+            return self._raw_decode(text, index)[0]
+        return self.loads(text[index:] if index else text)
+
+    def __repr__(self):
+        return f'{self.__class__.__name__}({self.name!r})'
+
+    def parse(self, response):
+        """Decode the body of a response."""
+        return self.loads(response.content)
+
+    @classmethod
+    def stdlib(cls):
+        return cls('json', json.loads, json.dumps, json.JSONDecoder().raw_decode)
+
+    @classmethod
+    def orjson(cls):
+        import orjson
+
+        return cls('orjson', orjson.loads, lambda obj: orjson.dumps(obj).decode())
+
+    @classmethod
+    def ujson(cls):
+        import ujson
+
+        return cls('ujson', ujson.loads, ujson.dumps)
+
+    @classmethod
+    @functools.cache
+    def best(cls):
+        """
+        The fastest implementation installed.
+
+        >>> Codec.best().name in ('orjson', 'ujson', 'json')
+        True
+        """
+        for factory in (cls.orjson, cls.ujson):
+            with contextlib.suppress(ImportError):
+                return factory()
+        return cls.stdlib()
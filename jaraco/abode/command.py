@@ -0,0 +1,92 @@
+"""
+Requests to Abode, expressed apart from how they are sent.
+
+A command is a method written as a generator, yielding each
+:class:`Request` and being sent its response (or having the failure
+thrown in), and returning its result. Decorated with :func:`command`,
+it is called as an ordinary method, sending each request with the
+client's ``send_request``, while :func:`drive_async` instead awaits
+each, so that :class:`jaraco.abode.AsyncClient` shares the same logic.
+
+>>> class Echo:
+...     def send_request(self, method, path, headers=None, data=None):
+...         return f'{method} {path}'
+...     @command
+...     def fetch(self, path):
+...         response = yield Request('get', path)
+...         return response.upper()
+...     @command
+...     def fetch_both(self):
+...         first = yield from steps(self.fetch, 'a')
+...         second = yield from steps(self.fetch, 'b')
+...         return [first, second]
+>>> Echo().fetch_both()
+['GET A', 'GET B']
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, NamedTuple
+
+
+class Request(NamedTuple):
+    """A request, as for ``send_request``."""
+
+    method: str
+    path: str
+    headers: dict[str, str] | None = None
+    data: Any = None
+
+
+def command(func):
+    """
+    Make the generator method ``func`` an ordinary method, sending each
+    request it yields with the client's ``send_request``. The generator
+    remains as ``steps``.
+    """
+
+    @functools.wraps(func)
+    def run(self, *args, **kwargs):
+        # Stateful objects send through their client; a client, itself
+        client = getattr(self, '_client', self)
+        return drive(func(self, *args, **kwargs), client.send_request)
+
+    run.steps = func
+    return run
+
+
+def steps(method, *args, **kwargs):
+    """
+    The generator of the bound command ``method`` for the arguments,
+    such as to ``yield from`` within another command.
+    """
+    return method.steps(method.__self__, *args, **kwargs)
+
+
+def drive(gen, send):
+    """Run the command generator, sending each request with ``send``."""
+    outcome, failed = None, False
+    while True:
+        try:
+            request = gen.throw(outcome) if failed else gen.send(outcome)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            outcome, failed = send(*request), False
+        except Exception as exc:
+            outcome, failed = exc, True
+
+
+async def drive_async(gen, send):
+    """Run the command generator, awaiting ``send`` for each request."""
+    outcome, failed = None, False
+    while True:
+        try:
+            request = gen.throw(outcome) if failed else gen.send(outcome)
+        except StopIteration as stop:
+            return stop.value
+        try:
+            outcome, failed = await send(*request), False
+        except Exception as exc:
+            outcome, failed = exc, True
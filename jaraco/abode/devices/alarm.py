@@ -5,8 +5,9 @@ import logging
 
 import jaraco.abode
 
+from ..command import Request, command, steps
+from ..helpers import debug, urls
 from ..helpers import errors as ERROR
-from ..helpers import urls
 from .switch import Switch
 
 log = logging.getLogger(__name__)
@@ -42,6 +43,7 @@ class Alarm(Switch):
         super().__init__(json_obj, abode)
         self._area = area
 
+    @command
     def set_mode(self, mode):
         """Set Abode alarm mode."""
         if not mode:
@@ -52,12 +54,12 @@ class Alarm(Switch):
 
         mode = mode.lower()
 
-        response = self._client.send_request("put", urls.panel_mode(self._area, mode))
+        response = yield Request("put", urls.panel_mode(self._area, mode))
 
         log.debug("Set Alarm Home URL (put): %s", urls.panel_mode(self._area, mode))
-        log.debug("Set Alarm Home Response: %s", response.text)
+        log.debug("Set Alarm Home Response: %s", debug.Body(response))
 
-        response_object = response.json()
+        response_object = self._client.codec.parse(response)
 
         if response_object['area'] != self._area:
             raise jaraco.abode.Exception(ERROR.SET_MODE_AREA)
@@ -71,29 +73,35 @@ class Alarm(Switch):
 
         return True
 
+    @command
     def set_home(self):
         """Arm Abode to home mode."""
-        return self.set_mode('home')
+        return (yield from steps(self.set_mode, 'home'))
 
+    @command
     def set_away(self):
         """Arm Abode to home mode."""
-        return self.set_mode('away')
+        return (yield from steps(self.set_mode, 'away'))
 
+    @command
     def set_standby(self):
         """Arm Abode to stay mode."""
-        return self.set_mode('standby')
+        return (yield from steps(self.set_mode, 'standby'))
 
+    @command
     def switch_on(self):
         """Arm Abode to default mode."""
-        return self.set_mode(self._client.default_mode)
+        return (yield from steps(self.set_mode, self._client.default_mode))
 
+    @command
     def switch_off(self):
         """Arm Abode to home mode."""
-        return self.set_standby()
+        return (yield from steps(self.set_standby))
 
+    @command
     def refresh(self, url=urls.PANEL):
         """Refresh the alarm device."""
-        state = super().refresh(url)
+        state = yield from steps(super().refresh, url)
 
         self._client._panel.update(state)
 
@@ -102,6 +110,9 @@ class Alarm(Switch):
     def update(self, state):
         super().update(state_from_panel(state, area=self._area))
 
+    def differs(self, state):
+        return super().differs(state_from_panel(state, area=self._area))
+
     @property
     def is_on(self):
         """Is alarm armed."""
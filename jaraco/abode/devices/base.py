@@ -1,9 +1,13 @@
+from __future__ import annotations
+
 import logging
 import warnings
 
 import jaraco.abode
 from jaraco.classes.ancestry import iter_subclasses
 
+from ..command import Request, command
+from ..helpers import debug
 from ..helpers import errors as ERROR
 from ..helpers import urls
 from ..state import Stateful
@@ -24,23 +28,38 @@ class Device(Stateful):
     _desc_t = '{name} (ID: {id}, UUID: {uuid}) - {type} - {status}'
     _url_t = urls.DEVICE
 
+    _registry: dict[str, type[Device]] = {}
+    """
+    Map of ``type_tag`` to the subclass of this class servicing it,
+    populated as subclasses are defined. Each subclass has its own.
+    """
+
+    _complete = False
+    """Whether the registries are complete (all device modules imported)."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._registry = {}
+        _register_defaults(cls)
+
     @property
     def _control_url(self):
         if not self._state['control_url']:
             raise jaraco.abode.Exception(("Control URL required",))
         return self._state['control_url']
 
-    def set_status(self, status) -> None:
+    @command
+    def set_status(self, status):
         """Set device status."""
-        response = self._client.send_request(
+        response = yield Request(
             method="put",
             path=self._control_url,
             data={'status': str(status)},
         )
-        response_object = response.json()
+        response_object = self._client.codec.parse(response)
 
         log.debug("Set Status URL (put): %s", self._control_url)
-        log.debug("Set Status Response: %s", response.text)
+        log.debug("Set Status Response: %s", debug.Body(response))
 
         if response_object['id'] != self.id:
             raise jaraco.abode.Exception(ERROR.SET_STATUS_DEV_ID)
@@ -54,17 +73,18 @@ class Device(Stateful):
 
         log.info("Set device %s status to: %s", self.id, status)
 
-    def set_level(self, level) -> None:
+    @command
+    def set_level(self, level):
         """Set device level."""
-        response = self._client.send_request(
+        response = yield Request(
             "put",
             self._control_url,
             data={'level': str(level)},
         )
-        response_object = response.json()
+        response_object = self._client.codec.parse(response)
 
         log.debug("Set Level URL (put): %s", self._control_url)
-        log.debug("Set Level Response: %s", response.text)
+        log.debug("Set Level Response: %s", debug.Body(response))
 
         if response_object['id'] != self.id:
             raise jaraco.abode.Exception(ERROR.SET_STATUS_DEV_ID)
@@ -133,7 +153,6 @@ class Device(Stateful):
     @classmethod
     def new(cls, state, client):
         """Create new device object for the given type."""
-        pkg.import_all()
         try:
             type_tag = state['type_tag']
         except KeyError as exc:
@@ -154,13 +173,61 @@ class Device(Stateful):
         """
         >>> Device.resolve_class('device_type.povs')
         <class 'jaraco.abode.devices.binary_sensor.Motion'>
+        >>> Device.resolve_class('device_type.unheard_of')
+        <class 'jaraco.abode.devices.base.Unknown'>
         """
-        lookup = {
-            f'device_type.{tag}': sub_cls
-            for sub_cls in reversed(tuple(iter_subclasses(cls)))
-            for tag in sub_cls.tags
-        }
-        return lookup.get(type_tag.lower(), Unknown)
+        if not Device._complete:
+            pkg.import_all()
+            Device._complete = True
+        return cls._registry.get(type_tag.lower(), Unknown)
+
+    @staticmethod
+    def register(sub_cls, *tags):
+        """
+        Register a (plugin) Device class to service the given tags.
+
+        Unlike subclasses registered implicitly when defined, explicit
+        registrations take precedence over any existing mapping.
+
+        Tags default to ``sub_cls.tags``.
+        """
+        for base in _bases(sub_cls):
+            for tag in tags or sub_cls.tags:
+                base._registry[_type_tag(tag)] = sub_cls
+        return sub_cls
+
+    @staticmethod
+    def invalidate_registry():
+        """
+        Rebuild the registry from the currently-defined subclasses.
+
+        Useful after tags have been altered on an existing class.
+        Explicit registrations are discarded.
+        """
+        sub_classes = list(iter_subclasses(Device))
+        for cls in [Device, *sub_classes]:
+            cls._registry.clear()
+        for sub_cls in sub_classes:
+            _register_defaults(sub_cls)
+
+
+def _type_tag(tag):
+    return f'device_type.{tag}'.lower()
+
+
+def _bases(sub_cls):
+    """The Device classes sub_cls is (or derives from), each with a registry."""
+    return (base for base in sub_cls.__mro__ if issubclass(base, Device))
+
+
+def _register_defaults(sub_cls):
+    """
+    Register sub_cls for its tags with itself and each Device class
+    from which it derives, deferring to any prior registration.
+    """
+    for base in _bases(sub_cls):
+        for tag in sub_cls.tags:
+            base._registry.setdefault(_type_tag(tag), sub_cls)
 
 
 class Unknown(Device):
@@ -1,24 +1,96 @@
 """Abode camera device."""
 
-import base64
+import concurrent.futures
+import contextlib
+import datetime
+import functools
+import io
 import logging
+import os
 import pathlib
-from shutil import copyfileobj
+import threading
+import time
+import typing
+import urllib.parse
 
-import requests
+from requests.exceptions import RequestException
 
 import jaraco
 
-from .._itertools import single
+from .. import images
+from .._itertools import opt_single, single
+from ..command import Request, command
+from ..download import Download
+from ..helpers import debug, urls
 from ..helpers import errors as ERROR
 from ..helpers import timeline as TIMELINE
-from ..helpers import urls
 from . import base
 from . import status as STATUS
 
 log = logging.getLogger(__name__)
 
 
+def _expiry(url):
+    """
+    Return the time at which a signed URL expires, if indicated.
+
+    >>> _expiry('https://s3/x.jpg?X-Amz-Date=20200126T173238Z&X-Amz-Expires=900')
+    1580060858.0
+    >>> _expiry('https://s3/x.jpg?AWSAccessKeyId=A&Expires=1580060858&Signature=S')
+    1580060858.0
+    >>> _expiry('https://example.com/x.jpg')
+    """
+    query = dict(urllib.parse.parse_qsl(urllib.parse.urlsplit(url).query))
+    with contextlib.suppress(KeyError, ValueError):
+        signed = datetime.datetime.strptime(query['X-Amz-Date'], '%Y%m%dT%H%M%SZ')
+        utc = signed.replace(tzinfo=datetime.timezone.utc)
+        return utc.timestamp() + int(query['X-Amz-Expires'])
+    with contextlib.suppress(KeyError, ValueError):
+        return float(query['Expires'])
+    return None
+
+
+def _settle(future, result=None, exception=None):
+    """Complete the future, unless already complete."""
+    with contextlib.suppress(concurrent.futures.InvalidStateError):
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+def _differs(baseline, event):
+    """Is the capture event other than the baseline capture's id?"""
+    return event.get('id') != baseline
+
+
+def _captured_since(since, event):
+    """Was the capture event at or after since (epoch seconds)?"""
+    return int(event.get('event_utc') or 0) >= since
+
+
+def _chain(future, fallback, waiter):
+    """
+    Complete the future from a waiter for a timeline event, or if the
+    waiter was cancelled (expired or disconnected), from the fallback.
+    """
+    if future.done():
+        return
+    if waiter.cancelled():
+        fallback()
+    else:
+        _settle(future, waiter.result())
+
+
+class _Location(typing.NamedTuple):
+    """A resolved image location and what it was resolved from."""
+
+    event_id: str
+    url: str
+    expires: float
+    epoch: int
+
+
 class Camera(base.Device):
     """Class to represent a camera device."""
 
@@ -36,10 +108,38 @@ class Camera(base.Device):
         'doorbell',
     )
     _image_url = None
-    _snapshot_base64 = None
-
-    def capture(self):
-        """Request a new camera image."""
+    _image_location = None
+
+    image_url_margin = 30
+    """
+    Seconds before a signed image URL expires at which it is no
+    longer reused.
+    """
+
+    snapshot_chunk_size = 64 * 1024
+    """Bytes of a snapshot response decoded at a time."""
+
+    capture_poll_interval = 0.5
+    """
+    Seconds before first polling the timeline for a capture when events
+    are not connected, doubling with each poll.
+    """
+
+    capture_poll_max = 8
+    """Maximum seconds between polls of the timeline for a capture."""
+
+    def capture(self, wait=False, timeout=30):
+        """
+        Request a new camera image.
+
+        With ``wait``, return a :class:`concurrent.futures.Future`
+        resolved with the capture's timeline event once the image is
+        stored (when :meth:`image_to_file` will retrieve it), or failed
+        if the capture is refused or not stored within ``timeout``
+        seconds. Completion is signaled by the event controller while
+        connected, else (or if the connection drops while waiting) found
+        by polling the timeline.
+        """
         # Abode IP cameras use a different URL for image captures.
         if 'control_url_snapshot' in self._state:
             url = self._state['control_url_snapshot']
@@ -50,11 +150,89 @@ class Camera(base.Device):
         else:
             raise jaraco.abode.Exception(ERROR.MISSING_CONTROL_URL)
 
+        if wait:
+            return self._capture_completion(url, timeout)
+        return self._capture(url)
+
+    def _capture_completion(self, url, timeout):
+        future = concurrent.futures.Future()
+        events = self._client.events
+        deadline = time.monotonic() + timeout
+        connected = events.connected
+        # how polling, including as a fallback, recognizes the capture:
+        # by its time if connected, so as to need no request up front
+        if connected:
+            is_new = functools.partial(_captured_since, int(time.time()))
+        else:
+            is_new = functools.partial(_differs, self._latest_capture_id())
+        poll = functools.partial(self._start_poll, future, is_new, deadline)
+
+        # await the event from before capturing, so it cannot be missed
+        if connected:
+            waiter = events.wait_for_timeline(
+                self.id, TIMELINE.CAPTURE_IMAGE, timeout=timeout
+            )
+            waiter.add_done_callback(functools.partial(_chain, future, poll))
+            future.add_done_callback(lambda _: waiter.cancel())
+
+        if not self._capture(url):
+            _settle(future, exception=jaraco.abode.Exception(ERROR.CAM_CAPTURE_FAILED))
+        elif not connected:
+            poll()
+        return future
+
+    def _latest_capture(self):
+        """Return the latest capture event from the timeline, if any."""
+        url = urls.TIMELINE_IMAGES_ID.format(device_id=self.id)
+        response = self._client.send_request("get", url)
+
+        log.debug("Get image URL (get): %s", url)
+        log.debug("Get image response: %s", debug.Body(response))
+
+        return opt_single(self._client.codec.parse(response))
+
+    def _latest_capture_id(self):
+        try:
+            return (self._latest_capture() or {}).get('id')
+        except jaraco.abode.Exception as exc:
+            log.debug("Unable to find latest capture: %s", exc)
+
+    def _start_poll(self, future, is_new, deadline):
+        threading.Thread(
+            target=self._poll_capture,
+            args=(future, is_new, deadline),
+            name=f'AbodeCapture-{self.id}',
+            daemon=True,
+        ).start()
+
+    def _poll_capture(self, future, is_new, deadline):
+        """
+        Poll the timeline at increasing intervals for a capture for
+        which ``is_new``, checking at least once, at the deadline.
+        """
+        delay = self.capture_poll_interval
+        final = False
+        while not future.done() and not final:
+            remaining = max(deadline - time.monotonic(), 0)
+            final = delay >= remaining
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, self.capture_poll_max)
+            try:
+                event = self._latest_capture()
+            except jaraco.abode.Exception as exc:
+                log.debug("Failed to poll for capture: %s", exc)
+                continue
+            if event is not None and is_new(event):
+                _settle(future, event)
+                return
+        _settle(future, exception=jaraco.abode.Exception(ERROR.CAM_CAPTURE_TIMEOUT))
+
+    def _capture(self, url):
         try:
             response = self._client.send_request("put", url)
 
             log.debug("Capture image URL (put): %s", url)
-            log.debug("Capture image response: %s", response.text)
+            log.debug("Capture image response: %s", debug.Body(response))
 
             return True
 
@@ -64,14 +242,25 @@ class Camera(base.Device):
         return False
 
     def refresh_image(self):
-        """Get the most recent camera image."""
-        url = urls.TIMELINE_IMAGES_ID.format(device_id=self.id)
-        response = self._client.send_request("get", url)
-
-        log.debug("Get image URL (get): %s", url)
-        log.debug("Get image response: %s", response.text)
-
-        return self.update_image_location(response.json())
+        """
+        Get the most recent camera image.
+
+        While the event controller is connected, a capture pushed for
+        this camera locates the image without querying the timeline, and
+        if none has been pushed since the image was located, its URL is
+        reused until it expires.
+        """
+        events = self._client.events
+        if events.connected:
+            pushed = events.latest_timeline(self.id, TIMELINE.CAPTURE_IMAGE)
+            if pushed is not None:
+                return self.update_image_location(pushed)
+            # no capture pushed, so the image last located is the latest
+            # unless events were missed while disconnected
+            if self._image_reusable(epoch=events.epoch):
+                return True
+
+        return self.update_image_location(self._latest_capture())
 
     def update_image_location(self, timeline_json):
         """Update the image location."""
@@ -93,6 +282,10 @@ class Camera(base.Device):
         if not file_path:
             raise jaraco.abode.Exception(ERROR.CAM_IMAGE_REFRESH_NO_FILE)
 
+        event_id = timeline.get('id')
+        if event_id is not None and self._image_reusable(event_id=event_id):
+            return True
+
         # Perform a "head" request for the image and look for a
         # 302 Found response
         response = self._client.send_request("head", file_path)
@@ -112,84 +305,170 @@ class Camera(base.Device):
             raise jaraco.abode.Exception(ERROR.CAM_IMAGE_NO_LOCATION_HEADER)
 
         self._image_url = location
+        expires = _expiry(location)
+        epoch = self._client.events.epoch
+        self._image_location = (
+            _Location(event_id, location, expires, epoch)
+            if expires is not None
+            else None
+        )
 
         return True
 
+    def _image_reusable(self, event_id=None, epoch=None):
+        """
+        May the image URL last located be reused, being unexpired and
+        located from the given timeline event or in the given epoch?
+        """
+        location = self._image_location
+        reusable = (
+            location is not None
+            and location.expires - self.image_url_margin > time.time()
+            and (event_id is None or event_id == location.event_id)
+            and (epoch is None or epoch == location.epoch)
+        )
+        if reusable:
+            log.debug("Reusing image URL for %s", self.id)
+        return reusable
+
     def stream_details_to_file(self, details, path):
         """Write the stream details to a file."""
 
         pathlib.Path(path).write_text(details, encoding='utf-8')
         return True
 
-    def image_to_file(self, path, get_image=True):
-        """Write the image to a file."""
+    def image_to_file(self, path, get_image=True, resume=True, **options):
+        """
+        Write the image to a file, atomically, resuming any earlier
+        interrupted download if ``resume``.
+
+        Options are passed to :class:`jaraco.abode.download.Download`.
+        """
         if not self.image_url or get_image:
             if not self.refresh_image():
                 return False
 
-        response = requests.get(self.image_url, stream=True)
+        self._download(**options).to_file(path, resume=resume)
+        return True
 
-        if response.status_code != 200:
-            log.warning(
-                "Unexpected response code %s when requesting image: %s",
-                str(response.status_code),
-                response.text,
-            )
-            raise jaraco.abode.Exception(ERROR.CAM_IMAGE_REQUEST_INVALID)
+    def image_to_stream(self, sink, get_image=True, **options):
+        """
+        Write the image to a writable binary stream, such as a BytesIO.
 
-        with open(path, 'wb') as imgfile:
-            copyfileobj(response.raw, imgfile)
+        Options are passed to :class:`jaraco.abode.download.Download`.
+        """
+        if not self.image_url or get_image:
+            if not self.refresh_image():
+                return False
 
+        self._download(**options).to_stream(sink)
         return True
 
-    def snapshot(self):
-        """Request the current camera snapshot as a base64-encoded string."""
+    def _download(self, **options):
+        return Download(self._client.media_session, self.image_url, **options)
+
+    def snapshot(self, sink=None):
+        """
+        Request the current camera snapshot, decoding it to sink (a
+        writable binary stream) if given, else into the client's
+        image cache.
+        """
+        if sink is None:
+            return self._snapshot_image(refresh=True) is not None
+        return self._snapshot(sink)
+
+    def _snapshot(self, sink):
         url = f"{urls.CAMERA_INTEGRATIONS}{self.uuid}/snapshot"
 
         try:
-            response = self._client.send_request("post", url)
+            response = self._client.send_request("post", url, stream=True)
             log.debug("Camera snapshot URL (post): %s", url)
-            log.debug("Camera snapshot response: %s", response.text)
+            # the body is streamed; reading it here would buffer it whole
+            log.debug("Camera snapshot response: %s", response.status_code)
         except jaraco.abode.Exception as exc:
             log.warning("Failed to get camera snapshot image: %s", exc)
             return False
 
-        self._snapshot_base64 = response.json().get("base64Image")
-        if self._snapshot_base64 is None:
+        with response:
+            chunks = response.iter_content(self.snapshot_chunk_size)
+            try:
+                size = images.decode_field(chunks, 'base64Image', sink)
+            except (ValueError, RequestException) as exc:
+                log.warning("Failed to decode camera snapshot: %s", exc)
+                return False
+
+        if size is None:
             log.warning("Camera snapshot data missing")
             return False
 
         return True
 
-    def snapshot_to_file(self, path, get_snapshot=True):
-        """Write the snapshot image to a file."""
-        if not self._snapshot_base64 or get_snapshot:
-            if not self.snapshot():
-                return False
+    def _snapshot_image(self, refresh):
+        """
+        Return the decoded snapshot, from the cache unless refresh.
+        """
+        image = None if refresh else self._client.images.get(self.id)
+        if image is None:
+            buffer = io.BytesIO()
+            if not self._snapshot(buffer):
+                return None
+            image = buffer.getvalue()
+            self._client.images.put(self.id, image)
+        return image
 
+    def snapshot_to_file(self, path, get_snapshot=True):
+        """
+        Write the snapshot image to a file, streaming a new snapshot
+        directly to disk if ``get_snapshot``.
+        """
+        path = pathlib.Path(path)
+        part = path.with_name(path.name + '.part')
         try:
-            with open(path, "wb") as imgfile:
-                imgfile.write(base64.b64decode(self._snapshot_base64))
+            with open(part, "wb") as imgfile:
+                written = self._snapshot_to(imgfile, get_snapshot)
         except OSError as exc:
             log.warning("Failed to write snapshot image to file: %s", exc)
+            written = False
+
+        if not written:
+            part.unlink(missing_ok=True)
             return False
 
+        os.replace(part, path)
         return True
 
-    def snapshot_data_url(self, get_snapshot=True):
-        """Return the snapshot image as a data url."""
-        if not self._snapshot_base64 or get_snapshot:
-            if not self.snapshot():
-                return ""
+    def _snapshot_to(self, sink, get_snapshot):
+        if get_snapshot:
+            return self._snapshot(sink)
+        image = self._snapshot_image(refresh=False)
+        if image is None:
+            return False
+        sink.write(image)
+        return True
 
-        return f"data:image/jpeg;base64,{self._snapshot_base64}"
+    def snapshot_data_url(self, get_snapshot=True, sink=None):
+        """
+        Return the snapshot image as a data url, or write it to sink
+        (a writable text stream), encoding a chunk at a time, if given.
+        """
+        if sink is None:
+            url = io.StringIO()
+            return url.getvalue() if self.snapshot_data_url(get_snapshot, url) else ""
+
+        image = self._snapshot_image(refresh=get_snapshot)
+        if image is None:
+            return False
+
+        sink.write("data:image/jpeg;base64,")
+        images.encode(image, sink)
+        return True
 
     def start_kvs_stream(self, path):
         """Start KVS Stream for camera."""
         url = f"{urls.CAMERA_INTEGRATIONS}{self.uuid}/kvs/stream"
 
         response = self._client.send_request(method="post", path=url)
-        response_object = response.json()
+        response_object = self._client.codec.parse(response)
 
         log.debug("Camera KVS Stream URL (post): %s", url)
         log.debug("Camera KVS Stream Response: REDACTED (due to embedded credentials)")
@@ -206,6 +485,7 @@ class Camera(base.Device):
 
         return status
 
+    @command
     def privacy_mode(self, enable):
         """Set camera privacy mode (camera on/off)."""
         if self._state['privacy']:
@@ -220,13 +500,11 @@ class Camera(base.Device):
                 'id': self.id,
             }
 
-            response = self._client.send_request(
-                method="put", path=path, data=camera_data
-            )
-            response_object = response.json()
+            response = yield Request(method="put", path=path, data=camera_data)
+            response_object = self._client.codec.parse(response)
 
             log.debug("Camera Privacy Mode URL (put): %s", path)
-            log.debug("Camera Privacy Mode Response: %s", response.text)
+            log.debug("Camera Privacy Mode Response: %s", debug.Body(response))
 
             if response_object['id'] != self.id:
                 raise jaraco.abode.Exception(ERROR.SET_STATUS_DEV_ID)
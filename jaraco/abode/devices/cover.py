@@ -1,5 +1,6 @@
 """Abode cover device."""
 
+from ..command import command, steps
 from . import status as STATUS
 from .switch import Switch
 
@@ -9,23 +10,27 @@ class Cover(Switch):
 
     tags = ('secure_barrier',)
 
+    @command
     def switch_on(self):
         """Turn the switch on."""
-        self.set_status(int(STATUS.OPEN))
+        yield from steps(self.set_status, int(STATUS.OPEN))
         self._state['status'] = STATUS.OPEN
 
+    @command
     def switch_off(self):
         """Turn the switch off."""
-        self.set_status(int(STATUS.CLOSED))
+        yield from steps(self.set_status, int(STATUS.CLOSED))
         self._state['status'] = STATUS.CLOSED
 
+    @command
     def open_cover(self):
         """Open the cover."""
-        return self.switch_on()
+        return (yield from steps(self.switch_on))
 
+    @command
     def close_cover(self):
         """Close the cover."""
-        return self.switch_off()
+        return (yield from steps(self.switch_off))
 
     @property
     def is_open(self):
@@ -5,8 +5,9 @@ import math
 
 import jaraco.abode
 
+from ..command import Request, command
+from ..helpers import debug, urls
 from ..helpers import errors as ERROR
-from ..helpers import urls
 from .switch import Switch
 
 log = logging.getLogger(__name__)
@@ -22,7 +23,8 @@ class Light(Switch):
 
     tags = ('dimmer', 'dimmer_meter', 'hue')
 
-    def set_color_temp(self, color_temp) -> None:
+    @command
+    def set_color_temp(self, color_temp):
         """Set device color."""
         url = urls.INTEGRATIONS + self.uuid
 
@@ -31,11 +33,11 @@ class Light(Switch):
             'colorTemperature': int(color_temp),
         }
 
-        response = self._client.send_request("post", url, data=color_data)
-        response_object = response.json()
+        response = yield Request("post", url, data=color_data)
+        response_object = self._client.codec.parse(response)
 
         log.debug("Set Color Temp URL (post): %s", url)
-        log.debug("Set Color Temp Response: %s", response.text)
+        log.debug("Set Color Temp Response: %s", debug.Body(response))
 
         if response_object['idForPanel'] != self.id:
             raise jaraco.abode.Exception(ERROR.SET_STATUS_DEV_ID)
@@ -57,7 +59,8 @@ class Light(Switch):
 
         log.info("Set device %s color_temp to: %s", self.id, color_temp)
 
-    def set_color(self, color) -> None:
+    @command
+    def set_color(self, color):
         """Set device color."""
         url = urls.INTEGRATIONS + self.uuid
 
@@ -68,11 +71,11 @@ class Light(Switch):
             'saturation': int(saturation),
         }
 
-        response = self._client.send_request("post", url, data=color_data)
-        response_object = response.json()
+        response = yield Request("post", url, data=color_data)
+        response_object = self._client.codec.parse(response)
 
         log.debug("Set Color URL (post): %s", url)
-        log.debug("Set Color Response: %s", response.text)
+        log.debug("Set Color Response: %s", debug.Body(response))
 
         if response_object['idForPanel'] != self.id:
             raise jaraco.abode.Exception(ERROR.SET_STATUS_DEV_ID)
@@ -1,5 +1,6 @@
 """Abode lock device."""
 
+from ..command import command, steps
 from . import base
 from . import status as STATUS
 
@@ -12,14 +13,16 @@ class Lock(base.Device):
         'retrofit_lock',
     )
 
-    def lock(self) -> None:
+    @command
+    def lock(self):
         """Lock the device."""
-        self.set_status(int(STATUS.Lock.CLOSED))
+        yield from steps(self.set_status, int(STATUS.Lock.CLOSED))
         self._state['status'] = STATUS.Lock.CLOSED
 
-    def unlock(self) -> None:
+    @command
+    def unlock(self):
         """Unlock the device."""
-        self.set_status(int(STATUS.Lock.OPEN))
+        yield from steps(self.set_status, int(STATUS.Lock.OPEN))
         self._state['status'] = STATUS.Lock.OPEN
 
     @property
@@ -1,5 +1,6 @@
 """Abode switch device."""
 
+from ..command import command, steps
 from . import base
 from . import status as STATUS
 
@@ -14,14 +15,16 @@ class Switch(base.Device):
         'power_switch_meter',
     )
 
+    @command
     def switch_on(self):
         """Turn the switch on."""
-        self.set_status(int(STATUS.ON))
+        yield from steps(self.set_status, int(STATUS.ON))
         self._state['status'] = STATUS.ON
 
+    @command
     def switch_off(self):
         """Turn the switch off."""
-        self.set_status(int(STATUS.OFF))
+        yield from steps(self.set_status, int(STATUS.OFF))
         self._state['status'] = STATUS.OFF
 
     @property
@@ -1,5 +1,6 @@
 """Abode valve device."""
 
+from ..command import command, steps
 from . import status as STATUS
 from .switch import Switch
 
@@ -9,14 +10,16 @@ class Valve(Switch):
 
     tags = ('valve',)
 
-    def switch_on(self) -> None:
+    @command
+    def switch_on(self):
         """Open the valve."""
-        self.set_status(int(STATUS.ON))
+        yield from steps(self.set_status, int(STATUS.ON))
         self._state['status'] = STATUS.OPEN
 
-    def switch_off(self) -> None:
+    @command
+    def switch_off(self):
         """Close the valve."""
-        self.set_status(int(STATUS.OFF))
+        yield from steps(self.set_status, int(STATUS.OFF))
         self._state['status'] = STATUS.CLOSED
 
     @property
@@ -0,0 +1,144 @@
+"""Dispatch of event callbacks to a pool of worker threads."""
+
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Stats:
+    """
+    Statistics for sizing a Dispatcher.
+
+    >>> stats = Stats()
+    >>> stats.record(0.5)
+    >>> stats.record(1.5)
+    >>> stats.dispatched, stats.mean_latency, stats.max_latency
+    (2, 1.0, 1.5)
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.max_depth = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def record(self, latency):
+        """Record the time a callback waited before dispatch."""
+        self.dispatched += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+
+    @property
+    def mean_latency(self):
+        return self.total_latency / self.dispatched if self.dispatched else 0.0
+
+
+class Dispatcher:
+    """
+    Run callbacks on a bounded pool of worker threads.
+
+    Callbacks submitted with the same key (e.g. a device id) are run
+    in the order submitted and never concurrently. When ``max_pending``
+    callbacks are waiting, the overflow policy applies:
+
+    - ``block``: wait in ``submit`` until a callback is dispatched.
+    - ``drop_oldest``: discard the longest-waiting callback.
+    - ``drop_newest``: discard the callback being submitted.
+
+    A Dispatcher may be shared by several event controllers and must
+    be shut down by its owner.
+
+    >>> dispatcher = Dispatcher(max_workers=2)
+    >>> results = []
+    >>> for n in range(5):
+    ...     _ = dispatcher.submit('key', results.append, n)
+    >>> dispatcher.shutdown()
+    >>> results
+    [0, 1, 2, 3, 4]
+    >>> dispatcher.stats.dispatched
+    5
+    """
+
+    policies = 'block', 'drop_oldest', 'drop_newest'
+
+    def __init__(self, max_workers=4, max_pending=1000, overflow='block'):
+        if overflow not in self.policies:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        if max_pending < 1:
+            raise ValueError(f"max_pending must be at least 1: {max_pending}")
+        self.max_pending = max_pending
+        self.overflow = overflow
+        self.stats = Stats()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers, thread_name_prefix='AbodeDispatch'
+        )
+        self._queues: dict[object, collections.deque] = {}
+        self._cond = threading.Condition()
+
+    def submit(self, key, callback, *args):
+        """
+        Schedule ``callback(*args)`` after prior callbacks for ``key``.
+
+        Return False if the callback was dropped.
+        """
+        with self._cond:
+            if self.stats.depth >= self.max_pending and not self._make_room():
+                self.stats.dropped += 1
+                log.debug("Dropped callback for %s", key)
+                return False
+            item = time.monotonic(), callback, args
+            queue = self._queues.get(key)
+            if queue is None:
+                self._queues[key] = collections.deque([item])
+                self._executor.submit(self._drain, key)
+            else:
+                queue.append(item)
+            self.stats.depth += 1
+            self.stats.max_depth = max(self.stats.max_depth, self.stats.depth)
+        return True
+
+    def _make_room(self):
+        """
+        Apply the overflow policy. Return True if there is now room.
+        """
+        if self.overflow == 'block':
+            self._cond.wait_for(lambda: self.stats.depth < self.max_pending)
+            return True
+        if self.overflow == 'drop_newest':
+            return False
+        oldest = min(
+            (queue for queue in self._queues.values() if queue),
+            key=lambda queue: queue[0][0],
+        )
+        oldest.popleft()
+        self.stats.depth -= 1
+        self.stats.dropped += 1
+        return True
+
+    def _drain(self, key):
+        while True:
+            with self._cond:
+                queue = self._queues[key]
+                if not queue:
+                    del self._queues[key]
+                    return
+                enqueued, callback, args = queue.popleft()
+                self.stats.depth -= 1
+                self.stats.record(time.monotonic() - enqueued)
+                self._cond.notify_all()
+            try:
+                callback(*args)
+            except Exception:
+                log.exception("Captured exception during dispatched callback")
+
+    def shutdown(self, wait=True):
+        """Stop accepting work, optionally waiting for pending callbacks."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,216 @@
+"""
+Streaming, resumable downloads of media such as camera images.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pathlib
+import re
+
+import requests
+
+import jaraco
+
+from .helpers import errors as ERROR
+
+log = logging.getLogger(__name__)
+
+
+class Download:
+    """
+    A download of ``url`` over ``session``, streamed in chunks of
+    ``chunk_size`` bytes (decoding any content encoding) to a file
+    or to any writable stream.
+
+    An interrupted transfer is resumed with an HTTP Range request,
+    up to ``attempts`` times, conditional (by If-Range) on the content
+    being unchanged. If the server answers a Range request with the
+    whole content (or with a range other than requested), a seekable
+    sink is rewound and the content written again.
+
+    As a range counts bytes of the content as sent, the content is
+    requested without encoding. Should the server encode it anyway,
+    an interrupted transfer is restarted rather than resumed.
+
+    With ``verify``, the content is checked against the response's
+    ETag when that is an MD5 digest, as for objects stored on S3.
+    """
+
+    chunk_size = 64 * 1024
+    attempts = 3
+
+    def __init__(self, session, url, chunk_size=None, attempts=None, verify=False):
+        self.session = session
+        self.url = url
+        if chunk_size is not None:
+            self.chunk_size = chunk_size
+        if attempts is not None:
+            self.attempts = attempts
+        self.verify = verify
+
+    def to_stream(self, sink):
+        """Write the content to the sink, returning the bytes written."""
+        base = sink.tell() if _seekable(sink) else None
+        self.validator = None
+        return self._copy(sink, base, offset=0, digest=self._digest())
+
+    def to_file(self, path, resume=True):
+        """
+        Write the content to path, atomically: the content is written
+        to ``<path>.part`` and renamed into place when complete.
+
+        With ``resume``, a ``.part`` file left by an earlier failure is
+        kept and continued if the content is unchanged, as indicated
+        by the validator (ETag or Last-Modified) saved beside it in
+        ``<path>.part.validator``; else it is removed.
+        """
+        path = pathlib.Path(path)
+        part = path.with_name(path.name + '.part')
+        saved = part.with_name(part.name + '.validator')
+        validator = _read(saved) if resume and part.exists() else None
+        offset = part.stat().st_size if validator else 0
+        digest = self._digest()
+        self.validator = validator
+        try:
+            with open(part, 'r+b' if offset else 'w+b') as strm:
+                if digest:
+                    # include any content already downloaded in the digest
+                    for chunk in iter(lambda: strm.read(self.chunk_size), b''):
+                        digest.update(chunk)
+                strm.seek(offset)
+                self._copy(strm, base=0, offset=offset, digest=digest)
+        except BaseException:
+            if resume and self.validator:
+                saved.write_text(self.validator, encoding='utf-8')
+            else:
+                part.unlink(missing_ok=True)
+                saved.unlink(missing_ok=True)
+            raise
+        os.replace(part, path)
+        saved.unlink(missing_ok=True)
+        return path
+
+    def _digest(self):
+        return hashlib.md5() if self.verify else None
+
+    validator = None
+    """The validator of the content, once known."""
+
+    def _copy(self, sink, base, offset, digest):
+        written = offset
+        encoded = False
+        for attempt in range(1, self.attempts + 1):
+            try:
+                with self._get(written) as response:
+                    if written and response.status_code == 200:
+                        log.info("Range ignored or content changed; restarting")
+                        written = self._rewind(sink, base)
+                        digest = self._digest()
+                    self.validator = _validator(response)
+                    encoded = _encoded(response)
+                    for chunk in response.iter_content(self.chunk_size):
+                        sink.write(chunk)
+                        if digest:
+                            digest.update(chunk)
+                        written += len(chunk)
+                    self._check(response, digest)
+                    return written - offset
+            except requests.RequestException as exc:
+                log.warning(
+                    "Download interrupted at %d bytes (attempt %d): %s",
+                    written,
+                    attempt,
+                    exc,
+                )
+                if encoded and written:
+                    # decoded bytes do not locate the range to resume
+                    written = self._rewind(sink, base)
+                    digest = self._digest()
+        raise jaraco.abode.Exception(ERROR.MEDIA_DOWNLOAD_FAILED)
+
+    def _get(self, start):
+        headers = {'Accept-Encoding': 'identity'}
+        if start:
+            headers['Range'] = f'bytes={start}-'
+        if start and self.validator:
+            headers['If-Range'] = self.validator
+        response = self.session.get(self.url, headers=headers, stream=True)
+        if start and response.status_code == 416:
+            # the partial content is unusable; start over
+            response.close()
+            return self._get(0)
+        if start and response.status_code == 206 and _range_start(response) != start:
+            log.info("Range %s not as requested; restarting", _content_range(response))
+            response.close()
+            return self._get(0)
+        if response.status_code not in (200, 206):
+            log.warning(
+                "Unexpected response code %s when requesting image: %s",
+                str(response.status_code),
+                response.text,
+            )
+            response.close()
+            raise jaraco.abode.Exception(ERROR.CAM_IMAGE_REQUEST_INVALID)
+        return response
+
+    @staticmethod
+    def _rewind(sink, base):
+        if base is None:
+            raise jaraco.abode.Exception(ERROR.MEDIA_DOWNLOAD_FAILED)
+        sink.seek(base)
+        sink.truncate()
+        return 0
+
+    def _check(self, response, digest):
+        if not self.verify:
+            return
+        etag = response.headers.get('ETag', '').strip('"')
+        if not re.fullmatch('[0-9a-f]{32}', etag):
+            log.debug("No MD5 ETag to verify %s", self.url)
+            return
+        if digest.hexdigest() != etag:
+            raise jaraco.abode.Exception(ERROR.MEDIA_CHECKSUM_MISMATCH)
+
+
+def _validator(response):
+    """
+    Return the strong validator of the response, suitable for If-Range.
+    """
+    etag = response.headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return response.headers.get('Last-Modified')
+
+
+def _content_range(response):
+    return response.headers.get('Content-Range', '')
+
+
+def _range_start(response):
+    """
+    Return the first byte position of the response's Content-Range,
+    if any.
+    """
+    match = re.match(r'bytes\s+(\d+)-', _content_range(response))
+    return match and int(match.group(1))
+
+
+def _encoded(response):
+    return response.headers.get('Content-Encoding', 'identity') != 'identity'
+
+
+def _read(path):
+    try:
+        return path.read_text(encoding='utf-8') or None
+    except FileNotFoundError:
+        return None
+
+
+def _seekable(stream):
+    try:
+        return stream.seekable()
+    except AttributeError:
+        return False
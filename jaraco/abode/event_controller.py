@@ -1,8 +1,12 @@
 """Abode cloud push events."""
 
 import collections
+import concurrent.futures
+import functools
 import http.cookiejar
 import logging
+import random
+import threading
 
 import jaraco
 from jaraco.itertools import always_iterable
@@ -14,6 +18,7 @@ from .devices.base import Device
 from .helpers import errors as ERROR
 from .helpers import timeline as TIMELINE
 from .helpers import urls
+from .scheduler import Scheduler
 
 log = logging.getLogger(__name__)
 
@@ -34,20 +39,86 @@ def _cookie_string(cookies: http.cookiejar.CookieJar):
 class EventController:
     """Subscribes to events."""
 
-    def __init__(self, client, url=SOCKETIO_URL):
+    coalesce_window = 0
+    """
+    Seconds to collect device update events before refreshing those
+    devices. Duplicate updates within the window result in a single
+    refresh. Zero refreshes on each update.
+    """
+
+    batch_threshold = 10
+    """
+    Number of distinct devices in a coalesced update at which the device
+    list is refreshed in a single request rather than one request per
+    device.
+    """
+
+    dispatcher = None
+    """
+    A :class:`jaraco.abode.dispatch.Dispatcher` on which to run callbacks.
+    If None, callbacks run on the SocketIO thread or, with a reactor,
+    on the reactor's callback workers.
+    """
+
+    replay_page_size = 50
+    """Timeline events requested per page when replaying after a reconnect."""
+
+    replay_max_pages = 10
+    """
+    Maximum pages of timeline events requested when replaying after a
+    reconnect. If more events were missed, devices are resynchronized
+    instead.
+    """
+
+    seen_limit = 1000
+    """Number of recent timeline event ids remembered to suppress duplicates."""
+
+    resync_jitter = 0
+    """
+    Maximum seconds to wait, chosen at random, before synchronizing
+    state after a connection, spreading the requests of many clients
+    reconnecting after a shared outage. The wait is scheduled on the
+    reactor, if any, so is shared by the clients of a
+    :class:`jaraco.abode.fleet.Fleet`.
+    """
+
+    def __init__(self, client, url=SOCKETIO_URL, reactor=None):
         self._client = client
         self._thread = None
         self._running = False
         self._connected = False
 
+        # Delayed calls, when not scheduled on a reactor
+        self._scheduler = Scheduler()
+        self._resync_timer = None
+
+        # Device updates collected during the coalesce window
+        self._pending_devices = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer = None
+
+        # Recent timeline events, for replay after a reconnect
+        self._last_event = None
+        self._seen_events = collections.OrderedDict()
+        self._timeline_lock = threading.Lock()
+
         # Setup callback dicts
         self._connection_status_callbacks = collections.defaultdict(list)
         self._device_callbacks = collections.defaultdict(list)
         self._event_callbacks = collections.defaultdict(list)
         self._timeline_callbacks = collections.defaultdict(list)
 
+        # Latest pushed timeline event, by device id and event code
+        self._latest_timeline = {}
+        self._epoch = 0
+
+        # Futures awaiting a timeline event, by device id and event code
+        self._waiters = collections.defaultdict(list)
+        self._waiters_lock = threading.Lock()
+
         # Setup SocketIO
-        self._socketio = sio.SocketIO(url=url, origin=urls.BASE)
+        self._socketio = sio.SocketIO(url=url, origin=urls.BASE, reactor=reactor)
+        self._socketio.codec = client.codec
 
         # Setup SocketIO Callbacks
         self._socketio.on('started', self._on_socket_started)
@@ -65,6 +136,8 @@ class EventController:
     def stop(self):
         """Tell the subscription thread to terminate - will block."""
         self._socketio.stop()
+        self._scheduler.cancel(self._resync_timer)
+        self._discard_device_updates()
 
     def add_connection_status_callback(self, unique_id, callback):
         """Register callback for Abode server connection status."""
@@ -169,6 +242,65 @@ class EventController:
 
         return True
 
+    def latest_timeline(self, device_id, timeline_event):
+        """
+        Return the most recent timeline event of the given kind pushed
+        for the device, if any.
+        """
+        return self._latest_timeline.get((device_id, timeline_event['event_code']))
+
+    @property
+    def epoch(self):
+        """
+        The number of connections made. While connected, events pushed
+        since a given epoch are complete if the epoch is unchanged.
+        """
+        return self._epoch
+
+    def wait_for_timeline(self, device_id, timeline_event, timeout=None):
+        """
+        Return a :class:`concurrent.futures.Future` resolved with the
+        next timeline event of the given kind (e.g.
+        ``TIMELINE.CAPTURE_IMAGE``) pushed for the device. Cancel the
+        future to stop waiting. The future is cancelled when the socket
+        is (or becomes) disconnected, as the event may then be missed,
+        or after ``timeout`` seconds, if given.
+        """
+        key = device_id, timeline_event['event_code']
+        future = concurrent.futures.Future()
+        with self._waiters_lock:
+            self._waiters[key].append(future)
+        future.add_done_callback(functools.partial(self._discard_waiter, key))
+        if not self._connected:
+            future.cancel()
+        elif timeout is not None:
+            timer = self._call_later(timeout, future.cancel)
+            future.add_done_callback(lambda _: self._scheduler.cancel(timer))
+        return future
+
+    def _discard_waiter(self, key, future):
+        with self._waiters_lock:
+            waiters = self._waiters.get(key, [])
+            if future in waiters:
+                waiters.remove(future)
+            if not waiters:
+                self._waiters.pop(key, None)
+
+    def _cancel_waiters(self):
+        with self._waiters_lock:
+            waiters = [future for key in self._waiters for future in self._waiters[key]]
+            self._waiters.clear()
+        for future in waiters:
+            future.cancel()
+
+    def _resolve_waiters(self, event):
+        key = event.get('device_id'), event.get('event_code')
+        with self._waiters_lock:
+            waiters = self._waiters.pop(key, [])
+        for future in waiters:
+            if future.set_running_or_notify_cancel():
+                future.set_result(event)
+
     @property
     def connected(self):
         """Get the Abode connection status."""
@@ -179,6 +311,31 @@ class EventController:
         """Get the SocketIO instance."""
         return self._socketio
 
+    @property
+    def reactor(self):
+        """
+        The :class:`jaraco.abode.reactor.Reactor` driving the SocketIO
+        connection, or None if it runs in its own thread. Set before
+        calling ``start``.
+        """
+        return self._socketio.reactor
+
+    @reactor.setter
+    def reactor(self, reactor):
+        self._socketio.reactor = reactor
+
+    def _call_later(self, delay, func, *args):
+        """
+        Call func after delay seconds, returning a timer for
+        ``_scheduler.cancel``. With a reactor, the call is scheduled
+        on it and run on its callback workers, in turn with the
+        SocketIO callbacks; otherwise, on the controller's scheduler.
+        """
+        reactor = self.reactor
+        if reactor is None:
+            return self._scheduler.call_later(delay, func, *args)
+        return reactor.call_later(delay, reactor.dispatch, self._socketio, func, *args)
+
     def _on_socket_started(self):
         """Socket IO startup callback."""
         self._socketio.set_cookie(_cookie_string(self._client._get_session().cookies))
@@ -186,9 +343,24 @@ class EventController:
     def _on_socket_connected(self):
         """Socket IO connected callback."""
         self._connected = True
+        self._epoch += 1
+
+        delay = random.uniform(0, self.resync_jitter)
+        if not delay:
+            self._synchronize()
+            return
+
+        log.debug("Synchronizing in %.1f seconds", delay)
+        self._scheduler.cancel(self._resync_timer)
+        self._resync_timer = self._call_later(delay, self._synchronize)
 
+    def _synchronize(self):
+        """
+        Bring state up to date after a connection, then notify
+        connection subscribers.
+        """
         try:
-            self._client.refresh()
+            self._replay_timeline() or self._resync()
         except Exception as exc:
             log.warning("Captured exception during Abode refresh: %s", exc)
         finally:
@@ -197,15 +369,18 @@ class EventController:
             # is updated since we are in fact connected to the web socket.
             for callbacks in self._connection_status_callbacks.values():
                 for callback in callbacks:
-                    _execute_callback(callback)
+                    self._dispatch('connection', callback)
 
     def _on_socket_disconnected(self):
         """Socket IO disconnected callback."""
+        # events may be missed until reconnected
+        self._latest_timeline.clear()
         self._connected = False
+        self._cancel_waiters()
 
         for callbacks in self._connection_status_callbacks.values():
             for callback in callbacks:
-                _execute_callback(callback)
+                self._dispatch('connection', callback)
 
     def _on_device_update(self, devid):
         """Device callback from Abode SocketIO server."""
@@ -217,14 +392,50 @@ class EventController:
 
         log.debug("Device update event for device ID: %s", devid)
 
-        device = self._client.get_device(devid, True)
-
-        if not device:
-            log.debug("Got device update for unknown device: %s", devid)
+        if not self.coalesce_window:
+            self._refresh_devices([devid])
             return
 
-        for callback in self._device_callbacks[device.id]:
-            _execute_callback(callback, device)
+        with self._pending_lock:
+            self._pending_devices[devid] = None
+            if self._flush_timer is None:
+                self._flush_timer = self._call_later(
+                    self.coalesce_window, self._flush_device_updates
+                )
+
+    def _discard_device_updates(self):
+        """Drop pending device updates, returning their device ids."""
+        with self._pending_lock:
+            devids = list(self._pending_devices)
+            self._pending_devices.clear()
+            self._scheduler.cancel(self._flush_timer)
+            self._flush_timer = None
+        return devids
+
+    def _flush_device_updates(self):
+        """Refresh devices with pending updates."""
+        devids = self._discard_device_updates()
+
+        try:
+            self._refresh_devices(devids)
+        except Exception as exc:
+            log.warning("Captured exception during device refresh: %s", exc)
+
+    def _refresh_devices(self, devids):
+        """Refresh the indicated devices and invoke their callbacks."""
+        if len(devids) >= self.batch_threshold:
+            self._client._load_devices(panel=False)
+            devices = map(self._client.get_device, devids)
+        else:
+            devices = (self._client.get_device(devid, True) for devid in devids)
+
+        for devid, device in zip(devids, devices):
+            if not device:
+                log.debug("Got device update for unknown device: %s", devid)
+                continue
+
+            for callback in self._device_callbacks[device.id]:
+                self._dispatch(device.id, callback, device)
 
     def _on_mode_change(self, mode):
         """Mode change broadcast from Abode SocketIO server."""
@@ -249,7 +460,7 @@ class EventController:
         alarm_device._state['mode']['area_1'] = mode
 
         for callback in self._device_callbacks[alarm_device.id]:
-            _execute_callback(callback, alarm_device)
+            self._dispatch(alarm_device.id, callback, alarm_device)
 
     def _on_timeline_update(self, event):
         """Timeline update broadcast from Abode SocketIO server."""
@@ -262,6 +473,10 @@ class EventController:
             log.warning("Invalid timeline update event: %s", event)
             return
 
+        if self._seen(event):
+            log.debug("Ignoring duplicate timeline event: %s", event.get('id'))
+            return
+
         log.debug(
             "Timeline event received: %s - %s (%s)",
             event.get('event_name'),
@@ -269,20 +484,109 @@ class EventController:
             event_code,
         )
 
+        if device_id := event.get('device_id'):
+            self._latest_timeline[device_id, event_code] = event
+        self._resolve_waiters(event)
+
         # Compress our callbacks into those that match this event_code
         # or ones registered to get callbacks for all events
         codes = (event_code, TIMELINE.ALL['event_code'])
         all_callbacks = [self._timeline_callbacks[code] for code in codes]
 
+        key = event.get('device_id') or 'timeline'
+
         for callbacks in all_callbacks:
             for callback in callbacks:
-                _execute_callback(callback, event)
+                self._dispatch(key, callback, event)
 
         # Attempt to map the event code to a group and callback
         event_group = TIMELINE.map_event_code(event_code)
 
         for callback in self._event_callbacks[event_group]:
-            _execute_callback(callback, event)
+            self._dispatch(key, callback, event)
+
+    def _seen(self, event):
+        """
+        Record the event as seen, returning True if it already was.
+        """
+        event_id = event.get('id')
+        if event_id is None:
+            return False
+        with self._timeline_lock:
+            if event_id in self._seen_events:
+                return True
+            self._seen_events[event_id] = None
+            while len(self._seen_events) > self.seen_limit:
+                self._seen_events.popitem(last=False)
+            self._last_event = event
+        return False
+
+    def _resync(self):
+        """
+        Refresh all devices, invoking callbacks only for those changed.
+        """
+        changed = self._client.resync()
+        log.info("Resynchronized; %d devices changed", len(changed))
+        for device in changed:
+            for callback in self._device_callbacks[device.id]:
+                self._dispatch(device.id, callback, device)
+
+    def _replay_timeline(self):
+        """
+        Replay to subscribers the timeline events missed since the last
+        one seen, then refresh the devices they touched. Return False
+        if no event has been seen from which to replay, or if the missed
+        events could not be retrieved.
+        """
+        with self._timeline_lock:
+            last = self._last_event
+        if last is None:
+            return False
+
+        try:
+            missed = self._missed_events(last)
+        except Exception as exc:
+            log.warning("Unable to replay timeline: %s", exc)
+            return False
+
+        if missed is None:
+            log.info("Too many timeline events missed to replay")
+            return False
+
+        log.info("Replaying %d missed timeline events", len(missed))
+        for event in missed:
+            self._on_timeline_update(event)
+
+        devids = list(dict.fromkeys(event.get('device_id') for event in missed))
+        self._refresh_devices([devid for devid in devids if devid])
+        return True
+
+    def _missed_events(self, last):
+        """
+        Return the timeline events since the last one seen, in order,
+        paging back from the latest until reaching events already seen.
+        Return None if not reached within ``replay_max_pages``.
+        """
+        since = _event_time(last)
+        missed = []
+        path = urls.TIMELINE_LATEST.format(size=self.replay_page_size)
+        for _ in range(self.replay_max_pages):
+            response = self._client.send_request('get', path)
+            page = sorted(self._client.codec.parse(response), key=_event_time)
+            with self._timeline_lock:
+                unseen = [
+                    event
+                    for event in page
+                    if _event_time(event) >= since
+                    and event.get('id') not in self._seen_events
+                ]
+            missed[:0] = unseen
+            if len(unseen) < len(page) or len(page) < self.replay_page_size:
+                return missed
+            path = urls.TIMELINE_BEFORE.format(
+                id=page[0]['id'], size=self.replay_page_size
+            )
+        return None
 
     def _on_automation_update(self, event):
         """Automation update broadcast from Abode SocketIO server."""
@@ -291,7 +595,21 @@ class EventController:
         event = single(event)
 
         for callback in self._event_callbacks[event_group]:
-            _execute_callback(callback, event)
+            self._dispatch('automation', callback, event)
+
+    def _dispatch(self, key, callback, *args):
+        """
+        Execute the callback, on the dispatcher if configured. Callbacks
+        with the same key are executed in order.
+        """
+        if self.dispatcher is None:
+            _execute_callback(callback, *args)
+        else:
+            self.dispatcher.submit(key, _execute_callback, callback, *args)
+
+
+def _event_time(event):
+    return int(event.get('event_utc') or 0)
 
 
 def _execute_callback(callback, *args, **kwargs):
@@ -0,0 +1,180 @@
+"""
+Many Abode accounts in one process.
+"""
+
+from __future__ import annotations
+
+import collections.abc
+import concurrent.futures
+import logging
+
+from .client import Client, _cookies
+from .dispatch import Dispatcher
+from .reactor import Reactor
+from .store import account_filename
+from .transport import Transport
+
+log = logging.getLogger(__name__)
+
+
+class Health:
+    """
+    The condition of an account in a fleet.
+
+    ``error`` is the exception from the account's last failed
+    fleet-wide operation, cleared when one succeeds.
+    """
+
+    def __init__(self, username, connected, devices, auth_stats, error=None):
+        self.username = username
+        self.connected = connected
+        self.devices = devices
+        self.auth_stats = auth_stats
+        self.error = error
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    def __repr__(self):
+        state = 'connected' if self.connected else 'disconnected'
+        outcome = 'ok' if self.ok else repr(self.error)
+        return f'<Health {self.username} {state}, {self.devices} devices: {outcome}>'
+
+
+class Fleet(collections.abc.Mapping):
+    """
+    A set of clients, by username, sharing the resources that would
+    otherwise be duplicated for each account:
+
+    - a connection pool of at most ``pool_size`` connections to Abode,
+      blocking requests beyond it;
+    - a :class:`jaraco.abode.dispatch.Dispatcher` of ``max_workers``
+      threads for event callbacks;
+    - a :class:`jaraco.abode.reactor.Reactor`, driving every event
+      connection, its reconnection, and the resynchronization after
+      it (spread over ``resync_jitter`` seconds) from a single thread.
+
+    Each account keeps its own cookies and session tokens, so clients
+    do not share a login.
+
+    >>> fleet = Fleet()
+    >>> client = fleet.add('user@example.com', 'secret')
+    >>> fleet['user@example.com'] is client
+    True
+    >>> list(fleet)
+    ['user@example.com']
+    >>> fleet.remove('user@example.com')
+    >>> len(fleet)
+    0
+    >>> fleet.stop()
+    """
+
+    def __init__(self, pool_size=20, max_workers=4, resync_jitter=30):
+        self.transport = Transport(pool_maxsize=pool_size, pool_block=True)
+        self.dispatcher = Dispatcher(max_workers=max_workers)
+        self.reactor = Reactor()
+        self.max_workers = max_workers
+        self.resync_jitter = resync_jitter
+        self._clients: dict[str, Client] = {}
+        self._errors: dict[str, Exception] = {}
+
+    def __getitem__(self, username):
+        return self._clients[username]
+
+    def __iter__(self):
+        return iter(self._clients)
+
+    def __len__(self):
+        return len(self._clients)
+
+    def add(self, username, password, **kwargs):
+        """
+        Create a client for the account, passing kwargs to
+        :class:`jaraco.abode.Client`.
+        """
+        if username in self._clients:
+            raise ValueError(f"Account already in fleet: {username}")
+        cookies = _cookies(account_filename('cookies', username))
+        kwargs.setdefault('persist_session', True)
+        client = Client(
+            username, password, transport=self.transport, cookie_jar=cookies, **kwargs
+        )
+        client.events.dispatcher = self.dispatcher
+        client.events.reactor = self.reactor
+        client.events.resync_jitter = self.resync_jitter
+        self._clients[username] = client
+        return client
+
+    def remove(self, username):
+        """Stop the account's events and remove it from the fleet."""
+        client = self._clients.pop(username)
+        self._errors.pop(username, None)
+        client.events.stop()
+
+    def start(self):
+        """Start receiving events for all accounts."""
+        for client in self._clients.values():
+            client.events.start()
+
+    def stop(self):
+        """Stop events for all accounts and release shared resources."""
+        for client in self._clients.values():
+            client.events.stop()
+        self.reactor.stop()
+        self.dispatcher.shutdown()
+
+    def map(self, func):
+        """
+        Call func with each client concurrently, returning the results
+        by username. Accounts for which func fails are omitted, with the
+        failure recorded in their :meth:`health`.
+        """
+        if not self._clients:
+            return {}
+        workers = min(self.max_workers, len(self._clients))
+        with concurrent.futures.ThreadPoolExecutor(
+            workers, thread_name_prefix='AbodeFleet'
+        ) as pool:
+            futures = {
+                username: pool.submit(func, client)
+                for username, client in self._clients.items()
+            }
+        return dict(self._collect(futures))
+
+    def _collect(self, futures):
+        for username, future in futures.items():
+            error = future.exception()
+            if error is not None:
+                log.warning("Fleet operation failed for %s: %s", username, error)
+                self._errors[username] = error
+                continue
+            self._errors.pop(username, None)
+            yield username, future.result()
+
+    def devices(self, generic_type=None, type_tag=None):
+        """
+        Yield (username, device) for the devices of all accounts,
+        optionally filtered as in :meth:`jaraco.abode.Client.get_devices`.
+        """
+        found = self.map(
+            lambda client: client.get_devices(
+                generic_type=generic_type, type_tag=type_tag
+            )
+        )
+        for username, devices in found.items():
+            for device in devices:
+                yield username, device
+
+    def health(self):
+        """Return the :class:`Health` of each account, by username."""
+        return {
+            username: Health(
+                username,
+                connected=client.events.connected,
+                devices=len(client._devices or ()),
+                auth_stats=client.auth_stats,
+                error=self._errors.get(username),
+            )
+            for username, client in self._clients.items()
+        }
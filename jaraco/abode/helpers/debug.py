@@ -0,0 +1,60 @@
+"""Lazy rendering of responses for debug logging."""
+
+from __future__ import annotations
+
+import re
+
+
+class Body:
+    """
+    A response body, rendered for a log record only when emitted.
+
+    Passing a Body as a logging argument (rather than ``response.text``)
+    defers decoding until a handler formats the record, so it costs
+    nothing when debug logging is off. When rendered, at most ``limit``
+    bytes are decoded and the values of ``redacted`` keys are masked.
+    Set ``limit`` to None or ``redacted`` to ``()`` to disable either.
+
+    >>> class Response:
+    ...     content = b'{"token": "abc123", "panel": {"mode": "standby"}}'
+    ...     encoding = 'utf-8'
+    >>> print(Body(Response()))
+    {"token": "***", "panel": {"mode": "standby"}}
+    >>> print(Body(Response(), limit=14))
+    {"token": "***"... (49 bytes)
+    """
+
+    limit: int | None = 2048
+    """Maximum number of bytes of the body to render."""
+
+    redacted = (
+        'token',
+        'access_token',
+        'password',
+        'mfa_code',
+        'base64Image',
+    )
+    """Keys whose string values are masked."""
+
+    def __init__(self, response, limit=None, redacted=None):
+        self.response = response
+        if limit is not None:
+            self.limit = limit
+        if redacted is not None:
+            self.redacted = redacted
+
+    def __str__(self):
+        content = self.response.content or b''
+        text = content[: self.limit].decode(
+            self.response.encoding or 'utf-8', errors='replace'
+        )
+        if self.redacted:
+            text = self._pattern().sub(r'\1"***"', text)
+        if self.limit is not None and len(content) > self.limit:
+            text += f'... ({len(content)} bytes)'
+        return text
+
+    def _pattern(self):
+        keys = '|'.join(map(re.escape, self.redacted))
+        # a string, with escapes, and perhaps truncated by the limit
+        return re.compile(rf'("(?:{keys})"\s*:\s*)"(?:[^"\\]|\\.)*\\?"?')
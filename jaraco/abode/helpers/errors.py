@@ -87,3 +87,11 @@ MFA_CODE_REQUIRED = (32, "Multifactor authentication code required for login.")
 UNKNOWN_MFA_TYPE = (33, "Unknown multifactor authentication type.")
 
 START_KVS_STREAM = (34, "Unable to start KVS stream for camera")
+
+MEDIA_DOWNLOAD_FAILED = (35, "Download interrupted and could not be resumed.")
+
+MEDIA_CHECKSUM_MISMATCH = (36, "Downloaded content does not match its checksum.")
+
+CAM_CAPTURE_FAILED = (37, "Camera image capture request failed.")
+
+CAM_CAPTURE_TIMEOUT = (38, "Timed out waiting for camera image capture.")
@@ -31,6 +31,11 @@ AUTOMATION = '/integrations/v1/automations/'
 AUTOMATION_ID = AUTOMATION + '{id}/'
 AUTOMATION_APPLY = AUTOMATION_ID + 'apply'
 
+TIMELINE = '/api/v1/timeline'
+# newest first, either the latest events or those preceding an event
+TIMELINE_LATEST = TIMELINE + '?dir=next&size={size}'
+TIMELINE_BEFORE = TIMELINE + '?dir=next&id={id}&size={size}'
+
 TIMELINE_IMAGES_ID = (
     '/api/v1/timeline?device_id={device_id}&dir=next&event_label=Image+Capture&size=1'
 )
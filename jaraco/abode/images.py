@@ -0,0 +1,186 @@
+"""
+Decoding and caching of camera images.
+"""
+
+from __future__ import annotations
+
+import base64
+import collections
+import itertools
+import json
+import re
+import threading
+
+
+def decode_field(chunks, key, sink):
+    """
+    Decode to sink the base64 string value of key in a JSON document
+    arriving in chunks, holding no more than a chunk of the value at
+    a time. Return the number of bytes written, or None if the key
+    is absent.
+
+    >>> import io
+    >>> sink = io.BytesIO()
+    >>> chunks = [b'{"id": 1, "base64', b'Image"  :', b'  "aGVsbG8', b'gd29y', b'bGQ="}']
+    >>> decode_field(chunks, 'base64Image', sink)
+    11
+    >>> sink.getvalue()
+    b'hello world'
+    >>> decode_field([b'{"id": 1}'], 'base64Image', sink)
+    >>> decode_field([b'{"base64Image": "aGVsbG8'], 'base64Image', sink)
+    Traceback (most recent call last):
+    ...
+    ValueError: Truncated value for base64Image
+    """
+    chunks = iter(chunks)
+    head = _value_start(chunks, key)
+    if head is None:
+        return None
+
+    written = 0
+    # base64 short of a whole quantum, and an escape split across chunks
+    pending = carry = b''
+    for chunk in itertools.chain([head], chunks):
+        data = carry + chunk
+        body = _STRING.match(data).group()
+        carry = data[len(body) :]
+        closed = carry[:1] == b'"'
+        text = _NOT_BASE64.sub(b'', _ESCAPE.sub(_unescape, body))
+        data = pending + text
+        usable = len(data) if closed else len(data) - len(data) % 4
+        decoded = base64.b64decode(data[:usable])
+        sink.write(decoded)
+        written += len(decoded)
+        if closed:
+            return written
+        pending = data[usable:]
+    raise ValueError(f"Truncated value for {key}")
+
+
+_STRING = re.compile(rb'(?:[^"\\]+|\\u[0-9a-fA-F]{4}|\\[^u])*')
+"""The characters and complete escapes of a JSON string."""
+
+_ESCAPE = re.compile(rb'\\(?:u[0-9a-fA-F]{4}|.)', re.DOTALL)
+
+_NOT_BASE64 = re.compile(rb'[^A-Za-z0-9+/=]')
+
+
+def _unescape(match):
+    # most often an escaped solidus; otherwise, such as a line break
+    # wrapping the value, resolved as JSON
+    escape = match.group()
+    return b'/' if escape == b'\\/' else json.loads(b'"%s"' % escape).encode()
+
+
+def _value_start(chunks, key):
+    """
+    Consume chunks through the opening quote of the string value of
+    key, returning the rest of the chunk, or None if the key is absent.
+
+    >>> _value_start(iter([b'{"a": "b", "b"', b' \\n:', b' "c"}']), 'b')
+    b'c"}'
+    """
+    needle = b'"%s"' % key.encode()
+    buffer = b''
+    # the bytes to follow the key, if found
+    expect = b''
+    for chunk in chunks:
+        buffer += chunk
+        while buffer:
+            if not expect:
+                pos = buffer.find(needle)
+                if pos < 0:
+                    # retain enough to match a key split across chunks
+                    buffer = buffer[-len(needle) + 1 :]
+                    break
+                buffer = buffer[pos + len(needle) :]
+                expect = b':"'
+                continue
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+            if buffer[:1] != expect[:1]:
+                # not the key, but a string value equal to it
+                expect = b''
+                continue
+            buffer, expect = buffer[1:], expect[1:]
+            if not expect:
+                return buffer
+    return None
+
+
+def encode(data, sink, size=48 * 1024):
+    """
+    Write data to sink (a text stream) in base64, encoding ``size``
+    bytes (a multiple of 3) at a time.
+
+    >>> import io
+    >>> sink = io.StringIO()
+    >>> encode(b'hello world', sink, size=3)
+    >>> sink.getvalue()
+    'aGVsbG8gd29ybGQ='
+    """
+    view = memoryview(data)
+    for pos in range(0, len(view), size):
+        sink.write(base64.b64encode(view[pos : pos + size]).decode('ascii'))
+
+
+class ImageCache:
+    """
+    Decoded images by key (such as a device id), holding at most
+    ``budget`` bytes and evicting the least recently used beyond it.
+    Images larger than the budget are not held; a budget of zero
+    disables the cache.
+
+    >>> cache = ImageCache(budget=10)
+    >>> cache.put('a', b'12345')
+    >>> cache.put('b', b'12345')
+    >>> cache.get('a')
+    b'12345'
+    >>> cache.put('c', b'123')
+    >>> cache.get('b')
+    >>> cache.size
+    8
+    """
+
+    budget = 16 * 2**20
+    """Maximum bytes of images held."""
+
+    def __init__(self, budget=None):
+        if budget is not None:
+            self.budget = budget
+        self._images: collections.OrderedDict[str, bytes] = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.size = 0
+
+    def __len__(self):
+        return len(self._images)
+
+    def get(self, key):
+        """Return the image for key, if held."""
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+            return image
+
+    def put(self, key, image):
+        """Hold the image for key, evicting others as needed."""
+        with self._lock:
+            self._discard(key)
+            if len(image) > self.budget:
+                return
+            self._images[key] = image
+            self.size += len(image)
+            while self.size > self.budget:
+                self._discard(next(iter(self._images)))
+
+    def discard(self, key):
+        """Release the image for key, if held."""
+        with self._lock:
+            self._discard(key)
+
+    def _discard(self, key):
+        image = self._images.pop(key, None)
+        if image is not None:
+            self.size -= len(image)
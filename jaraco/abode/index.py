@@ -0,0 +1,127 @@
+"""Device cache with secondary indexes."""
+
+from __future__ import annotations
+
+import collections
+import contextlib
+import itertools
+
+from jaraco.itertools import always_iterable
+
+
+class DeviceIndex(dict):
+    """
+    Devices keyed by id, also indexed by generic type, type tag, and uuid.
+
+    >>> from types import SimpleNamespace as NS
+    >>> devs = DeviceIndex()
+    >>> devs['a'] = NS(id='a', generic_type='lock', type_tag='device_type.door_lock',
+    ...     uuid='1')
+    >>> devs['b'] = NS(id='b', generic_type='door', type_tag='device_type.door_contact',
+    ...     uuid='2')
+    >>> [dev.id for dev in devs.select(generic_type='lock')]
+    ['a']
+    >>> [dev.id for dev in devs.select(type_tag='Device_Type.Door_Contact')]
+    ['b']
+    >>> devs.by_uuid('2').id
+    'b'
+
+    Devices of several types are selected in the order they were added.
+
+    >>> devs['c'] = NS(id='c', generic_type='lock', type_tag='device_type.door_lock',
+    ...     uuid='3')
+    >>> [dev.id for dev in devs.select(generic_type=['lock', 'door'])]
+    ['a', 'b', 'c']
+
+    >>> del devs['b']
+    >>> list(devs.select(generic_type='door'))
+    []
+    >>> 'door' in devs._generic_types
+    False
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._generic_types = collections.defaultdict(dict)
+        self._type_tags = collections.defaultdict(dict)
+        self._uuids = {}
+        self._keys = {}
+        # position of each device, as in the dict
+        self._order = {}
+        self._seq = itertools.count()
+
+    def __setitem__(self, id, device):
+        with contextlib.suppress(KeyError):
+            self._unindex(id)
+        super().__setitem__(id, device)
+        if id not in self._order:
+            self._order[id] = next(self._seq)
+        self._index(id, device)
+
+    def __delitem__(self, id):
+        super().__delitem__(id)
+        self._unindex(id)
+        del self._order[id]
+
+    def clear(self):
+        super().clear()
+        self._generic_types.clear()
+        self._type_tags.clear()
+        self._uuids.clear()
+        self._keys.clear()
+        self._order.clear()
+
+    def reindex(self, device):
+        """
+        Update the indexes for a device whose state may have changed.
+        """
+        self[device.id] = device
+
+    def _index(self, id, device):
+        keys = (
+            device.generic_type,
+            getattr(device, 'type_tag', '').lower(),
+            getattr(device, 'uuid', None),
+        )
+        generic_type, type_tag, uuid = self._keys[id] = keys
+        self._generic_types[generic_type][id] = device
+        self._type_tags[type_tag][id] = device
+        if uuid is not None:
+            self._uuids[uuid] = device
+
+    def _unindex(self, id):
+        generic_type, type_tag, uuid = self._keys.pop(id)
+        for index, key in (
+            (self._generic_types, generic_type),
+            (self._type_tags, type_tag),
+        ):
+            group = index[key]
+            group.pop(id, None)
+            if not group:
+                del index[key]
+        self._uuids.pop(uuid, None)
+
+    def select(self, generic_type=None, type_tag=None):
+        """
+        Select devices matching any of the generic types and any of the
+        type tags (if supplied).
+        """
+        matches = self._from(self._generic_types, generic_type)
+        if type_tag is None:
+            return matches
+        tags = [tag.lower() for tag in always_iterable(type_tag)]
+        if generic_type is None:
+            return self._from(self._type_tags, tags)
+        return (device for device in matches if self._keys[device.id][1] in tags)
+
+    def _from(self, index, keys):
+        if keys is None:
+            return iter(self.values())
+        groups = (index.get(key, {}) for key in dict.fromkeys(always_iterable(keys)))
+        items = itertools.chain.from_iterable(group.items() for group in groups)
+        # in the order of the dict, even across groups or once reindexed
+        ordered = sorted(items, key=lambda item: self._order[item[0]])
+        return (device for id, device in ordered)
+
+    def by_uuid(self, uuid):
+        return self._uuids.get(uuid)
@@ -0,0 +1,364 @@
+"""Drive many SocketIO connections from a single thread."""
+
+from __future__ import annotations
+
+import collections
+import concurrent.futures
+import functools
+import heapq
+import itertools
+import logging
+import selectors
+import socket
+import threading
+import time
+
+from lomond import events
+
+from . import scheduler
+from .channel import Channel
+from .dispatch import Dispatcher
+from .socketio import BackoffIntervals
+
+log = logging.getLogger(__name__)
+
+
+class _Connection:
+    """A SocketIO connection driven by a Reactor."""
+
+    close_timeout = 30
+
+    def __init__(self, reactor, sio):
+        self.reactor = reactor
+        self.sio = sio
+        self.intervals = BackoffIntervals()
+        self.channel = None
+        self.timer = None
+        self.active = True
+
+    def connect(self):
+        """Connect on the reactor's connect pool."""
+        self.timer = None
+        if not self.active:
+            return
+
+        log.info("Attempting to connect to SocketIO server...")
+        self.sio._on_websocket_event(events.Connecting(self.sio._url))
+        self.reactor._connector.submit(self._open)
+
+    def _open(self):
+        # on the connect pool
+        try:
+            websocket = self.sio._new_websocket()
+            channel = Channel(websocket)
+            channel.on_close_sent = functools.partial(
+                self.reactor.call_soon, self._await_close, channel
+            )
+            channel.on_blocked = functools.partial(
+                self.reactor.call_soon, self._await_writable, channel
+            )
+            channel.connect()
+        except Exception as exc:
+            self.reactor.call_soon(self._failed, exc)
+            return
+        self.reactor.call_soon(self._opened, channel)
+
+    def _failed(self, exc):
+        self.sio._on_websocket_event(events.ConnectFail(str(exc)))
+        log.warning("Websocket Error: %s", exc)
+        self._reconnect_later()
+
+    def _opened(self, channel):
+        if not self.active:
+            channel.close()
+            return
+        self.channel = channel
+        self.reactor._register(channel.sock, self.on_readable, self.on_writable)
+        websocket = channel.websocket
+        proxy = websocket.proxies.get('https' if websocket.is_secure else 'http')
+        self.sio._on_websocket_event(events.Connected(websocket.url, proxy=proxy))
+
+    def on_readable(self):
+        if self.channel is None:
+            return
+        try:
+            self._read()
+        except Exception as exc:
+            log.warning("SocketIO Error: %s", getattr(exc, 'details', exc))
+            self.disconnect(f'error; {exc}')
+            return
+
+        if self.channel.websocket.is_closed:
+            self.disconnect('closed', graceful=True)
+
+    def on_writable(self):
+        if self.channel is None:
+            return
+        try:
+            flushed = self.channel.flush()
+        except Exception as exc:
+            log.warning("SocketIO Error: %s", getattr(exc, 'details', exc))
+            self.disconnect(f'error; {exc}')
+            return
+
+        if flushed:
+            self.reactor._want_write(self.channel.sock, False)
+
+    def _await_writable(self, channel):
+        if channel is self.channel:
+            self.reactor._want_write(channel.sock, True)
+
+    def _read(self):
+        data = self.channel.recv()
+        if data is None:
+            # only part of a TLS record has arrived
+            return
+        if not data:
+            raise ConnectionError("connection lost")
+        self._feed(data)
+
+        # TLS may have buffered more data than the selector reports
+        while (pending := self.channel.pending()) and (
+            data := self.channel.recv(pending)
+        ):
+            self._feed(data)
+
+    def _feed(self, data):
+        for event in self.channel.feed(data):
+            if isinstance(event, events.Ready):
+                self.intervals.reset()
+            self.sio._on_websocket_event(event)
+
+    def _await_close(self, channel):
+        if channel is not self.channel:
+            return
+        self.reactor.cancel(self.timer)
+        self.timer = self.reactor._call_later(self.close_timeout, self._close_expired)
+
+    def _close_expired(self):
+        self.timer = None
+        self.disconnect('server did not respond to close')
+
+    def disconnect(self, reason, graceful=False):
+        channel, self.channel = self.channel, None
+        if channel is None:
+            return
+        self.reactor._unregister(channel.sock)
+        channel.close()
+        self.reactor.cancel(self.timer)
+        self.sio._on_websocket_event(events.Disconnected(reason, graceful))
+        self._reconnect_later()
+
+    def close(self):
+        """Terminate the connection permanently."""
+        self.active = False
+        self.disconnect('stopped', graceful=True)
+        self.reactor.cancel(self.timer)
+        self.sio._handle_event('stopped', None)
+
+    def _reconnect_later(self):
+        self.timer = None
+        if not self.active:
+            return
+        interval = next(self.intervals)
+        log.info("Waiting %f seconds before reconnecting...", interval)
+        self.timer = self.reactor._call_later(interval, self.connect)
+
+
+class Reactor:
+    """
+    Drive many SocketIO connections from a single thread.
+
+    Rather than each :class:`jaraco.abode.socketio.SocketIO` running
+    a thread, connections are multiplexed over a single selector,
+    with timers for each connection's heartbeat and reconnection.
+    Idle connections cost no more than their socket and a timer.
+
+    The reactor thread only reads and writes frames. Connections
+    (name resolution, TCP and TLS handshakes) are made on a pool of
+    ``connect_workers`` threads, and SocketIO callbacks, which may
+    make HTTP requests, are run on a
+    :class:`jaraco.abode.dispatch.Dispatcher` of ``callback_workers``
+    threads, in order for each connection.
+
+    Connections are added and removed by their SocketIO's ``start``
+    and ``stop`` methods when the SocketIO's ``reactor`` is set. The
+    reactor thread starts when the first connection is added.
+    """
+
+    def __init__(self, connect_workers=4, callback_workers=4):
+        self.connect_workers = connect_workers
+        self.callback_workers = callback_workers
+        self._connections: dict[object, _Connection] = {}
+        self._timers: list = []
+        self._seq = itertools.count()
+        self._ready: collections.deque = collections.deque()
+        self._thread = None
+        self._running = False
+
+    def add(self, sio):
+        """Begin driving the SocketIO connection."""
+        self.start()
+        self.call_soon(self._add, sio)
+
+    def remove(self, sio):
+        """Stop driving the SocketIO connection."""
+        if not self._thread:
+            return
+        self.call_soon(self._remove, sio)
+
+    def start(self):
+        """Start the reactor thread."""
+        if self._thread:
+            return
+
+        log.info("Starting SocketIO reactor thread...")
+
+        self._selector = selectors.DefaultSelector()
+        self._wake_recv, self._wake_send = socket.socketpair()
+        self._wake_recv.setblocking(False)
+        self._wake_send.setblocking(False)
+        self._register(self._wake_recv, self._drain_wakeup)
+        self._connector = concurrent.futures.ThreadPoolExecutor(
+            self.connect_workers, thread_name_prefix='SocketIOConnect'
+        )
+        self._callbacks = Dispatcher(max_workers=self.callback_workers)
+
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._run, name='SocketIOReactor', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """Close all connections and stop the reactor thread."""
+        if not self._thread:
+            return
+
+        log.info("Stopping SocketIO reactor thread...")
+
+        for sio in list(self._connections):
+            self.remove(sio)
+        self.call_soon(setattr, self, '_running', False)
+        self._thread.join()
+        self._thread = None
+
+        # close any connections completed since
+        self._connector.shutdown(cancel_futures=True)
+        self._run_ready()
+        self._callbacks.shutdown()
+        self._selector.close()
+        self._wake_recv.close()
+        self._wake_send.close()
+
+    def call_soon(self, callback, *args):
+        """Schedule a callback on the reactor thread (thread-safe)."""
+        self._ready.append((callback, args))
+        try:
+            self._wake_send.send(b'\0')
+        except BlockingIOError:
+            pass
+
+    def call_later(self, delay, callback, *args):
+        """
+        Schedule a callback on the reactor thread after delay seconds
+        (thread-safe), returning a timer for :meth:`cancel`.
+        """
+        self.start()
+        timer = scheduler.timer_for(delay, next(self._seq), callback, *args)
+        self.call_soon(heapq.heappush, self._timers, timer)
+        return timer
+
+    cancel = staticmethod(scheduler.cancel)
+
+    def dispatch(self, key, callback, *args):
+        """
+        Run a callback off the reactor thread, after those prior
+        for ``key`` (such as a SocketIO).
+        """
+        self._callbacks.submit(key, callback, *args)
+
+    @property
+    def connections(self):
+        return len(self._connections)
+
+    def _add(self, sio):
+        if sio in self._connections:
+            return
+        sio._running = True
+        self._connections[sio] = conn = _Connection(self, sio)
+        conn.connect()
+
+    def _remove(self, sio):
+        conn = self._connections.pop(sio, None)
+        if conn is None:
+            return
+        sio._running = False
+        conn.close()
+
+    def _register(self, sock, on_readable, on_writable=None):
+        self._selector.register(sock, selectors.EVENT_READ, (on_readable, on_writable))
+
+    def _want_write(self, sock, wanted):
+        """Select the registered socket for writing, or not."""
+        key = self._selector.get_key(sock)
+        mask = selectors.EVENT_READ | (selectors.EVENT_WRITE if wanted else 0)
+        if key.events != mask:
+            self._selector.modify(sock, mask, key.data)
+
+    def _unregister(self, sock):
+        if sock is None:
+            return
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def _drain_wakeup(self):
+        try:
+            while self._wake_recv.recv(4096):
+                pass
+        except BlockingIOError:
+            pass
+
+    def _call_later(self, delay, callback):
+        timer = scheduler.timer_for(delay, next(self._seq), callback)
+        heapq.heappush(self._timers, timer)
+        return timer
+
+    def _timeout(self):
+        if self._ready:
+            return 0
+        if not self._timers:
+            return None
+        return max(self._timers[0][0] - time.monotonic(), 0)
+
+    def _run(self):
+        while self._running:
+            for key, mask in self._selector.select(self._timeout()):
+                on_readable, on_writable = key.data
+                if mask & selectors.EVENT_WRITE:
+                    _invoke(on_writable)
+                if mask & selectors.EVENT_READ:
+                    _invoke(on_readable)
+            self._run_ready()
+            self._run_timers()
+
+    def _run_ready(self):
+        for _ in range(len(self._ready)):
+            callback, args = self._ready.popleft()
+            _invoke(callback, *args)
+
+    def _run_timers(self):
+        now = time.monotonic()
+        while self._timers and self._timers[0][0] <= now:
+            _deadline, _seq, callback = heapq.heappop(self._timers)
+            if callback is not None:
+                _invoke(callback)
+
+
+def _invoke(callback, *args):
+    try:
+        callback(*args)
+    except Exception:
+        log.exception("Captured exception in SocketIO reactor")
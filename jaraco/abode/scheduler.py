@@ -0,0 +1,93 @@
+"""
+Calls delayed from a single thread.
+"""
+
+from __future__ import annotations
+
+import functools
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """
+    Call functions after a delay from a single thread, started when
+    a call is scheduled and exiting once none remain, rather than
+    starting a thread (as with :class:`threading.Timer`) for each.
+
+    Calls run in turn, so should be brief.
+
+    >>> scheduler = Scheduler()
+    >>> done = threading.Event()
+    >>> timer = scheduler.call_later(0.01, done.set)
+    >>> done.wait(1)
+    True
+    >>> scheduler.cancel(scheduler.call_later(0.01, print, 'cancelled'))
+    """
+
+    def __init__(self, name='AbodeScheduler'):
+        self.name = name
+        self._timers: list = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def call_later(self, delay, callback, *args):
+        """
+        Call callback with args after delay seconds, returning a timer
+        for :meth:`cancel`.
+        """
+        timer = timer_for(delay, next(self._seq), callback, *args)
+        with self._cond:
+            heapq.heappush(self._timers, timer)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name=self.name, daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+        return timer
+
+    @staticmethod
+    def cancel(timer):
+        """Cancel the timer, if not yet called (or None)."""
+        cancel(timer)
+
+    def _run(self):
+        while callback := self._next():
+            try:
+                callback()
+            except Exception:
+                log.exception("Captured exception in scheduled call")
+
+    def _next(self):
+        """Wait for the next call due, or return None once none remain."""
+        with self._cond:
+            while True:
+                while self._timers and self._timers[0][2] is None:
+                    heapq.heappop(self._timers)
+                if not self._timers:
+                    self._thread = None
+                    return None
+                remaining = self._timers[0][0] - time.monotonic()
+                if remaining <= 0:
+                    return heapq.heappop(self._timers)[2]
+                self._cond.wait(remaining)
+
+
+def timer_for(delay, seq, callback, *args):
+    """
+    A timer: a list of the deadline, a sequence number to order
+    timers with the same deadline, and the call (None once cancelled).
+    """
+    return [time.monotonic() + delay, seq, functools.partial(callback, *args)]
+
+
+def cancel(timer):
+    if timer is not None:
+        timer[2] = None
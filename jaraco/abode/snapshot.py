@@ -0,0 +1,52 @@
+"""
+Persisted account documents for warm startup.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+
+from .store import AccountStore
+
+log = logging.getLogger(__name__)
+
+
+class Snapshot(AccountStore):
+    """
+    The device, panel, and automation documents last retrieved for
+    an account, stored under the user data path.
+
+    >>> snap = Snapshot('user@example.com', max_age=60)
+    >>> snap.load('devices')
+    >>> snap.save(devices=[{'id': 'ZW:1'}])
+    >>> snap.load('devices')
+    [{'id': 'ZW:1'}]
+    >>> Snapshot('other@example.com', max_age=60).load('devices')
+    >>> Snapshot('user@example.com', max_age=-1).load('devices')
+    """
+
+    kind = 'snapshot'
+
+    def __init__(self, username, max_age):
+        super().__init__(username)
+        self.max_age = max_age
+        """Age in seconds beyond which documents are disregarded."""
+
+    def load(self, kind):
+        """
+        Return the stored document of the given kind, unless missing
+        or older than max_age.
+        """
+        entry = (self.get() or {}).get(kind)
+        if entry is None:
+            return None
+        if time.time() - entry['saved'] > self.max_age:
+            log.debug("Disregarding stale %s snapshot", kind)
+            return None
+        return entry['doc']
+
+    def save(self, **docs):
+        """Store documents by kind."""
+        now = time.time()
+        self.update(**{kind: dict(saved=now, doc=doc) for kind, doc in docs.items()})
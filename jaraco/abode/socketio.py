@@ -1,14 +1,17 @@
 """Small SocketIO client via Websockets."""
 
+from __future__ import annotations
+
 import collections
-import contextlib
-import datetime
 import itertools
 import json
 import logging
 import random
 import threading
+import time
 import urllib.parse
+import warnings
+from typing import Any, NamedTuple
 
 from lomond import WebSocket, events
 from lomond.errors import WebSocketError
@@ -16,6 +19,8 @@ from lomond.persist import persist
 
 import jaraco.collections
 
+from . import scheduler
+from .codec import Codec
 from .exceptions import SocketIOException
 from .helpers import errors as ERRORS
 
@@ -60,28 +65,165 @@ class BackoffIntervals:
         self.attempts = itertools.count(*args)
 
 
-def find_json_list(text):
+def _handler_names(cls, kind, codes):
+    """
+    Map each packet code (as its leading character) to the name of the
+    handler on cls for it.
+
+    >>> _handler_names(SocketIO, 'engineio', EngineIO.codes)['4']
+    '_on_engineio_message'
+    """
+    names = (name for name in codes if isinstance(name, str))
+    return {
+        str(codes[name]): f'_on_{kind}_{name}'
+        for name in names
+        if hasattr(cls, f'_on_{kind}_{name}')
+    }
+
+
+def _event_handler_names(cls):
+    """
+    Map each websocket event type to the name of the handler on cls for it.
+    """
+    types = (
+        value
+        for value in vars(events).values()
+        if isinstance(value, type) and issubclass(value, events.Event)
+    )
+    return {
+        type_: f'_on_websocket_{type_.__name__.lower()}'
+        for type_ in types
+        if hasattr(cls, f'_on_websocket_{type_.__name__.lower()}')
+    }
+
+
+class Heartbeat:
+    """
+    EngineIO ping and timeout deadlines, on the monotonic clock.
+
+    >>> hb = Heartbeat(interval=25, timeout=60, now=0)
+    >>> hb.deadline()
+    25
+    >>> hb.ping_due(now=25), hb.expired(now=25)
+    (True, False)
+    >>> hb.pinged(now=25)
+    >>> hb.pong(now=25.1)
+    >>> round(hb.latency, 3)
+    0.1
+    >>> hb.deadline()
+    50
+    >>> hb.expired(now=85.2)
+    True
+    """
+
+    def __init__(self, interval, timeout, now):
+        self.interval = interval
+        """Seconds between pings."""
+        self.timeout = timeout
+        """Seconds without a packet after which the server is presumed gone."""
+        self.last_packet = now
+        self.last_ping = now
+        self._ping_sent = None
+        self.latency = None
+        """Round-trip time in seconds of the last answered ping."""
+
+    def received(self, now):
+        self.last_packet = now
+
+    def pinged(self, now):
+        self.last_ping = self._ping_sent = now
+
+    def pong(self, now):
+        self.last_packet = now
+        if self._ping_sent is not None:
+            self.latency = now - self._ping_sent
+            self._ping_sent = None
+
+    def ping_due(self, now):
+        return now >= self.last_ping + self.interval
+
+    def expired(self, now):
+        return now > self.last_packet + self.timeout
+
+    def deadline(self):
+        """The time at which a ping or timeout is next due."""
+        return min(self.last_ping + self.interval, self.last_packet + self.timeout)
+
+
+class Packet(NamedTuple):
+    """
+    A SocketIO packet.
+
+    >>> Packet.decode('2["com.goabode.gateway.mode","home"]')
+    Packet(type=2, namespace='/', id=None, attachments=0, data=['com.goabode.gateway.mode', 'home'])
+    >>> Packet.decode('51-/cams,7["snap",{"_placeholder":true,"num":0}]')
+    Packet(type=5, namespace='/cams', id=7, attachments=1, data=['snap', {'_placeholder': True, 'num': 0}])
+    >>> Packet.decode('1/cams')
+    Packet(type=1, namespace='/cams', id=None, attachments=0, data=None)
+    """
+
+    type: int
+    namespace: str
+    id: int | None
+    attachments: int
+    data: Any
+
+    binary_types = 5, 6
+    """Types carrying binary attachments (binary event and ack)."""
+
+    @classmethod
+    def decode(cls, text, start=0, codec=None):
+        """
+        Decode the packet in text beginning at start, in a single pass,
+        with codec (the standard library's json by default).
+        """
+        codec = codec or Codec.stdlib()
+        type_ = int(text[start])
+        pos = start + 1
+
+        attachments = 0
+        if type_ in cls.binary_types:
+            dash = text.index('-', pos)
+            attachments = int(text[pos:dash])
+            pos = dash + 1
+
+        namespace = '/'
+        if text.startswith('/', pos):
+            comma = text.find(',', pos)
+            end = len(text) if comma == -1 else comma
+            namespace = text[pos:end]
+            pos = end + 1
+
+        digits = pos
+        while digits < len(text) and text[digits].isdigit():
+            digits += 1
+        ack = int(text[pos:digits]) if digits > pos else None
+
+        data = codec.loads_from(text, digits) if digits < len(text) else None
+        return cls(type_, namespace, ack, attachments, data)
+
+
+def find_json_list(text, loads=json.loads):
     r"""
-    >>> find_json_list('["foo",\n\t"bar"]')
+    Deprecated; use :meth:`Packet.decode`.
+
+    >>> import pytest
+    >>> with pytest.deprecated_call():
+    ...     find_json_list('["foo",\n\t"bar"]')
     ['foo', 'bar']
-    >>> find_json_list('{"abc": ["123"]}')
-    ['123']
-    >>> find_json_list('{"abc": null}')
-    Traceback (most recent call last):
-    ...
-    ValueError: ...
-    >>> find_json_list('some text string')
-    Traceback (most recent call last):
-    ...
-    ValueError: ...
     """
+    warnings.warn(
+        "find_json_list is deprecated. Use Packet.decode.",
+        DeprecationWarning,
+        stacklevel=2,
+    )
     l_bracket = text.find("[")
     r_bracket = text.rfind("]")
 
     if l_bracket == -1 or r_bracket == -1:
         raise ValueError("No list found", text)
 
-    return json.loads(text[l_bracket : r_bracket + 1])
+    return loads(text[l_bracket : r_bracket + 1])
 
 
 class SocketIO:
@@ -92,9 +234,39 @@ class SocketIO:
         disconnect=1,
         event=2,
         error=4,
+        binary_event=5,
+        binary_ack=6,
     )
 
-    def __init__(self, url, cookie=None, origin=None):
+    reactor = None
+    """
+    A :class:`jaraco.abode.reactor.Reactor` to drive the connection.
+    If None, the connection is driven by a dedicated thread.
+    """
+
+    codec = Codec.best()
+    """The :class:`jaraco.abode.codec.Codec` for JSON payloads."""
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._compile()
+
+    @classmethod
+    def _compile(cls):
+        """
+        Build the tables of handler names for websocket events and
+        EngineIO and SocketIO packets, bound to each instance.
+        """
+        cls._websocket_table = _event_handler_names(cls)
+        cls._engineio_table = _handler_names(cls, 'engineio', EngineIO.codes)
+        cls._socketio_table = _handler_names(cls, 'socketio', cls.codes)
+
+    def _bind(self, table):
+        return {key: getattr(self, name) for key, name in table.items()}
+
+    def __init__(self, url, cookie=None, origin=None, reactor=None):
+        self.reactor = reactor
+
         params = dict(EIO=3, transport='websocket')
         self._url = url + '?' + urllib.parse.urlencode(params)
 
@@ -110,11 +282,21 @@ class SocketIO:
         self._engineio_connected = False
         self._socketio_connected = False
 
-        self._last_ping_time = datetime.datetime.min
-        self._last_packet_time = datetime.datetime.min
+        self.heartbeat = None
+        """The :class:`Heartbeat` for the current connection."""
+        self._heartbeat_timer = None
+        self._heartbeat_scheduler = scheduler.Scheduler(name='SocketIOHeartbeat')
 
         self._callbacks = collections.defaultdict(list)
 
+        # A binary packet awaiting attachments and its handler
+        self._binary_packet = None
+        self._attachments = []
+
+        self._websocket_handlers = self._bind(self._websocket_table)
+        self._engineio_handlers = self._bind(self._engineio_table)
+        self._socketio_handlers = self._bind(self._socketio_table)
+
     def set_origin(self, origin=None):
         """Set the Origin header."""
         self._origin = origin
@@ -130,6 +312,10 @@ class SocketIO:
 
     def start(self):
         """Start a thread to handle SocketIO notifications."""
+        if self.reactor is not None:
+            self.reactor.add(self)
+            return
+
         if self._thread:
             return
 
@@ -142,6 +328,10 @@ class SocketIO:
 
     def stop(self):
         """Tell the SocketIO thread to terminate."""
+        if self.reactor is not None:
+            self.reactor.remove(self)
+            return
+
         if not self._thread:
             return
 
@@ -168,6 +358,8 @@ class SocketIO:
                 log.warning("SocketIO Error: %s", exc.details)
             except WebSocketError as exc:
                 log.warning("Websocket Error: %s", exc)
+            except Exception:
+                log.exception("Unexpected error handling SocketIO")
 
             if not self._running:
                 break
@@ -184,29 +376,44 @@ class SocketIO:
             return
         self._websocket.add_header(name.encode(), value.encode())
 
-    def _step(self, intervals):
-        self._handle_event('started')
+    def _new_websocket(self):
+        """
+        Create the websocket for a new connection attempt. Callbacks
+        for 'started' run first, as they may set headers; with a reactor,
+        this is on its connect pool.
+        """
+        self._run_callbacks('started')
 
         self._websocket = WebSocket(self._url)
-        self._exit_event = threading.Event()
 
         self._add_header('Cookie', self._cookie)
         self._add_header('Origin', self._origin)
 
+        return self._websocket
+
+    def _step(self, intervals):
+        self._new_websocket()
+        self._exit_event = threading.Event()
+
         for event in persist(
-            self._websocket, ping_rate=0, poll=5.0, exit_event=self._exit_event
+            self._websocket,
+            ping_rate=0,
+            poll=5.0,
+            exit_event=self._exit_event,
         ):
             if isinstance(event, events.Connected):
                 intervals.reset()
 
-            name = event.__class__.__name__.lower()
-            with contextlib.suppress(AttributeError):
-                handler = getattr(self, f'_on_websocket_{name}')
-                handler(event)
+            self._on_websocket_event(event)
 
             if self._running is False:
                 self._websocket.close()
 
+    def _on_websocket_event(self, event):
+        handler = self._websocket_handlers.get(type(event))
+        if handler is not None:
+            handler(event)
+
     def _on_websocket_connected(self, _event):
         self._websocket_connected = True
         log.info("Websocket Connected")
@@ -216,105 +423,228 @@ class SocketIO:
         self._websocket_connected = False
         self._engineio_connected = False
         self._socketio_connected = False
+        self._binary_packet = None
+        self._cancel_heartbeat()
 
         log.info("Websocket Disconnected")
         self._handle_event('disconnected')
 
     def _on_websocket_poll(self, _event):
-        last_packet_delta = datetime.datetime.now() - self._last_packet_time
+        self._handle_event('poll')
 
-        if self._engineio_connected and last_packet_delta > self._ping_timeout:
+    def _schedule_heartbeat(self):
+        """
+        Beat when the next ping or timeout is due: on the reactor, if
+        any, else on the connection's heartbeat scheduler, a thread
+        waiting only until then.
+        """
+        delay = max(self.heartbeat.deadline() - time.monotonic(), 0)
+        if self.reactor is None:
+            self._heartbeat_timer = self._heartbeat_scheduler.call_later(
+                delay, self._beat
+            )
+        else:
+            self._heartbeat_timer = self.reactor._call_later(delay, self._beat)
+
+    def _cancel_heartbeat(self):
+        timer, self._heartbeat_timer = self._heartbeat_timer, None
+        scheduler.cancel(timer)
+
+    def _beat(self):
+        self._heartbeat_timer = None
+        if not self._engineio_connected:
+            return
+
+        now = time.monotonic()
+        if self.heartbeat.expired(now):
             log.warning("SocketIO Server Ping Timeout")
             self._websocket.close()
             return
 
-        last_ping_delta = datetime.datetime.now() - self._last_ping_time
-
-        if self._engineio_connected and last_ping_delta >= self._ping_interval:
-            self._websocket.send_text(str(EngineIO.codes['ping']))
-            self._last_ping_time = datetime.datetime.now()
+        if self.heartbeat.ping_due(now):
+            try:
+                self._websocket.send_text(str(EngineIO.codes['ping']))
+            except WebSocketError as exc:
+                log.debug("Unable to ping: %s", exc)
+                return
+            self.heartbeat.pinged(now)
             log.debug("Client Ping")
             self._handle_event('ping')
 
-        self._handle_event('poll')
+        self._schedule_heartbeat()
 
     def _on_websocket_text(self, _event):
-        self._last_packet_time = datetime.datetime.now()
+        if self.heartbeat is not None:
+            self.heartbeat.received(time.monotonic())
 
-        log.debug("Received: %s", _event.text)
+        text = _event.text
+        log.debug("Received: %s", text)
 
-        code = int(_event.text[:1])
-        message = _event.text[1:]
-
-        try:
-            name = EngineIO.codes[code]
-            handler = getattr(self, f'_on_engineio_{name}')
-            handler(message)
-        except KeyError:
+        handler = self._engineio_handlers.get(text[:1])
+        if handler is None:
             log.debug("Ignoring unrecognized EngineIO packet")
+            return
+        handler(text)
+
+    def _on_websocket_binary(self, _event):
+        if self.heartbeat is not None:
+            self.heartbeat.received(time.monotonic())
+
+        if self._binary_packet is None:
+            log.debug("Ignoring unexpected binary frame")
+            return
+
+        # strip the EngineIO message code leading the frame
+        self._attachments.append(memoryview(_event.data)[1:])
+        packet, handler = self._binary_packet
+        if len(self._attachments) == packet.attachments:
+            attachments, self._attachments = self._attachments, []
+            self._binary_packet = None
+            handler(packet._replace(data=_substitute(packet.data, attachments)))
 
     def _on_websocket_backoff(self, _event):
         return
 
-    def _on_engineio_open(self, message):
-        packet = json.loads(message)
+    # EngineIO and SocketIO handlers are passed the whole frame text,
+    # with the EngineIO code at index 0 and the SocketIO type at 1.
 
-        self._ping_interval = datetime.timedelta(milliseconds=packet['pingInterval'])
-        log.debug("Set ping interval to %s", self._ping_interval)
+    def _on_engineio_open(self, message):
+        packet = self.codec.loads_from(message, 1)
 
-        self._ping_timeout = datetime.timedelta(milliseconds=packet['pingTimeout'])
-        log.debug("Set ping timeout to %s", self._ping_timeout)
+        self.heartbeat = Heartbeat(
+            interval=packet['pingInterval'] / 1000,
+            timeout=packet['pingTimeout'] / 1000,
+            now=time.monotonic(),
+        )
+        log.debug("Set ping interval to %s s", self.heartbeat.interval)
+        log.debug("Set ping timeout to %s s", self.heartbeat.timeout)
 
         self._engineio_connected = True
         log.debug("EngineIO Connected")
 
+        self._cancel_heartbeat()
+        self._schedule_heartbeat()
+
     def _on_engineio_close(self, message):
         self._engineio_connected = False
+        self._cancel_heartbeat()
         log.debug("EngineIO Disconnected")
         self._websocket.close()
 
     def _on_engineio_pong(self, message):
-        log.debug("Server Pong")
+        if self.heartbeat is not None:
+            self.heartbeat.pong(time.monotonic())
+            log.debug("Server Pong (%s s)", self.heartbeat.latency)
         self._handle_event('pong')
 
     def _on_engineio_message(self, message):
-        code = int(message[:1])
-        data = message[1:]
-
-        try:
-            name = SocketIO.codes[code]
-            handler = getattr(self, f'_on_socketio_{name}')
-            handler(data)
-        except KeyError:
+        handler = self._socketio_handlers.get(message[1:2])
+        if handler is None:
             log.debug("Ignoring SocketIO message: %s", message)
+            return
+        handler(message)
 
-    def _on_socketio_connected(self):
+    def _on_socketio_connect(self, message):
         self._socketio_connected = True
         log.debug("SocketIO Connected")
 
-    def _on_socketio_disconnected(self):
+    def _on_socketio_disconnect(self, message):
         self._socketio_connected = False
         log.debug("SocketIO Disconnected")
         self._websocket.close()
 
-    def _on_socketio_error(self, _message_data):
-        self._handle_event('error', _message_data)
-        raise SocketIOException(ERRORS.SOCKETIO_ERROR, details=_message_data)
+    def _on_socketio_error(self, message):
+        details = message[2:]
+        self._handle_event('error', details)
+        raise SocketIOException(ERRORS.SOCKETIO_ERROR, details=details)
+
+    def _on_socketio_event(self, message):
+        try:
+            packet = Packet.decode(message, 1, self.codec)
+        except ValueError:
+            packet = None
+        if packet is None or not _is_event(packet.data):
+            log.warning("Unable to find event [data]: %s", message[2:])
+            return
+
+        if self._callbacks.get('event'):
+            self._handle_event('event', message[2:])
+        self._dispatch_event(packet)
+
+    def _dispatch_event(self, packet):
+        args = packet.data
+        name = args.pop(0)
+        self._handle_event(name, args)
+
+    def _on_socketio_binary_event(self, message):
+        """
+        Handle an event whose binary attachments follow in binary
+        frames, replacing each placeholder with its attachment (as a
+        memoryview) before dispatch.
+        """
+        try:
+            packet = Packet.decode(message, 1, self.codec)
+        except ValueError:
+            packet = None
+        if packet is None or not _is_event(packet.data):
+            log.warning("Unable to find binary event [data]: %s", message[2:])
+            return
+        self._await_attachments(packet, self._dispatch_event)
 
-    def _on_socketio_event(self, _message_data):
+    def _on_socketio_binary_ack(self, message):
+        # No acks are requested, but the attachments must be consumed.
         try:
-            json_data = find_json_list(_message_data)
+            packet = Packet.decode(message, 1, self.codec)
         except ValueError:
-            log.warning("Unable to find event [data]: %s", _message_data)
+            log.warning("Unable to decode binary ack: %s", message[2:])
             return
-        self._handle_event('event', _message_data)
-        self._handle_event(json_data[0], json_data[1:])
+        self._await_attachments(packet, lambda packet: None)
+
+    def _await_attachments(self, packet, handler):
+        if not packet.attachments:
+            handler(packet)
+            return
+        self._binary_packet = packet, handler
+        self._attachments = []
 
     def _handle_event(self, event_name, *args):
-        for callback in self._callbacks[event_name]:
+        """
+        Run the callbacks for the event, keeping them off the reactor
+        thread if driven by a reactor.
+        """
+        if self.reactor is not None:
+            self.reactor.dispatch(self, self._run_callbacks, event_name, *args)
+        else:
+            self._run_callbacks(event_name, *args)
+
+    def _run_callbacks(self, event_name, *args):
+        for callback in self._callbacks.get(event_name, ()):
             try:
                 callback(*args)
             except Exception as exc:
                 log.exception(
                     "Captured exception during SocketIO event callback: %s", exc
                 )
+
+
+SocketIO._compile()
+
+
+def _substitute(data, attachments):
+    """
+    Replace binary placeholders in data with their attachments.
+
+    >>> _substitute(['snap', {'image': {'_placeholder': True, 'num': 0}}], [b'JPEG'])
+    ['snap', {'image': b'JPEG'}]
+    """
+    if isinstance(data, dict):
+        if data.get('_placeholder') is True:
+            return attachments[data['num']]
+        return {key: _substitute(value, attachments) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_substitute(item, attachments) for item in data]
+    return data
+
+
+def _is_event(data):
+    return isinstance(data, list) and bool(data) and isinstance(data[0], str)
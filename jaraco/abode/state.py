@@ -3,6 +3,8 @@ import logging
 from jaraco.collections import DictAdapter, Projection
 
 from ._itertools import single
+from .command import Request, command
+from .helpers import debug
 
 log = logging.getLogger(__name__)
 
@@ -26,11 +28,27 @@ class Stateful:
         """
         self._state.update(Projection(self._state, state))
 
+    def differs(self, state):
+        """
+        Return True if ``update`` from state would change anything.
+
+        >>> item = Stateful({'id': '1', 'status': 'Open'}, client=None)
+        >>> item.differs({'id': '1', 'status': 'Open', 'extra': True})
+        False
+        >>> item.differs({'id': '1', 'status': 'Closed'})
+        True
+        """
+        return any(
+            self._state[key] != value
+            for key, value in Projection(self._state, state).items()
+        )
+
     @property
     def desc(self):
         """Return a short description of self."""
         return self._desc_t.format_map(DictAdapter(self))
 
+    @command
     def refresh(self, path=None):
         """Refresh the device state.
 
@@ -39,10 +57,12 @@ class Stateful:
         tmpl = path or self._url_t
         path = tmpl.format(id=self.id)
 
-        response = self._client.send_request(method="get", path=path)
-        state = single(response.json())
+        response = yield Request(method="get", path=path)
+        state = single(self._client.codec.parse(response))
 
-        log.debug(f"{self.__class__.__name__} Refresh Response: %s", response.text)
+        log.debug(
+            f"{self.__class__.__name__} Refresh Response: %s", debug.Body(response)
+        )
 
         self._validate(state)
         self.update(state)
@@ -0,0 +1,88 @@
+"""
+Per-account state persisted under the user data path.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+
+from . import config
+
+
+def account_filename(kind, username):
+    """
+    A filename for state of the given kind private to an account.
+
+    >>> account_filename('cookies', 'user@example.com')
+    'cookies-63a710569261.json'
+    """
+    digest = hashlib.sha1(username.encode('utf-8')).hexdigest()
+    return f'{kind}-{digest[:12]}.json'
+
+
+class AccountStore:
+    """
+    A JSON document holding an entry for an account, in a file of
+    its own (see :func:`account_filename`), written atomically and
+    readable only by the user.
+
+    >>> store = Tokens('user@example.com')
+    >>> store.get()
+    >>> store.update(token='abc')
+    >>> store.get()
+    {'token': 'abc'}
+    >>> oct(store.path.stat().st_mode & 0o777) if os.name == 'posix' else '0o600'
+    '0o600'
+    >>> store.clear()
+    >>> store.get()
+    """
+
+    kind: str
+
+    _lock = threading.Lock()
+    """Serializes read-modify-write by the clients in a process."""
+
+    def __init__(self, username):
+        self.username = username
+
+    @property
+    def path(self):
+        return config.paths.user_data / account_filename(self.kind, self.username)
+
+    def _read(self):
+        try:
+            return json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entry):
+        tmp = self.path.with_suffix('.tmp')
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, 'w', encoding='utf-8') as strm:
+            json.dump(entry, strm)
+        os.replace(tmp, self.path)
+
+    def get(self):
+        """Return the entry for this account, if any."""
+        return self._read() or None
+
+    def update(self, **values):
+        """Update the entry for this account."""
+        with self._lock:
+            entry = self._read()
+            entry.update(values)
+            self._write(entry)
+
+    def clear(self):
+        """Remove the entry for this account."""
+        with self._lock:
+            self.path.unlink(missing_ok=True)
+
+
+class Tokens(AccountStore):
+    """API and OAuth tokens from the last login."""
+
+    kind = 'tokens'
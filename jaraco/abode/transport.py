@@ -0,0 +1,154 @@
+"""
+HTTP connection pooling, timeouts, and retries.
+"""
+
+from __future__ import annotations
+
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class PoolStats:
+    """
+    Connection reuse across a transport's pools.
+
+    A hit is a request served on a kept-alive connection; a miss is a
+    request that had to open a new connection.
+
+    >>> stats = PoolStats(requests=10, connections=3)
+    >>> stats.record_request()
+    >>> stats.hits, stats.misses
+    (8, 3)
+    """
+
+    def __init__(self, requests=0, connections=0):
+        self.requests = requests
+        self.connections = connections
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_connection(self):
+        with self._lock:
+            self.connections += 1
+
+    @property
+    def hits(self):
+        return self.requests - self.connections
+
+    @property
+    def misses(self):
+        return self.connections
+
+    def __repr__(self):
+        return f'<PoolStats hits={self.hits} misses={self.misses}>'
+
+
+class _Adapter(HTTPAdapter):
+    """
+    An HTTPAdapter applying a default timeout and counting requests
+    and the connections opened for them.
+    """
+
+    def __init__(self, timeout, **kwargs):
+        self.timeout = timeout
+        self.stats = PoolStats()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        classes = self.poolmanager.pool_classes_by_scheme
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting(cls, self.stats) for scheme, cls in classes.items()
+        }
+
+    def send(self, request, timeout=None, **kwargs):
+        self.stats.record_request()
+        if timeout is None:
+            timeout = self.timeout
+        return super().send(request, timeout=timeout, **kwargs)
+
+
+def _counting(pool_cls, stats):
+    """
+    A subclass of the connection pool class whose connections count
+    each time they connect (including reconnects of dropped connections).
+    """
+
+    class Connection(pool_cls.ConnectionCls):
+        def connect(self):
+            stats.record_connection()
+            super().connect()
+
+    return type(pool_cls.__name__, (pool_cls,), dict(ConnectionCls=Connection))
+
+
+class Transport:
+    """
+    HTTP settings shared by the sessions of a client (or of many
+    clients), for requests to the Abode API and for media downloads.
+
+    - ``pool_connections``: number of hosts for which to keep a pool.
+    - ``pool_maxsize``: connections kept alive to each host.
+    - ``pool_block``: when all of a host's connections are in use,
+      wait for one rather than opening (and discarding) another.
+    - ``keep_alive``: reuse connections between requests.
+    - ``timeout``: default seconds to connect and to read, as for
+      :mod:`requests`; by default, requests wait indefinitely.
+    - ``retries``: attempts to retry idempotent requests on connection
+      errors and gateway failures, with exponential ``backoff``.
+
+    >>> transport = Transport(pool_maxsize=20)
+    >>> session = transport.mount(requests.Session())
+    >>> session.get_adapter('https://my.goabode.com/') is transport.adapter
+    True
+    >>> transport.stats
+    <PoolStats hits=0 misses=0>
+    """
+
+    def __init__(
+        self,
+        pool_connections=10,
+        pool_maxsize=10,
+        pool_block=False,
+        keep_alive=True,
+        timeout=None,
+        retries=0,
+        backoff=0.5,
+    ):
+        self.keep_alive = keep_alive
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        self.adapter = _Adapter(
+            timeout,
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+            max_retries=retry,
+        )
+
+    def mount(self, session):
+        """Configure the session to use this transport."""
+        session.mount('https://', self.adapter)
+        session.mount('http://', self.adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def session(self):
+        """A new session using this transport."""
+        return self.mount(requests.Session())
+
+    @property
+    def stats(self):
+        """:class:`PoolStats` for all requests sent."""
+        return self.adapter.stats
@@ -0,0 +1,76 @@
+"""
+Compare JSON codecs over device-list and timeline payloads.
+
+Run with ``python -m tests.bench_codec``.
+"""
+
+import itertools
+import json
+import timeit
+
+from jaraco.abode.codec import Codec
+
+from .mock.devices import (
+    alarm,
+    dimmer,
+    door_contact,
+    door_lock,
+    glass,
+    ipcam,
+    keypad,
+    pir,
+    power_switch_sensor,
+    valve,
+    water_sensor,
+)
+
+kinds = (
+    dimmer,
+    door_contact,
+    door_lock,
+    glass,
+    ipcam,
+    keypad,
+    pir,
+    power_switch_sensor,
+    valve,
+    water_sensor,
+)
+
+
+def device_list(count=200):
+    devices = [alarm.device()] + [
+        kind.device(devid=f'ZW:{index:08x}')
+        for index, kind in zip(range(count), itertools.cycle(kinds))
+    ]
+    return json.dumps(devices).encode()
+
+
+def timeline(count=500):
+    events = [ipcam.timeline_event(event_code=str(5000 + n % 10)) for n in range(count)]
+    return json.dumps(events).encode()
+
+
+def codecs():
+    for factory in (Codec.stdlib, Codec.ujson, Codec.orjson):
+        try:
+            yield factory()
+        except ImportError:
+            pass
+
+
+def run(number=200):
+    payloads = dict(devices=device_list(), timeline=timeline())
+    for name, payload in payloads.items():
+        print(f'{name} ({len(payload)} bytes)')
+        baseline = None
+        for codec in codecs():
+            elapsed = timeit.timeit(lambda: codec.loads(payload), number=number)
+            baseline = baseline or elapsed
+            print(
+                f'  {codec.name:8} {elapsed / number * 1e6:9.1f} µs  {baseline / elapsed:5.1f}x'
+            )
+
+
+if __name__ == '__main__':
+    run()
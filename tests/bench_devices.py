@@ -0,0 +1,82 @@
+"""
+Measure the cost of constructing each device as the number of devices
+in an account grows, resolving device classes from the registry and,
+for reference, by walking the Device subclasses for every device (as
+before the registry).
+
+Run with ``python -m tests.bench_devices``.
+"""
+
+import contextlib
+import itertools
+import time
+import unittest.mock
+
+from jaraco.classes.ancestry import iter_subclasses
+
+from jaraco.abode.devices import pkg
+from jaraco.abode.devices.base import Device, Unknown
+
+from .mock.devices import door_contact as DOOR_CONTACT
+from .mock.devices import door_lock as DOOR_LOCK
+from .mock.devices import pir as PIR
+from .mock.devices import power_switch_sensor as POWERSENSOR
+from .mock.devices import secure_barrier as SECURE_BARRIER
+from .mock.devices import siren as SIREN
+from .mock.devices import valve as VALVE
+from .mock.devices import water_sensor as WATER_SENSOR
+
+KINDS = (
+    DOOR_CONTACT,
+    DOOR_LOCK,
+    PIR,
+    POWERSENSOR,
+    SECURE_BARRIER,
+    SIREN,
+    VALVE,
+    WATER_SENSOR,
+)
+
+
+def docs(count):
+    kinds = itertools.islice(itertools.cycle(KINDS), count)
+    return [kind.device(devid=f'RF:{index:08d}') for index, kind in enumerate(kinds)]
+
+
+@classmethod
+def scan(cls, type_tag):
+    """Resolve the class by walking the subclasses, as before the registry."""
+    pkg.import_all()
+    by_tag = {
+        f'device_type.{tag}': sub_cls
+        for sub_cls in iter_subclasses(cls)
+        for tag in sub_cls.tags
+    }
+    return by_tag.get(type_tag.lower(), Unknown)
+
+
+def per_device(count):
+    """Seconds to construct each of count devices."""
+    states = docs(count)
+    start = time.perf_counter()
+    for state in states:
+        Device.new(state, None)
+    return (time.perf_counter() - start) / count
+
+
+def run(counts=(100, 1000, 10000)):
+    # import the device classes up front
+    Device.resolve_class('device_type.povs')
+    for name, resolver in (
+        ('registry', contextlib.nullcontext()),
+        ('scan', unittest.mock.patch.object(Device, 'resolve_class', scan)),
+    ):
+        with resolver:
+            costs = ', '.join(
+                f'{count}: {per_device(count) * 1e6:.1f} µs' for count in counts
+            )
+        print(f'{name}: {costs} per device')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,127 @@
+"""
+Measure the threads and memory held by started accounts, connected
+for events and awaiting their resynchronization, in a Fleet, against
+the same accounts as standalone clients.
+
+Run with ``python -m tests.bench_fleet``.
+"""
+
+import gc
+import pathlib
+import tempfile
+import threading
+import time
+import tracemalloc
+import unittest.mock
+import urllib.parse
+
+import responses
+
+import jaraco.abode
+from jaraco.abode.fleet import Fleet
+from jaraco.abode.helpers import urls
+
+from . import server as SERVER
+from .mock import login as LOGIN
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+
+RESYNC_JITTER = 60
+
+
+class Paths:
+    def __init__(self, root):
+        self.user_data = root
+
+
+def abode(mock):
+    routes = [
+        ('POST', urls.LOGIN, LOGIN.post_response_ok()),
+        ('GET', urls.OAUTH_TOKEN, OAUTH_CLAIMS.get_response_ok()),
+        ('GET', urls.PANEL, PANEL.get_response_ok()),
+        ('GET', urls.DEVICES, []),
+        ('GET', urls.AUTOMATION, []),
+    ]
+    for method, path, doc in routes:
+        mock.add(method, urllib.parse.urljoin(urls.BASE, path), json=doc)
+
+
+def threads():
+    """Threads other than those of the websocket stand-in."""
+    return sum(
+        not thread.name.startswith('WebSocketServer')
+        for thread in threading.enumerate()
+    )
+
+
+def connect(clients, server):
+    for client in clients:
+        client.events.socketio._url = server.url + '?EIO=3&transport=websocket'
+        client.events.resync_jitter = RESYNC_JITTER
+        client.events.start()
+    deadline = time.monotonic() + 30
+    while not all(client.events.connected for client in clients):
+        assert time.monotonic() < deadline, "accounts failed to connect"
+        time.sleep(0.05)
+
+
+def standalone(count, server):
+    clients = [
+        jaraco.abode.Client(f'user{index}@example.com', 'secret')
+        for index in range(count)
+    ]
+    connect(clients, server)
+    return clients
+
+
+def fleet(count, server):
+    fleet = Fleet(resync_jitter=RESYNC_JITTER)
+    for index in range(count):
+        fleet.add(f'user{index}@example.com', 'secret')
+    connect(fleet.values(), server)
+    return fleet
+
+
+def stop(held):
+    if isinstance(held, Fleet):
+        held.stop()
+        return
+    for client in held:
+        client.events.stop()
+
+
+def measure(create, count, server):
+    gc.collect()
+    threads_before = threads()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    held = create(count, server)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    added = threads() - threads_before
+    stop(held)
+    return added / count, total / count
+
+
+def run(count=100):
+    with tempfile.TemporaryDirectory() as root:
+        paths = Paths(pathlib.Path(root))
+        server = SERVER.Server()
+        with (
+            unittest.mock.patch.object(jaraco.abode.config, 'paths', paths),
+            responses.RequestsMock(assert_all_requests_are_fired=False) as mock,
+        ):
+            abode(mock)
+            for create in (standalone, fleet):
+                per_threads, per_bytes = measure(create, count, server)
+                print(
+                    f'{create.__name__}: {per_threads:.2f} threads, '
+                    f'{per_bytes / 1024:.1f} KiB per account'
+                )
+        server.close()
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,63 @@
+"""
+Time SocketIO packet handling over a replayed stream of frames.
+
+Run with ``python -m tests.bench_socketio``.
+"""
+
+import itertools
+import json
+import timeit
+
+from lomond import events
+
+from jaraco.abode.codec import Codec
+from jaraco.abode.socketio import SocketIO
+
+from .mock.devices import ipcam
+
+
+def frames(count=10_000):
+    """
+    A stream resembling a busy account: device updates and timeline
+    events, with heartbeats and the odd unrecognized packet.
+    """
+    timeline = json.dumps(['com.goabode.gateway.timeline', ipcam.timeline_event()])
+    kinds = itertools.cycle([
+        '42["com.goabode.device.update","ZW:00000007"]',
+        '42' + timeline,
+        '42["com.goabode.device.update","RF:00000003"]',
+        '3',
+        '42["com.goabode.gateway.mode","home"]',
+        '6',
+    ])
+    return [events.Text(text) for text in itertools.islice(kinds, count)]
+
+
+def run(number=5):
+    for codec in (Codec.stdlib(), Codec.best()):
+        print(codec.name)
+        replay(codec, number)
+
+
+def replay(codec, number):
+    sio = SocketIO(url='ws://localhost/socket.io/')
+    sio.codec = codec
+    for name in (
+        'com.goabode.device.update',
+        'com.goabode.gateway.timeline',
+        'com.goabode.gateway.mode',
+    ):
+        sio.on(name, lambda *args: None)
+    stream = frames()
+
+    def feed():
+        for event in stream:
+            sio._on_websocket_event(event)
+
+    elapsed = min(timeit.repeat(feed, number=1, repeat=number))
+    print(f'  {len(stream)} frames in {elapsed * 1e3:.1f} ms')
+    print(f'  {elapsed / len(stream) * 1e6:.2f} µs per frame')
+
+
+if __name__ == '__main__':
+    run()
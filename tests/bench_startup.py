@@ -0,0 +1,85 @@
+"""
+Measure the time to the first device of a client starting cold
+(logging in and loading devices from Abode) and warm (restoring its
+session and devices from disk), against Abode simulated with a fixed
+round-trip latency.
+
+Run with ``python -m tests.bench_startup``.
+"""
+
+import json
+import pathlib
+import statistics
+import tempfile
+import time
+import unittest.mock
+import urllib.parse
+
+import responses
+
+import jaraco.abode
+from jaraco.abode.helpers import urls
+
+from .mock import login as LOGIN
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+from .mock.devices import door_contact as DOOR_CONTACT
+
+
+class Paths:
+    def __init__(self, root):
+        self.user_data = root
+
+
+def abode(mock, devices, latency):
+    """Serve an account with the given number of devices."""
+    docs = [DOOR_CONTACT.device(devid=f'RF:{index:08d}') for index in range(devices)]
+    routes = [
+        ('POST', urls.LOGIN, LOGIN.post_response_ok()),
+        ('GET', urls.OAUTH_TOKEN, OAUTH_CLAIMS.get_response_ok()),
+        ('GET', urls.PANEL, PANEL.get_response_ok()),
+        ('GET', urls.DEVICES, docs),
+    ]
+    for method, path, doc in routes:
+        body = json.dumps(doc)
+
+        def respond(request, body=body):
+            time.sleep(latency)
+            return 200, {}, body
+
+        mock.add_callback(
+            method,
+            urllib.parse.urljoin(urls.BASE, path),
+            respond,
+            content_type='application/json',
+        )
+
+
+def first_device():
+    client = jaraco.abode.Client(
+        'user@example.com', 'secret', persist_session=True, snapshot_max_age=3600
+    )
+    start = time.perf_counter()
+    client.get_device('RF:00000000')
+    return time.perf_counter() - start
+
+
+def run(devices=200, latency=0.05, rounds=5):
+    with tempfile.TemporaryDirectory() as root:
+        paths = Paths(pathlib.Path(root))
+        patch = unittest.mock.patch.object(jaraco.abode.config, 'paths', paths)
+        with patch, responses.RequestsMock(assert_all_requests_are_fired=False) as mock:
+            abode(mock, devices, latency)
+            cold = []
+            for _ in range(rounds):
+                for path in paths.user_data.iterdir():
+                    path.unlink()
+                cold.append(first_device())
+            warm = [first_device() for _ in range(rounds)]
+    print(f'{devices} devices, {latency * 1000:.0f} ms round trip')
+    for name, times in (('cold', cold), ('warm', warm)):
+        print(f'{name}: {statistics.median(times) * 1000:.1f} ms to first device')
+
+
+if __name__ == '__main__':
+    run()
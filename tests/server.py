@@ -0,0 +1,282 @@
+"""
+Minimal local servers standing in for Abode's: the SocketIO websocket
+server and the HTTP API.
+"""
+
+import base64
+import hashlib
+import http.server
+import json
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+
+GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPEN = '0{"sid":"abc","upgrades":[],"pingInterval":25000,"pingTimeout":60000}'
+"""EngineIO open packet."""
+
+
+def accept_key(key):
+    digest = hashlib.sha1((key + GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+def encode_frame(payload, opcode=None):
+    """Encode an unmasked frame; text if payload is str, else binary."""
+    if isinstance(payload, str):
+        payload = payload.encode()
+        opcode = 0x1 if opcode is None else opcode
+    opcode = 0x2 if opcode is None else opcode
+    length = len(payload)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 2**16:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def read_exactly(conn, count):
+    data = b''
+    while len(data) < count:
+        chunk = conn.recv(count - len(data))
+        if not chunk:
+            raise EOFError()
+        data += chunk
+    return data
+
+
+def read_frame(conn):
+    """Read a masked frame from a client, returning (opcode, payload)."""
+    first, second = read_exactly(conn, 2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack('!H', read_exactly(conn, 2))
+    elif length == 127:
+        (length,) = struct.unpack('!Q', read_exactly(conn, 8))
+    mask = read_exactly(conn, 4)
+    payload = bytes(
+        byte ^ mask[index % 4] for index, byte in enumerate(read_exactly(conn, length))
+    )
+    return first & 0x0F, payload
+
+
+class Server:
+    """
+    Accept websocket connections, sending each client the scripted
+    frames (str for text, bytes for binary) and recording the text
+    frames received, answering any in ``replies``.
+    """
+
+    def __init__(self, frames=(OPEN, '40'), replies=None):
+        self.frames = list(frames)
+        self.replies = replies or {}
+        self.received = []
+        self.connections = 0
+        self._sock = socket.create_server(('127.0.0.1', 0))
+        self._clients = []
+        host, port = self._sock.getsockname()
+        self.url = f'ws://{host}:{port}/socket.io/'
+        threading.Thread(
+            target=self._serve, name='WebSocketServer', daemon=True
+        ).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            self._clients.append(conn)
+            self.connections += 1
+            threading.Thread(
+                target=self._handle,
+                args=(conn,),
+                name='WebSocketServerConnection',
+                daemon=True,
+            ).start()
+
+    def _handle(self, conn):
+        try:
+            self._handshake(conn)
+            for frame in self.frames:
+                self.send(conn, frame)
+            while True:
+                opcode, payload = read_frame(conn)
+                if opcode == 0x8:
+                    conn.sendall(encode_frame(payload, opcode=0x8))
+                    break
+                if opcode == 0x1:
+                    text = payload.decode()
+                    self.received.append(text)
+                    if text in self.replies:
+                        self.send(conn, self.replies[text])
+        except (EOFError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _handshake(self, conn):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += conn.recv(4096)
+        headers = dict(
+            line.split(': ', 1)
+            for line in request.decode().split('\r\n')[1:]
+            if ': ' in line
+        )
+        key = headers['Sec-WebSocket-Key']
+        conn.sendall(
+            b'HTTP/1.1 101 Switching Protocols\r\n'
+            b'Upgrade: websocket\r\n'
+            b'Connection: Upgrade\r\n'
+            b'Sec-WebSocket-Accept: ' + accept_key(key).encode() + b'\r\n\r\n'
+        )
+
+    def send(self, conn, frame):
+        conn.sendall(encode_frame(frame))
+
+    def broadcast(self, frame):
+        for conn in self._clients:
+            try:
+                self.send(conn, frame)
+            except OSError:
+                pass
+
+    def drop(self):
+        """Drop all client connections."""
+        for conn in self._clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self._sock.close()
+        self.drop()
+
+
+class Proxy:
+    """
+    An HTTP proxy, tunneling each CONNECT request to its destination
+    and recording the requests received.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self._sock = socket.create_server(('127.0.0.1', 0))
+        host, port = self._sock.getsockname()
+        self.url = f'http://{host}:{port}'
+        threading.Thread(
+            target=self._serve, name='WebSocketServer', daemon=True
+        ).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            threading.Thread(
+                target=self._tunnel, args=(conn,), name='WebSocketServer', daemon=True
+            ).start()
+
+    def _tunnel(self, conn):
+        request = b''
+        while b'\r\n\r\n' not in request:
+            request += conn.recv(4096)
+        self.requests.append(request.decode())
+        host, _, port = request.split()[1].decode().rpartition(':')
+        upstream = socket.create_connection((host, int(port)))
+        conn.sendall(b'HTTP/1.1 200 Connection established\r\n\r\n')
+        threading.Thread(
+            target=_relay, args=(upstream, conn), name='WebSocketServer', daemon=True
+        ).start()
+        _relay(conn, upstream)
+
+    def close(self):
+        self._sock.close()
+
+
+def _relay(source, dest):
+    try:
+        while data := source.recv(4096):
+            dest.sendall(data)
+    except OSError:
+        pass
+    finally:
+        for sock in (source, dest):
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        source.close()
+
+
+class API(http.server.ThreadingHTTPServer):
+    """
+    Serve Abode's HTTP API, answering each ``(method, path)`` in
+    ``routes`` with its JSON document, or with the ``(status, document)``
+    returned by calling it with the request's JSON body, after
+    ``latency`` seconds. Records the requests received and the most
+    handled at once.
+    """
+
+    def __init__(self, routes, latency=0):
+        super().__init__(('127.0.0.1', 0), _APIHandler)
+        self.routes = routes
+        self.latency = latency
+        self.received = []
+        self.active = self.peak = 0
+        self._lock = threading.Lock()
+        host, port = self.server_address
+        self.url = f'http://{host}:{port}/'
+        threading.Thread(target=self.serve_forever, args=(0.05,), daemon=True).start()
+
+    def respond(self, method, path, body):
+        with self._lock:
+            self.received.append((method, path))
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.latency)
+            route = self.routes.get((method, path))
+            if route is None:
+                return 404, {'message': 'Not found'}
+            return route(body) if callable(route) else (200, route)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+    def count(self, method, path):
+        return self.received.count((method, path))
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+
+
+class _APIHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _respond(self):
+        data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        path = urllib.parse.urlsplit(self.path).path
+        status, doc = self.server.respond(
+            self.command, path, json.loads(data) if data else None
+        )
+        payload = json.dumps(doc).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
@@ -4,6 +4,9 @@ Test Abode system setup, shutdown, and general functionality.
 Tests the system initialization and attributes of the main Abode system.
 """
 
+import concurrent.futures
+import time
+
 import pytest
 import requests
 
@@ -502,3 +505,185 @@ class TestAbode:
 
         # Test that some cache exists
         assert empty_client._session.cookies
+
+    def test_snapshot_warm_start(self, m):
+        """Check that a snapshot serves devices without contacting Abode."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(urls.DEVICES, json=DOOR_CONTACT.device())
+        m.get(urls.AUTOMATION, json=DEVICES.EMPTY_DEVICE_RESPONSE)
+
+        cold = jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=60)
+        cold.get_devices()
+        cold.get_automations()
+        cold_calls = len(m.calls)
+        assert cold_calls == 5
+
+        warm = jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=60)
+        device = warm.get_device(DOOR_CONTACT.DEVICE_ID)
+        assert device.status == cold.get_device(DOOR_CONTACT.DEVICE_ID).status
+        assert warm.get_alarm().mode == 'standby'
+        assert warm.get_automations() == []
+        assert len(m.calls) == cold_calls
+
+        # A state change first reconciles with Abode
+        m.put(urls.panel_mode('1', 'home'), json=PANEL.put_response_ok(mode='home'))
+        warm.get_alarm().set_home()
+        assert [call.request.method for call in m.calls[cold_calls:]] == [
+            'POST',
+            'GET',
+            'GET',
+            'GET',
+            'GET',
+            'PUT',
+        ]
+        assert warm.get_device(DOOR_CONTACT.DEVICE_ID) is device
+
+    def test_snapshot_reconcile_single_flight(self, m):
+        """Check that concurrent state changes reconcile once."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(urls.DEVICES, json=DOOR_CONTACT.device())
+        m.put(urls.panel_mode('1', 'home'), json=PANEL.put_response_ok(mode='home'))
+
+        jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=60).get_devices()
+        warm = jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=60)
+        alarm = warm.get_alarm()
+        calls = len(m.calls)
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda _: alarm.set_home(), range(8)))
+
+        refreshes = [
+            call for call in m.calls[calls:] if call.request.url.endswith(urls.DEVICES)
+        ]
+        assert len(refreshes) == 1
+
+    def test_snapshot_stale(self, m):
+        """Check that a stale snapshot is disregarded."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(urls.DEVICES, json=DOOR_CONTACT.device())
+
+        jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=60).get_devices()
+        calls = len(m.calls)
+
+        stale = jaraco.abode.Client(USERNAME, PASSWORD, snapshot_max_age=-1)
+        assert stale.get_device(DOOR_CONTACT.DEVICE_ID)
+        assert len(m.calls) > calls
+
+    def test_persist_session(self, m):
+        """Check that a persisted session skips login."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+        m.get(urls.DEVICES, json=DOOR_CONTACT.device())
+
+        first = jaraco.abode.Client(USERNAME, PASSWORD, persist_session=True)
+        first.get_devices()
+        logins = [call for call in m.calls if call.request.url.endswith(urls.LOGIN)]
+        assert len(logins) == 1
+
+        second = jaraco.abode.Client(USERNAME, PASSWORD, persist_session=True)
+        second.get_devices()
+        logins = [call for call in m.calls if call.request.url.endswith(urls.LOGIN)]
+        assert len(logins) == 1
+        assert second._token == first._token
+
+    def test_persist_without_username(self, m):
+        """Check that stored state awaits the username given at login."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+        m.get(urls.DEVICES, json=DOOR_CONTACT.device())
+
+        client = jaraco.abode.Client(persist_session=True, snapshot_max_age=60)
+        assert client._tokens is None
+        assert client._snapshot is None
+
+        client.login(USERNAME, PASSWORD)
+        client.get_devices()
+
+        assert client._tokens.get()['token'] == client._token
+        assert jaraco.abode.Client(USERNAME, persist_session=True)._tokens.get()
+        assert client._snapshot.load('devices')
+
+    def test_persist_session_rejected(self, m):
+        """Check that a rejected persisted session logs in again."""
+        new_token = "FOOBAR"
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok(auth_token=new_token))
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.DEVICES, json=MOCK.response_forbidden(), status=403)
+        m.get(urls.DEVICES, json=DEVICES.EMPTY_DEVICE_RESPONSE)
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+
+        client = jaraco.abode.Client(USERNAME, PASSWORD, persist_session=True)
+        client._tokens.update(token='expired', oauth_token='expired', panel={}, user={})
+        client.get_devices()
+
+        logins = [call for call in m.calls if call.request.url.endswith(urls.LOGIN)]
+        assert len(logins) == 1
+        assert client._tokens.get()['token'] == new_token
+
+    def test_refresh_ahead(self, m):
+        """Check that the OAuth token is refreshed ahead of expiry."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+
+        self.client.login()
+        self.client.send_request('get', urls.PANEL)
+        assert self.client.auth_stats.refreshes == 0
+
+        # within the margin, the next request refreshes the token
+        self.client._expires = time.time() + self.client.refresh_margin / 2
+        self.client.send_request('get', urls.PANEL)
+        assert self.client.auth_stats.refreshes == 1
+        assert self.client.auth_stats.logins == 1
+
+    def test_refresh_ahead_failure(self, m):
+        """Check that a failed early refresh uses the unexpired token."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.OAUTH_TOKEN, body=requests.exceptions.ConnectTimeout())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+
+        self.client.login()
+        self.client._expires = time.time() + self.client.refresh_margin / 2
+        self.client.send_request('get', urls.PANEL)
+        assert self.client.auth_stats.refreshes == 0
+        assert self.client.auth_stats.logins == 1
+
+    def test_expired_token_single_flight(self, m):
+        """Check that concurrent requests on an expired token refresh once."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+
+        self.client.login()
+        self.client._expires = 0
+
+        with concurrent.futures.ThreadPoolExecutor(8) as pool:
+            responses = pool.map(
+                self.client.send_request, ['get'] * 8, [urls.PANEL] * 8
+            )
+            assert all(responses)
+
+        stats = self.client.auth_stats
+        assert stats.logins == 1
+        assert stats.refreshes == 1
+
+    def test_transient_error_no_login(self, m):
+        """Check that a transient error is retried without logging in."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, body=requests.exceptions.ConnectTimeout())
+        m.get(urls.PANEL, json=PANEL.get_response_ok())
+
+        self.client.send_request('get', urls.PANEL)
+
+        assert self.client.auth_stats.logins == 1
+        assert self.client.auth_stats.logins_avoided == 1
@@ -0,0 +1,149 @@
+"""Test the asyncio Abode client."""
+
+import asyncio
+import threading
+
+import pytest
+
+import jaraco.abode
+import jaraco.abode.devices.status as STATUS
+from jaraco.abode.helpers import urls
+
+from . import server as SERVER
+from .mock import automation as AUTOMATION
+from .mock import devices as DEVICES
+from .mock import login as LOGIN
+from .mock import logout as LOGOUT
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+from .mock.devices import power_switch_sensor as POWERSENSOR
+
+AID = '47fae27488f74f55b964a81a066c3a01'
+
+CONTROL = ('PUT', '/' + POWERSENSOR.CONTROL_URL)
+
+SWITCHED_ON = DEVICES.status_put_response_ok(
+    devid=POWERSENSOR.DEVICE_ID, status=int(STATUS.ON)
+)
+
+
+@pytest.fixture
+def abode(monkeypatch):
+    """Abode's API, served locally."""
+    api = SERVER.API({
+        ('POST', urls.LOGIN): LOGIN.post_response_ok(),
+        ('GET', urls.OAUTH_TOKEN): OAUTH_CLAIMS.get_response_ok(),
+        ('POST', urls.LOGOUT): LOGOUT.post_response_ok(),
+        ('GET', urls.PANEL): PANEL.get_response_ok(mode='standby'),
+        ('GET', urls.DEVICES): POWERSENSOR.device(),
+    })
+    monkeypatch.setattr(urls, 'BASE', api.url)
+    yield api
+    api.close()
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncClient:
+    def test_devices(self, abode):
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                devices = await client.get_devices(generic_type='switch')
+                device = await client.get_device(POWERSENSOR.DEVICE_ID)
+                alarm = await client.get_alarm()
+            return devices, device, alarm
+
+        devices, device, alarm = run(scenario())
+        assert [dev.target for dev in devices] == [device.target]
+        assert device.status == STATUS.OFF
+        assert not device.is_on
+        assert alarm.mode == 'standby'
+        assert abode.count('POST', urls.LOGIN) == 1
+        assert abode.count('GET', urls.DEVICES) == 1
+        assert abode.count('POST', urls.LOGOUT) == 1
+
+    def test_device_commands(self, abode):
+        abode.routes[CONTROL] = SWITCHED_ON
+
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                device = await client.get_device(POWERSENSOR.DEVICE_ID)
+                await device.switch_on()
+            return device
+
+        device = run(scenario())
+        assert device.status == STATUS.ON
+        assert device.is_on
+        assert abode.count(*CONTROL) == 1
+
+    def test_concurrent_commands(self, abode):
+        abode.routes[CONTROL] = SWITCHED_ON
+        abode.latency = 0.02
+
+        async def scenario():
+            async with jaraco.abode.AsyncClient(
+                'foobar', 'deadbeef', max_concurrency=3
+            ) as client:
+                device = await client.get_device(POWERSENSOR.DEVICE_ID)
+                await asyncio.gather(*(device.switch_on() for _ in range(10)))
+                return [thread.name for thread in threading.enumerate()]
+
+        threads = run(scenario())
+        assert abode.count(*CONTROL) == 10
+        assert 1 < abode.peak <= 3
+        # requests were awaited on the event loop, not run in workers
+        assert not any(name.startswith('asyncio') for name in threads)
+
+    def test_automations(self, abode):
+        abode.routes['GET', urls.AUTOMATION] = AUTOMATION.get_response_ok(
+            name='Auto Away', enabled=True, id=AID
+        )
+        abode.routes['POST', urls.AUTOMATION_APPLY.format(id=AID)] = {}
+
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                (automation,) = await client.get_automations()
+                await automation.trigger()
+            return automation
+
+        automation = run(scenario())
+        assert automation.name == 'Auto Away'
+        assert automation.enabled
+        assert abode.count('POST', urls.AUTOMATION_APPLY.format(id=AID)) == 1
+
+    def test_reauthenticate(self, abode):
+        responses = iter([(403, {'message': 'Expired'}), (200, SWITCHED_ON)])
+        abode.routes[CONTROL] = lambda body: next(responses)
+
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                device = await client.get_device(POWERSENSOR.DEVICE_ID)
+                await device.switch_on()
+                return client.auth_stats.logins
+
+        assert run(scenario()) == 2
+        assert abode.count('POST', urls.LOGIN) == 2
+        assert abode.count(*CONTROL) == 2
+
+    def test_errors_propagate(self, abode):
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                await client.set_setting('invalid_setting', '1')
+
+        with pytest.raises(jaraco.abode.Exception):
+            run(scenario())
+
+    def test_failed_request(self, abode):
+        abode.routes[CONTROL] = lambda body: (500, {'message': 'Oops'})
+
+        async def scenario():
+            async with jaraco.abode.AsyncClient('foobar', 'deadbeef') as client:
+                device = await client.get_device(POWERSENSOR.DEVICE_ID)
+                await device.switch_on()
+
+        with pytest.raises(jaraco.abode.Exception):
+            run(scenario())
+        # retried once
+        assert abode.count(*CONTROL) == 2
@@ -0,0 +1,75 @@
+"""Test applying commands to many devices."""
+
+import jaraco.abode
+import jaraco.abode.devices.status as STATUS
+from jaraco.abode.batch import DeviceBatch
+from jaraco.abode.helpers import urls
+
+from .mock import devices as DEVICES
+from .mock import login as LOGIN
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+from .mock.devices import door_lock as DOOR_LOCK
+from .mock.devices import power_switch_sensor as POWER_SWITCH
+
+
+class TestBatch:
+    def setup_devices(self, m):
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(urls.DEVICES, json=[DOOR_LOCK.device(), POWER_SWITCH.device()])
+        self.client.logout()
+
+    def test_apply(self, m):
+        """Check that commands apply to each device."""
+        self.setup_devices(m)
+        m.put(
+            urls.BASE + DOOR_LOCK.CONTROL_URL,
+            json=DEVICES.status_put_response_ok(
+                devid=DOOR_LOCK.DEVICE_ID, status=int(STATUS.Lock.OPEN)
+            ),
+        )
+        m.put(
+            urls.BASE + POWER_SWITCH.CONTROL_URL,
+            json=DEVICES.status_put_response_ok(
+                devid=POWER_SWITCH.DEVICE_ID, status=int(STATUS.ON)
+            ),
+        )
+
+        results = self.client.apply([
+            (DOOR_LOCK.DEVICE_ID, 'unlock'),
+            (POWER_SWITCH.DEVICE_ID, 'switch_on'),
+        ])
+
+        assert all(result.ok for result in results)
+        assert [result.device.id for result in results] == [
+            DOOR_LOCK.DEVICE_ID,
+            POWER_SWITCH.DEVICE_ID,
+        ]
+        assert not results[0].device.is_locked
+        assert results[1].device.is_on
+
+    def test_apply_errors(self, m):
+        """Check that a failed command doesn't affect the others."""
+        self.setup_devices(m)
+        m.put(
+            urls.BASE + DOOR_LOCK.CONTROL_URL,
+            json=DEVICES.status_put_response_ok(
+                devid=DOOR_LOCK.DEVICE_ID, status=int(STATUS.Lock.CLOSED)
+            ),
+        )
+        switch = self.client.get_device(POWER_SWITCH.DEVICE_ID)
+
+        results = (
+            DeviceBatch(self.client)
+            .unlock(DOOR_LOCK.DEVICE_ID)
+            .lock(switch)
+            .switch_on('ZW:missing')
+            .apply(max_concurrency=2)
+        )
+
+        assert not any(result.ok for result in results)
+        assert results[0].error.errcode == 4
+        assert isinstance(results[1].error, AttributeError)
+        assert isinstance(results[2].error, jaraco.abode.Exception)
@@ -1,15 +1,19 @@
 """Test the Abode camera class."""
 
 import base64
+import datetime
+import io
 import json
 import os
 import pathlib
 import re
+import time
 
 import pytest
 
 import jaraco.abode
 import jaraco.abode.devices.status as STATUS
+from jaraco.abode.helpers import errors as ERROR
 from jaraco.abode.helpers import urls
 from jaraco.collections import Projection
 
@@ -113,6 +117,45 @@ class TestCamera:
             # Capture an image with a failure
             assert not device.capture()
 
+    def test_camera_capture_wait(self, m, monkeypatch):
+        """Tests awaiting completion of a capture."""
+        device = self.client.get_device(IPCAM.DEVICE_ID)
+        events = self.client.events
+        monkeypatch.setattr(events, '_connected', True)
+        m.put(IPCAM.CONTROL_URL_SNAPSHOT, json=MOCK.generic_response_ok())
+
+        # Completed by the pushed timeline event
+        future = device.capture(wait=True, timeout=5)
+        assert not future.done()
+        event = dict(IPCAM.timeline_event(), id='1')
+        events._on_timeline_update(event)
+        assert future.result(timeout=1) == event
+
+        # Failed when no event arrives in time
+        future = device.capture(wait=True, timeout=0.01)
+        with pytest.raises(jaraco.abode.Exception) as exc:
+            future.result(timeout=1)
+        assert exc.value.errcode == ERROR.CAM_CAPTURE_TIMEOUT[0]
+        assert not events._waiters
+
+        # Found by polling when disconnected while waiting
+        monkeypatch.setattr(device, 'capture_poll_interval', 0.01)
+        timeline_url = urls.TIMELINE_IMAGES_ID.format(device_id=device.id)
+        # the previous capture, then the new one
+        m.get(timeline_url, json=[dict(IPCAM.timeline_event(), id='1')])
+        captured = dict(IPCAM.timeline_event(), id='2', event_utc=str(int(time.time())))
+        m.get(timeline_url, json=[captured])
+        future = device.capture(wait=True, timeout=5)
+        events._on_socket_disconnected()
+        assert future.result(timeout=1)['id'] == '2'
+        assert not events._waiters
+
+        # Failed at once when the capture is refused
+        m.put(IPCAM.CONTROL_URL_SNAPSHOT, json=IPCAM.get_capture_timeout(), status=600)
+        future = device.capture(wait=True, timeout=5)
+        assert future.done()
+        assert future.exception().errcode == ERROR.CAM_CAPTURE_FAILED[0]
+
     def test_camera_capture_no_control_URLs(self, m):
         """Tests that camera devices capture new images."""
         for device in self.camera_devices():
@@ -202,6 +245,44 @@ class TestCamera:
             assert not device.refresh_image()
             assert device.image_url is None
 
+    def test_camera_image_url_cache(self, m, monkeypatch):
+        """Tests that signed image URLs are reused until stale."""
+        device = self.client.get_device(IPCAM.DEVICE_ID)
+        signed = datetime.datetime.now(datetime.timezone.utc)
+        location = (
+            'https://bucket.s3.amazonaws.com/0.jpg'
+            f'?X-Amz-Date={signed:%Y%m%dT%H%M%SZ}&X-Amz-Expires=900'
+        )
+        timeline_url = urls.TIMELINE_IMAGES_ID.format(device_id=device.id)
+        event = dict(IPCAM.timeline_event(), id='1')
+        m.get(timeline_url, json=[event])
+        m.head(IPCAM.FILE_PATH, status=302, headers={"Location": location})
+
+        def requests(url):
+            return sum(call.request.url.endswith(url) for call in m.calls)
+
+        # Without events, the timeline is queried but the location reused
+        assert device.refresh_image()
+        assert device.refresh_image()
+        assert device.image_url == location
+        assert (requests(timeline_url), requests(IPCAM.FILE_PATH)) == (2, 1)
+
+        # With events and no new capture, the location is simply reused
+        monkeypatch.setattr(device._client.events, '_connected', True)
+        assert device.refresh_image()
+        assert (requests(timeline_url), requests(IPCAM.FILE_PATH)) == (2, 1)
+
+        # A pushed capture is located without querying the timeline
+        device._client.events._on_timeline_update(dict(event, id='2'))
+        assert device.refresh_image()
+        assert device.refresh_image()
+        assert (requests(timeline_url), requests(IPCAM.FILE_PATH)) == (2, 2)
+
+        # An expiring location is not reused
+        device.image_url_margin = 900
+        assert device.refresh_image()
+        assert (requests(timeline_url), requests(IPCAM.FILE_PATH)) == (2, 3)
+
     def test_camera_image_write(self, m):
         """Tests that camera images will write to a file."""
         for device in self.camera_devices():
@@ -236,6 +317,11 @@ class TestCamera:
             assert image_response, image_data
             os.remove(path)
 
+            # Test streaming the image
+            sink = io.BytesIO()
+            assert device.image_to_stream(sink, get_image=False)
+            assert sink.getvalue() == json.dumps(image_response).encode()
+
             # Test that bad response returns False
             m.get(cam_type.LOCATION_HEADER, status=400)
             with pytest.raises(jaraco.abode.Exception):
@@ -328,6 +414,35 @@ class TestCamera:
             m.post(snapshot_url, json=cam_type.get_capture_timeout(), status=600)
             assert device.snapshot_data_url(get_snapshot=True) == ""
 
+    def test_camera_snapshot_cache(self, m):
+        """Tests that decoded snapshots are cached within a budget."""
+        device = self.client.get_device(IPCAM.DEVICE_ID)
+        snapshot_url = f"{urls.CAMERA_INTEGRATIONS}{device.uuid}/snapshot"
+        image_response = b"this is a beautiful jpeg image"
+        b64_image = str(base64.b64encode(image_response), "utf-8")
+        m.post(snapshot_url, json=dict(base64Image=b64_image))
+
+        assert device.snapshot()
+        assert self.client.images.get(device.id) == image_response
+        calls = len(m.calls)
+        assert device.snapshot_data_url(get_snapshot=False).endswith(b64_image)
+        assert len(m.calls) == calls
+
+        # Snapshots beyond the budget are decoded but not held
+        self.client.images.budget = len(image_response) - 1
+        assert device.snapshot_data_url(get_snapshot=True).endswith(b64_image)
+        assert self.client.images.get(device.id) is None
+
+        # Data urls may be written to any text sink
+        url = io.StringIO()
+        assert device.snapshot_data_url(get_snapshot=False, sink=url)
+        assert url.getvalue() == f"data:image/jpeg;base64,{b64_image}"
+
+        # Snapshots may be streamed to any sink
+        sink = io.BytesIO()
+        assert device.snapshot(sink)
+        assert sink.getvalue() == image_response
+
     def test_camera_privacy_mode(self, m):
         """Tests camera privacy mode."""
 
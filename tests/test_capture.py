@@ -0,0 +1,119 @@
+"""Test capturing from many cameras."""
+
+import json
+import threading
+
+import pytest
+
+import jaraco.abode
+from jaraco.abode.devices.camera import Camera
+from jaraco.abode.helpers import urls
+
+from . import mock as MOCK
+from .mock import login as LOGIN
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+from .mock.devices import ipcam as IPCAM
+from .mock.devices import ir_camera as IRCAMERA
+
+CAMERAS = {
+    IPCAM.DEVICE_ID: (IPCAM, IPCAM.CONTROL_URL_SNAPSHOT),
+    IRCAMERA.DEVICE_ID: (IRCAMERA, IRCAMERA.CONTROL_URL),
+}
+
+IMAGE = b'this is a beautiful jpeg image'
+
+
+@pytest.fixture
+def client(m):
+    m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+    m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+    m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+    m.get(urls.DEVICES, json=[IPCAM.device(), IRCAMERA.device()])
+    return jaraco.abode.Client(username='foobar', password='deadbeef')
+
+
+@pytest.fixture
+def images(m):
+    for cam_type, _ in CAMERAS.values():
+        m.head(
+            cam_type.FILE_PATH,
+            status=302,
+            headers={"Location": cam_type.LOCATION_HEADER},
+        )
+        m.get(cam_type.LOCATION_HEADER, body=IMAGE)
+
+
+def test_capture_all_push(m, client, images, tmp_path, monkeypatch):
+    monkeypatch.setattr(client.events, '_connected', True)
+    for device_id, (cam_type, url) in CAMERAS.items():
+        m.add_callback(
+            'PUT',
+            urls.BASE + url,
+            callback=_pusher(client, device_id, cam_type),
+            content_type='application/json',
+        )
+
+    results = client.capture_all(tmp_path, timeout=5)
+
+    assert [result.camera.id for result in results] == list(CAMERAS)
+    assert all(result.ok and result.fresh for result in results)
+    for result in results:
+        assert result.path.read_bytes() == IMAGE
+        assert set(result.timings) == {'capture', 'event', 'locate', 'download'}
+    # the pushed events located the images, without querying the timeline
+    timeline_requests = [call for call in m.calls if 'timeline' in call.request.url]
+    assert not timeline_requests
+
+
+def _pusher(client, device_id, cam_type):
+    def respond(request):
+        event = dict(cam_type.timeline_event(device_id), id=f'{device_id}-capture')
+        threading.Timer(0.01, client.events._on_timeline_update, [event]).start()
+        return 200, {}, json.dumps(MOCK.generic_response_ok())
+
+    return respond
+
+
+def test_capture_all_disconnected(m, client, images, tmp_path, monkeypatch):
+    monkeypatch.setattr(Camera, 'capture_poll_interval', 0.01)
+    for device_id, (cam_type, url) in CAMERAS.items():
+        m.put(url, json=MOCK.generic_response_ok())
+        timeline_url = urls.TIMELINE_IMAGES_ID.format(device_id=device_id)
+        # the previous capture, then the new one, once polled
+        for event_id in ('1', '1', '2'):
+            m.get(timeline_url, json=[dict(cam_type.timeline_event(), id=event_id)])
+
+    results = client.capture_all(tmp_path)
+
+    assert all(result.ok for result in results)
+    assert all(result.path.read_bytes() == IMAGE for result in results)
+
+
+def test_capture_failure(m, client, tmp_path):
+    ipcam = client.get_device(IPCAM.DEVICE_ID)
+    m.put(IPCAM.CONTROL_URL_SNAPSHOT, json=IPCAM.get_capture_timeout(), status=600)
+
+    (result,) = client.capture_all(tmp_path, cameras=[ipcam])
+
+    assert not result.ok
+    assert isinstance(result.error, jaraco.abode.Exception)
+    assert set(result.timings) == {'capture'}
+    assert not result.path.exists()
+
+
+def test_capture_event_timeout(m, client, tmp_path, monkeypatch):
+    monkeypatch.setattr(client.events, '_connected', True)
+    m.head(IPCAM.FILE_PATH, status=302, headers={"Location": IPCAM.LOCATION_HEADER})
+    m.get(IPCAM.LOCATION_HEADER, body=IMAGE)
+    ipcam = client.get_device(IPCAM.DEVICE_ID)
+    m.put(IPCAM.CONTROL_URL_SNAPSHOT, json=MOCK.generic_response_ok())
+    timeline_url = urls.TIMELINE_IMAGES_ID.format(device_id=IPCAM.DEVICE_ID)
+    m.get(timeline_url, json=[IPCAM.timeline_event()])
+
+    (result,) = client.capture_all(tmp_path, cameras=[ipcam], timeout=0.05)
+
+    assert result.ok
+    assert not result.fresh
+    assert 'stale' in repr(result)
+    assert result.path.read_bytes() == IMAGE
@@ -0,0 +1,42 @@
+"""Test the lazy rendering of responses for debug logging."""
+
+import logging
+
+from jaraco.abode.helpers import debug
+
+
+class Response:
+    encoding = 'utf-8'
+
+    def __init__(self, content):
+        self._content = content
+        self.reads = 0
+
+    @property
+    def content(self):
+        self.reads += 1
+        return self._content
+
+
+def test_escaped_quote_redacted():
+    response = Response(rb'{"token": "ab\"cd\\\"ef", "mode": "standby"}')
+    assert str(debug.Body(response)) == '{"token": "***", "mode": "standby"}'
+
+
+def test_truncated_redacted():
+    response = Response(rb'{"token": "abc\"def"}')
+    assert str(debug.Body(response, limit=15)) == '{"token": "***"... (21 bytes)'
+
+
+def test_not_rendered_unless_logged(caplog):
+    response = Response(b'{"token": "abc123"}')
+    log = logging.getLogger('jaraco.abode.test')
+
+    with caplog.at_level(logging.INFO, logger=log.name):
+        log.debug("Response: %s", debug.Body(response))
+    assert response.reads == 0
+
+    with caplog.at_level(logging.DEBUG, logger=log.name):
+        log.debug("Response: %s", debug.Body(response))
+    assert response.reads
+    assert caplog.messages == ['Response: {"token": "***"}']
@@ -1,10 +1,14 @@
 """Test the Abode device classes."""
 
+import gc
+
 import pytest
 
 import jaraco.abode
 import jaraco.abode.devices.status as STATUS
-from jaraco.abode.devices.base import Device
+from jaraco.abode.devices import base
+from jaraco.abode.devices.base import Device, Unknown
+from jaraco.abode.devices.binary_sensor import BinarySensor, Motion
 from jaraco.abode.helpers import urls
 
 from .mock import devices as DEVICES
@@ -17,6 +21,22 @@ from .mock.devices import power_switch_sensor as POWERSENSOR
 from .mock.devices import unknown as UNKNOWN
 
 
+@pytest.fixture
+def gizmo(monkeypatch):
+    """
+    A plugin Device class, registered for the test only.
+    """
+    monkeypatch.setattr(Device, '_registry', dict(Device._registry))
+
+    class Gizmo(Device):
+        tags = ('gizmo_one',)
+
+    yield Gizmo
+    # drop the class, lest a later invalidation register it again
+    del Gizmo
+    gc.collect()
+
+
 class TestDevice:
     """Test the generic device class."""
 
@@ -420,3 +440,67 @@ class TestDevice:
         door_devs = self.client.get_devices(generic_type='door')
         cnct_devs = self.client.get_devices(generic_type='connectivity')
         assert set(selected) == set(door_devs) | set(cnct_devs)
+
+    def test_registered_plugin_device(self, gizmo):
+        """
+        Test that a plugin can register a class for a type tag.
+        """
+        Gizmo = gizmo
+
+        assert Device.resolve_class('device_type.gizmo_one') is Gizmo
+        assert Device.resolve_class('device_type.gizmo_two') is Unknown
+
+        Device.register(Gizmo, 'gizmo_two')
+        assert Device.resolve_class('device_type.gizmo_two') is Gizmo
+
+        # a class only resolves tags for its subclasses
+        assert BinarySensor.resolve_class('device_type.gizmo_one') is Unknown
+
+        # invalidation discards explicit registrations
+        Device.invalidate_registry()
+        assert Device.resolve_class('device_type.gizmo_one') is Gizmo
+        assert Device.resolve_class('device_type.gizmo_two') is Unknown
+
+    def test_resolve_class_per_base(self, gizmo, monkeypatch):
+        """
+        Test that a class resolves a tag to its own subclass, even
+        where another class services the tag for Device.
+        """
+        monkeypatch.setattr(BinarySensor, '_registry', dict(BinarySensor._registry))
+
+        class Widget(BinarySensor):
+            tags = ('gizmo_one',)
+
+        assert Device.resolve_class('device_type.gizmo_one') is gizmo
+        assert BinarySensor.resolve_class('device_type.gizmo_one') is Widget
+        assert Widget.resolve_class('device_type.gizmo_one') is Widget
+        del Widget
+        gc.collect()
+
+    def test_resolve_class_does_not_scan(self, monkeypatch):
+        """
+        Test that resolving a type tag does not walk the subclasses.
+        """
+        Device.resolve_class('device_type.povs')
+        monkeypatch.setattr(base, 'iter_subclasses', None)
+        for _ in range(1000):
+            assert Device.resolve_class('device_type.povs') is Motion
+
+    def test_get_devices_type_tag(self, all_devices):
+        """
+        Test that devices can be selected by type_tag.
+        """
+        selected = self.client.get_devices(type_tag='device_type.door_contact')
+        assert [device.generic_type for device in selected] == ['door']
+        assert not self.client.get_devices(
+            generic_type='connectivity', type_tag='device_type.door_contact'
+        )
+
+    def test_get_device_by_uuid(self, all_devices):
+        """
+        Test that a device can be retrieved by uuid.
+        """
+        for device in self.client.get_devices():
+            if 'uuid' in device._state:
+                assert self.client.get_device_by_uuid(device.uuid) is device
+        assert self.client.get_device_by_uuid('no-such-uuid') is None
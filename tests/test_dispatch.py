@@ -0,0 +1,91 @@
+"""Test the callback dispatcher."""
+
+import threading
+
+import pytest
+
+from jaraco.abode.dispatch import Dispatcher
+
+
+@pytest.fixture
+def blocked():
+    """
+    A Dispatcher with a single worker blocked until the event is set.
+    """
+    dispatcher = Dispatcher(max_workers=1, max_pending=2, overflow='drop_newest')
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait()
+
+    dispatcher.submit('block', block)
+    started.wait()
+    yield dispatcher, release
+    release.set()
+    dispatcher.shutdown()
+
+
+class TestDispatcher:
+    def test_per_key_ordering(self):
+        dispatcher = Dispatcher(max_workers=4)
+        results = {key: [] for key in 'abc'}
+        for n in range(100):
+            for key in results:
+                dispatcher.submit(key, results[key].append, n)
+        dispatcher.shutdown()
+        assert all(result == list(range(100)) for result in results.values())
+        assert dispatcher.stats.dispatched == 300
+        assert dispatcher.stats.depth == 0
+
+    def test_drop_newest(self, blocked):
+        dispatcher, release = blocked
+        results = []
+        assert dispatcher.submit('key', results.append, 1)
+        assert dispatcher.submit('key', results.append, 2)
+        assert not dispatcher.submit('key', results.append, 3)
+        assert dispatcher.stats.max_depth == 2
+        release.set()
+        dispatcher.shutdown()
+        assert results == [1, 2]
+        assert dispatcher.stats.dropped == 1
+
+    def test_drop_oldest(self, blocked):
+        dispatcher, release = blocked
+        dispatcher.overflow = 'drop_oldest'
+        results = []
+        dispatcher.submit('one', results.append, 1)
+        dispatcher.submit('two', results.append, 2)
+        assert dispatcher.submit('one', results.append, 3)
+        release.set()
+        dispatcher.shutdown()
+        assert sorted(results) == [2, 3]
+        assert dispatcher.stats.dropped == 1
+
+    def test_block(self, blocked):
+        dispatcher, release = blocked
+        dispatcher.overflow = 'block'
+        results = []
+        dispatcher.submit('key', results.append, 1)
+        dispatcher.submit('key', results.append, 2)
+        submitter = threading.Thread(
+            target=dispatcher.submit, args=('key', results.append, 3)
+        )
+        submitter.start()
+        submitter.join(0.05)
+        assert submitter.is_alive()
+        release.set()
+        submitter.join()
+        dispatcher.shutdown()
+        assert results == [1, 2, 3]
+        assert dispatcher.stats.dropped == 0
+
+    def test_invalid_policy(self):
+        with pytest.raises(ValueError):
+            Dispatcher(overflow='explode')
+
+    @pytest.mark.parametrize('overflow', Dispatcher.policies)
+    def test_invalid_max_pending(self, overflow):
+        with pytest.raises(ValueError):
+            Dispatcher(max_pending=0, overflow=overflow)
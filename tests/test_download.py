@@ -0,0 +1,191 @@
+"""Test streaming, resumable media downloads."""
+
+import gzip
+import hashlib
+import http.server
+import io
+import threading
+
+import pytest
+
+import jaraco.abode
+from jaraco.abode.download import Download
+from jaraco.abode.transport import Transport
+
+CONTENT = bytes(range(256)) * 1024
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Serve CONTENT, honoring Range requests (unless an If-Range
+    validator differs), but dropping the connection halfway through
+    the first ``drops`` responses. With ``misplaced``, ranges start
+    that many bytes before the requested start. With ``gzip``, the
+    content is always encoded. Records the Accept-Encoding requested.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    drops = 0
+    ranges = True
+    misplaced = 0
+    gzip = False
+    etag = hashlib.md5(CONTENT).hexdigest()
+    accepted = []
+
+    def do_GET(self):
+        start = 0
+        header = self.headers.get('Range')
+        current = self.headers.get('If-Range', f'"{self.etag}"') == f'"{self.etag}"'
+        self.accepted.append(self.headers.get('Accept-Encoding'))
+        if header and self.ranges and current:
+            start = int(header.removeprefix('bytes=').rstrip('-')) - self.misplaced
+        # a range counts bytes as sent, so of any encoding
+        content = gzip.compress(CONTENT, mtime=0) if self.gzip else CONTENT
+        body = content[start:]
+        self.send_response(206 if header and start else 200)
+        if header and start:
+            self.send_header(
+                'Content-Range', f'bytes {start}-{len(content) - 1}/{len(content)}'
+            )
+        if self.gzip:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', f'"{self.etag}"')
+        self.end_headers()
+        cls = type(self)
+        if cls.drops:
+            cls.drops -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def handler():
+    class Scripted(Handler):
+        accepted = []
+
+    return Scripted
+
+
+@pytest.fixture
+def url(handler, responses):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = server.server_address
+    url = f'http://{host}:{port}/image.jpg'
+    responses.add_passthru(url)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session():
+    return Transport().session()
+
+
+def test_to_stream(session, url):
+    sink = io.BytesIO()
+    assert Download(session, url, chunk_size=4096).to_stream(sink) == len(CONTENT)
+    assert sink.getvalue() == CONTENT
+
+
+def test_resume(session, url, handler):
+    handler.drops = 1
+    sink = io.BytesIO()
+    Download(session, url, verify=True).to_stream(sink)
+    assert sink.getvalue() == CONTENT
+
+
+def test_unencoded(session, url, handler):
+    Download(session, url).to_stream(io.BytesIO())
+    assert handler.accepted == ['identity']
+
+
+def test_range_misplaced(session, url, handler):
+    handler.drops = 1
+    handler.misplaced = 10
+    sink = io.BytesIO()
+    Download(session, url, verify=True).to_stream(sink)
+    assert sink.getvalue() == CONTENT
+
+
+def test_encoded_restarts(session, url, handler):
+    handler.drops = 1
+    handler.gzip = True
+    sink = io.BytesIO()
+    Download(session, url).to_stream(sink)
+    assert sink.getvalue() == CONTENT
+
+
+def test_range_ignored(session, url, handler):
+    handler.drops = 1
+    handler.ranges = False
+    sink = io.BytesIO(b'header')
+    sink.seek(0, io.SEEK_END)
+    Download(session, url).to_stream(sink)
+    assert sink.getvalue() == b'header' + CONTENT
+
+
+def test_gives_up(session, url, handler):
+    handler.drops = 3
+    with pytest.raises(jaraco.abode.Exception):
+        Download(session, url, attempts=2).to_stream(io.BytesIO())
+
+
+def test_checksum_mismatch(session, url, handler):
+    handler.etag = hashlib.md5(b'other').hexdigest()
+    with pytest.raises(jaraco.abode.Exception):
+        Download(session, url, verify=True).to_stream(io.BytesIO())
+
+
+def test_to_file_atomic(session, url, handler, tmp_path):
+    target = tmp_path / 'image.jpg'
+    target.write_bytes(b'previous')
+    handler.drops = 2
+    with pytest.raises(jaraco.abode.Exception):
+        Download(session, url, attempts=1).to_file(target)
+    assert target.read_bytes() == b'previous'
+    assert (tmp_path / 'image.jpg.part').exists()
+    assert (tmp_path / 'image.jpg.part.validator').exists()
+
+    # a later download resumes from the partial file
+    Download(session, url, verify=True).to_file(target)
+    assert target.read_bytes() == CONTENT
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_to_file_no_resume(session, url, handler, tmp_path):
+    target = tmp_path / 'image.jpg'
+    handler.drops = 1
+    with pytest.raises(jaraco.abode.Exception):
+        Download(session, url, attempts=1).to_file(target, resume=False)
+    assert not list(tmp_path.iterdir())
+
+
+def test_to_file_changed(session, url, handler, tmp_path):
+    target = tmp_path / 'image.jpg'
+    handler.drops = 1
+    with pytest.raises(jaraco.abode.Exception):
+        Download(session, url, attempts=1).to_file(target)
+    part = tmp_path / 'image.jpg.part'
+    assert part.read_bytes() == CONTENT[: len(CONTENT) // 2]
+
+    # the content changed since, so the partial file is not resumed
+    handler.etag = hashlib.md5(b'other').hexdigest()
+    Download(session, url).to_file(target)
+    assert target.read_bytes() == CONTENT
+    assert not list(tmp_path.glob('*.part*'))
+
+
+def test_to_file_unvalidated(session, url, tmp_path):
+    target = tmp_path / 'image.jpg'
+    part = tmp_path / 'image.jpg.part'
+    part.write_bytes(b'left by another download')
+    Download(session, url).to_file(target)
+    assert target.read_bytes() == CONTENT
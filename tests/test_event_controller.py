@@ -1,5 +1,7 @@
 """Test the Abode event controller class."""
 
+import concurrent.futures
+import threading
 from unittest.mock import Mock, call
 
 import pytest
@@ -8,7 +10,10 @@ import jaraco.abode
 import jaraco.abode.devices.status as STATUS
 import jaraco.abode.helpers.timeline as TIMELINE
 from jaraco.abode.devices.binary_sensor import BinarySensor
+from jaraco.abode.dispatch import Dispatcher
+from jaraco.abode.event_controller import EventController
 from jaraco.abode.helpers import urls
+from jaraco.abode.reactor import Reactor
 
 from .mock import login as LOGIN
 from .mock import oauth_claims as OAUTH_CLAIMS
@@ -480,3 +485,325 @@ class TestEventController:
 
         # Our capture callback should get one, but our alarm should not
         automation_callback.assert_called_with('{}')
+
+    def test_coalesced_device_updates(self, m):
+        """Tests that device updates within the window are coalesced."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        panel_refresh = m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(
+            urls.DEVICES,
+            json=[
+                COVER.device(status=STATUS.CLOSED),
+                DOORCONTACT.device(status=STATUS.CLOSED),
+            ],
+        )
+
+        self.client.logout()
+
+        cover = self.client.get_device(COVER.DEVICE_ID)
+        doorcontact = self.client.get_device(DOORCONTACT.DEVICE_ID)
+
+        events = self.client.events
+        events.coalesce_window = 60
+
+        callback = Mock()
+        assert events.add_device_callback([cover, doorcontact], callback)
+
+        cover_url = urls.DEVICE.format(id=COVER.DEVICE_ID)
+        cover_refresh = m.get(cover_url, json=COVER.device(status=STATUS.OPEN))
+
+        # Repeated updates for one device result in one refresh
+        events._on_device_update(cover.id)
+        events._on_device_update(cover.id)
+        events._on_device_update(cover.id)
+        callback.assert_not_called()
+
+        events._flush_device_updates()
+        assert cover_refresh.call_count == 1
+        callback.assert_called_once_with(cover)
+        assert cover.status == STATUS.OPEN
+
+        # Distinct devices beyond the threshold are refreshed together
+        callback.reset_mock()
+        events.batch_threshold = 2
+        devices_refresh = m.get(
+            urls.DEVICES,
+            json=[
+                COVER.device(status=STATUS.CLOSED),
+                DOORCONTACT.device(status=STATUS.OPEN),
+            ],
+        )
+
+        panel_refreshes = panel_refresh.call_count
+
+        events._on_device_update(cover.id)
+        events._on_device_update(doorcontact.id)
+        events._on_device_update(cover.id)
+        events._flush_device_updates()
+
+        assert devices_refresh.call_count == 1
+        assert cover_refresh.call_count == 1
+        # only the device list, not the panel, is requested
+        assert panel_refresh.call_count == panel_refreshes
+        callback.assert_has_calls([call(cover), call(doorcontact)])
+        assert callback.call_count == 2
+        assert cover.status == STATUS.CLOSED
+        assert doorcontact.status == STATUS.OPEN
+
+        # Pending updates are dropped on stop
+        callback.reset_mock()
+        events._on_device_update(cover.id)
+        events.stop()
+
+        assert not events._pending_devices
+        assert events._flush_timer is None
+        assert cover_refresh.call_count == 1
+        callback.assert_not_called()
+
+    def test_dispatched_callbacks(self):
+        """Tests that callbacks may be run on a dispatcher."""
+        events = self.client.events
+        events.dispatcher = Dispatcher(max_workers=2)
+
+        callback = Mock()
+        assert events.add_timeline_callback(TIMELINE.CAPTURE_IMAGE, callback)
+
+        event_json = IRCAMERA.timeline_event()
+        events._on_timeline_update(event_json)
+
+        events.dispatcher.shutdown()
+        callback.assert_called_once_with(event_json)
+        assert events.dispatcher.stats.dispatched == 1
+
+    def test_reactor(self):
+        """Tests that a reactor may be selected to drive the connection."""
+        reactor = Reactor()
+        events = EventController(self.client, reactor=reactor)
+        assert events.reactor is reactor
+        assert events.socketio.reactor is reactor
+
+        self.client.events.reactor = reactor
+        assert self.client.events.socketio.reactor is reactor
+
+    def test_timeline_replay(self, m):
+        """Tests that timeline events missed while disconnected are replayed."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        devices_refresh = m.get(
+            urls.DEVICES,
+            json=[
+                COVER.device(status=STATUS.CLOSED),
+                DOORCONTACT.device(status=STATUS.CLOSED),
+            ],
+        )
+
+        self.client.logout()
+        doorcontact = self.client.get_device(DOORCONTACT.DEVICE_ID)
+
+        def timeline_event(id, utc, device_id=DOORCONTACT.DEVICE_ID):
+            return dict(
+                IRCAMERA.timeline_event(),
+                id=id,
+                event_utc=str(utc),
+                device_id=device_id,
+            )
+
+        events = self.client.events
+        events.replay_page_size = 2
+        timeline_callback = Mock()
+        device_callback = Mock()
+        assert events.add_timeline_callback(TIMELINE.ALL, timeline_callback)
+        assert events.add_device_callback(doorcontact, device_callback)
+
+        seen = timeline_event('100', 1000)
+        events._on_timeline_update(seen)
+        timeline_callback.assert_called_once_with(seen)
+        timeline_callback.reset_mock()
+
+        # Disconnected while these occurred
+        missed = [timeline_event('101', 1001), timeline_event('102', 1002)]
+        last = timeline_event('103', 1003)
+        m.get(
+            urls.TIMELINE_LATEST.format(size=2),
+            json=[last, missed[1]],
+        )
+        m.get(
+            urls.TIMELINE_BEFORE.format(id='102', size=2),
+            json=[missed[0], seen],
+        )
+        m.get(
+            urls.DEVICE.format(id=DOORCONTACT.DEVICE_ID),
+            json=DOORCONTACT.device(status=STATUS.OPEN),
+        )
+
+        events._on_socket_connected()
+
+        assert timeline_callback.call_args_list == [
+            call(missed[0]),
+            call(missed[1]),
+            call(last),
+        ]
+        device_callback.assert_called_once_with(doorcontact)
+        assert doorcontact.status == STATUS.OPEN
+        assert devices_refresh.call_count == 1
+
+        # A live event already replayed is not repeated
+        timeline_callback.reset_mock()
+        events._on_timeline_update(last)
+        timeline_callback.assert_not_called()
+
+    def test_timeline_replay_gap(self, m, monkeypatch):
+        """Tests that devices are resynchronized if too much was missed."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        events = self.client.events
+        events.replay_page_size = 2
+        events.replay_max_pages = 1
+        resync = Mock()
+        monkeypatch.setattr(events, '_resync', resync)
+
+        def timeline_event(id, utc):
+            return dict(IRCAMERA.timeline_event(), id=id, event_utc=str(utc))
+
+        events._on_timeline_update(timeline_event('100', 1000))
+        m.get(
+            urls.TIMELINE_LATEST.format(size=2),
+            json=[timeline_event('103', 1003), timeline_event('102', 1002)],
+        )
+        # then unusable
+        m.get(urls.TIMELINE_LATEST.format(size=2), json={'unexpected': True})
+
+        events._on_socket_connected()
+        resync.assert_called_once_with()
+
+        resync.reset_mock()
+        events._on_socket_connected()
+        resync.assert_called_once_with()
+
+    def test_resync(self, m):
+        """Tests that a resync applies and notifies only changed devices."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(
+            urls.DEVICES,
+            json=[
+                COVER.device(status=STATUS.CLOSED),
+                DOORCONTACT.device(status=STATUS.CLOSED),
+            ],
+        )
+        m.get(urls.AUTOMATION, json=[])
+
+        self.client.logout()
+        cover = self.client.get_device(COVER.DEVICE_ID)
+        doorcontact = self.client.get_device(DOORCONTACT.DEVICE_ID)
+
+        events = self.client.events
+        callback = Mock()
+        assert events.add_device_callback([cover, doorcontact], callback)
+
+        m.get(
+            urls.DEVICES,
+            json=[
+                COVER.device(status=STATUS.CLOSED),
+                DOORCONTACT.device(status=STATUS.OPEN),
+            ],
+        )
+        events._on_socket_connected()
+
+        callback.assert_called_once_with(doorcontact)
+        assert doorcontact.status == STATUS.OPEN
+        assert cover.status == STATUS.CLOSED
+
+    def test_resync_unchanged(self, m):
+        """Tests that a resync with nothing changed notifies nothing."""
+        m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+        m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+        m.get(urls.PANEL, json=PANEL.get_response_ok(mode='standby'))
+        m.get(urls.DEVICES, json=[DOORCONTACT.device(status=STATUS.CLOSED)])
+        m.get(urls.AUTOMATION, json=[])
+
+        self.client.logout()
+        alarm = self.client.get_alarm()
+        doorcontact = self.client.get_device(DOORCONTACT.DEVICE_ID)
+
+        events = self.client.events
+        callback = Mock()
+        assert events.add_device_callback([alarm, doorcontact], callback)
+
+        assert self.client.resync() == []
+        events._on_socket_connected()
+
+        callback.assert_not_called()
+
+    def test_resync_jitter(self, monkeypatch):
+        """Tests that synchronizing after a connection may be delayed."""
+        events = self.client.events
+        events.resync_jitter = 10
+        monkeypatch.setattr('random.uniform', lambda low, high: 0.01)
+        synchronized = threading.Event()
+        monkeypatch.setattr(events, '_synchronize', synchronized.set)
+
+        events._on_socket_connected()
+
+        assert not synchronized.is_set()
+        assert synchronized.wait(1)
+
+    def test_resync_jitter_reactor(self, monkeypatch):
+        """Tests that a delayed synchronization is scheduled on the reactor."""
+        reactor = Reactor()
+        events = self.client.events
+        events.reactor = reactor
+        events.resync_jitter = 10
+        monkeypatch.setattr('random.uniform', lambda low, high: 0.01)
+        synchronized = threading.Event()
+        threads = []
+
+        def synchronize():
+            threads.append(threading.current_thread().name)
+            synchronized.set()
+
+        monkeypatch.setattr(events, '_synchronize', synchronize)
+
+        try:
+            events._on_socket_connected()
+            assert synchronized.wait(1)
+        finally:
+            reactor.stop()
+        assert threads[0].startswith('AbodeDispatch')
+        assert events._scheduler._thread is None
+
+    def test_seen_events_locked(self):
+        """Tests that timeline events are recorded under the timeline lock."""
+        events = self.client.events
+        event = {'id': '1', 'event_utc': '1'}
+        recorder = threading.Thread(target=events._seen, args=(event,))
+
+        with events._timeline_lock:
+            recorder.start()
+            recorder.join(0.05)
+            assert recorder.is_alive()
+        recorder.join(1)
+
+        assert list(events._seen_events) == ['1']
+        assert events._last_event is event
+
+    def test_wait_for_timeline_timeout(self, monkeypatch):
+        """Tests that waits for timeline events share a thread for timeouts."""
+        events = self.client.events
+        monkeypatch.setattr(events, '_connected', True)
+        before = set(threading.enumerate())
+
+        waiters = [
+            events.wait_for_timeline(
+                IRCAMERA.DEVICE_ID, TIMELINE.CAPTURE_IMAGE, timeout=0.1
+            )
+            for _ in range(10)
+        ]
+        started = set(threading.enumerate()) - before
+        assert started == {events._scheduler._thread}
+
+        concurrent.futures.wait(waiters, timeout=1)
+        assert all(waiter.cancelled() for waiter in waiters)
@@ -0,0 +1,94 @@
+"""Test managing many accounts with a Fleet."""
+
+import pytest
+
+import jaraco.abode
+import jaraco.abode.devices.status as STATUS
+from jaraco.abode.fleet import Fleet
+from jaraco.abode.helpers import urls
+
+from .mock import login as LOGIN
+from .mock import oauth_claims as OAUTH_CLAIMS
+from .mock import panel as PANEL
+from .mock.devices import door_contact as DOOR_CONTACT
+from .mock.devices import door_lock as DOOR_LOCK
+
+USERNAMES = 'one@example.com', 'two@example.com'
+
+
+@pytest.fixture
+def fleet():
+    fleet = Fleet(pool_size=2, max_workers=2, resync_jitter=0)
+    for username in USERNAMES:
+        fleet.add(username, 'secret')
+    yield fleet
+    fleet.stop()
+
+
+@pytest.fixture
+def account(m):
+    m.post(urls.LOGIN, json=LOGIN.post_response_ok())
+    m.get(urls.OAUTH_TOKEN, json=OAUTH_CLAIMS.get_response_ok())
+    m.get(urls.PANEL, json=PANEL.get_response_ok())
+    m.get(
+        urls.DEVICES,
+        json=[
+            DOOR_CONTACT.device(),
+            DOOR_LOCK.device(devid='ZW:00000004', status=STATUS.Lock.CLOSED),
+        ],
+    )
+    return m
+
+
+def test_shared_resources(fleet):
+    first, second = fleet.values()
+    assert first.transport is second.transport is fleet.transport
+    assert first.events.reactor is second.events.reactor is fleet.reactor
+    assert first.events.dispatcher is second.events.dispatcher is fleet.dispatcher
+
+
+def test_isolated_cookies(fleet):
+    first, second = fleet.values()
+    first_path = first._session.cookies.shelf.filename
+    second_path = second._session.cookies.shelf.filename
+    assert first_path != second_path
+    assert first_path.parent == second_path.parent
+
+
+def test_isolated_tokens(fleet, account):
+    first, second = fleet.values()
+    fleet.map(lambda client: client.get_devices())
+    assert first._tokens.path != second._tokens.path
+    assert first._tokens.get() and second._tokens.get()
+
+
+def test_duplicate_account(fleet):
+    with pytest.raises(ValueError):
+        fleet.add(USERNAMES[0], 'secret')
+
+
+def test_devices(fleet, account):
+    locks = list(fleet.devices(generic_type='lock'))
+    assert sorted(username for username, _ in locks) == sorted(USERNAMES)
+    assert all(isinstance(lock, jaraco.abode.devices.lock.Lock) for _, lock in locks)
+    logins = [call for call in account.calls if call.request.url.endswith(urls.LOGIN)]
+    assert len(logins) == len(USERNAMES)
+
+
+def test_health(fleet, account):
+    def fail_second(client):
+        if client._username == USERNAMES[1]:
+            raise jaraco.abode.Exception("unreachable")
+        return client.get_devices()
+
+    assert list(fleet.map(fail_second)) == [USERNAMES[0]]
+    health = fleet.health()
+    assert health[USERNAMES[0]].ok
+    # the door contact, the lock, and the alarm
+    assert health[USERNAMES[0]].devices == 3
+    assert health[USERNAMES[0]].auth_stats.logins == 1
+    assert not health[USERNAMES[1]].ok
+    assert not health[USERNAMES[1]].connected
+
+    fleet.map(lambda client: None)
+    assert all(status.ok for status in fleet.health().values())
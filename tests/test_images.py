@@ -0,0 +1,69 @@
+"""Test decoding and caching of camera images."""
+
+import base64
+import io
+import json
+
+import pytest
+
+from jaraco.abode.images import ImageCache, decode_field
+
+IMAGE = bytes(range(256)) * 64
+
+
+def chunked(data, size):
+    return (data[pos : pos + size] for pos in range(0, len(data), size))
+
+
+@pytest.mark.parametrize('size', [1, 3, 7, 4096])
+def test_decode_chunked(size):
+    doc = json.dumps(dict(id='XF:1', base64Image=base64.b64encode(IMAGE).decode()))
+    sink = io.BytesIO()
+    assert decode_field(chunked(doc.encode(), size), 'base64Image', sink) == len(IMAGE)
+    assert sink.getvalue() == IMAGE
+
+
+def test_decode_escaped_solidus():
+    encoded = base64.b64encode(IMAGE).decode().replace('/', '\\/')
+    doc = '{"base64Image": "%s"}' % encoded
+    sink = io.BytesIO()
+    decode_field(chunked(doc.encode(), 5), 'base64Image', sink)
+    assert sink.getvalue() == IMAGE
+
+
+@pytest.mark.parametrize('size', [1, 2, 5])
+def test_decode_split_marker(size):
+    encoded = base64.b64encode(IMAGE).decode()
+    doc = '{"kind": "base64Image", "base64Image" \n :\t  "%s"}' % encoded
+    sink = io.BytesIO()
+    decode_field(chunked(doc.encode(), size), 'base64Image', sink)
+    assert sink.getvalue() == IMAGE
+
+
+@pytest.mark.parametrize('size', [1, 3, 7])
+def test_decode_escapes(size):
+    encoded = base64.b64encode(IMAGE).decode()
+    lines = [encoded[pos : pos + 76] for pos in range(0, len(encoded), 76)]
+    doc = json.dumps(dict(base64Image='\n'.join(lines)))
+    doc = doc.replace('/', '\\u002f')
+    sink = io.BytesIO()
+    decode_field(chunked(doc.encode(), size), 'base64Image', sink)
+    assert sink.getvalue() == IMAGE
+
+
+def test_cache_eviction_order():
+    cache = ImageCache(budget=3)
+    for key in 'abc':
+        cache.put(key, b'x')
+    cache.get('a')
+    cache.put('d', b'x')
+    assert cache.get('b') is None
+    assert cache.get('a') == b'x'
+    assert len(cache) == 3
+
+
+def test_cache_disabled():
+    cache = ImageCache(budget=0)
+    cache.put('a', b'x')
+    assert cache.get('a') is None
+    assert cache.size == 0
@@ -0,0 +1,170 @@
+"""Test the SocketIO reactor."""
+
+import socket
+import threading
+import time
+
+import lomond
+import pytest
+
+from jaraco.abode.channel import Channel
+from jaraco.abode.reactor import Reactor
+from jaraco.abode.socketio import SocketIO
+
+from . import server as SERVER
+
+
+@pytest.fixture
+def server():
+    server = SERVER.Server(
+        frames=[SERVER.OPEN, '40', '42["com.goabode.device.update","ZW:1"]']
+    )
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def reactor():
+    reactor = Reactor()
+    yield reactor
+    reactor.stop()
+
+
+def collect(sio, name):
+    received = []
+    event = threading.Event()
+
+    def callback(*args):
+        received.append(args)
+        event.set()
+
+    sio.on(name, callback)
+    return received, event
+
+
+class TestReactor:
+    def test_many_connections_one_thread(self, server, reactor):
+        clients = [SocketIO(url=server.url, reactor=reactor) for _ in range(5)]
+        updates = [collect(sio, 'com.goabode.device.update') for sio in clients]
+
+        for sio in clients:
+            sio.start()
+
+        for _, event in updates:
+            assert event.wait(5)
+        assert [received for received, _ in updates] == [[(['ZW:1'],)]] * 5
+        assert server.connections == 5
+        assert reactor.connections == 5
+        names = [thread.name for thread in threading.enumerate()]
+        assert names.count('SocketIOReactor') == 1
+        assert 'SocketIOThread' not in names
+        assert all(sio._engineio_connected for sio in clients)
+
+    def test_stop(self, server, reactor):
+        sio = SocketIO(url=server.url, reactor=reactor)
+        _connected, is_connected = collect(sio, 'connected')
+        disconnected, _is_disconnected = collect(sio, 'disconnected')
+        _stopped, is_stopped = collect(sio, 'stopped')
+
+        sio.start()
+        assert is_connected.wait(5)
+        sio.stop()
+        assert is_stopped.wait(5)
+        assert disconnected
+        assert reactor.connections == 0
+
+    def test_reconnect(self, server, reactor, monkeypatch):
+        monkeypatch.setattr('jaraco.abode.socketio.BackoffIntervals.min_wait', 0)
+        monkeypatch.setattr('jaraco.abode.socketio.BackoffIntervals.diff', 0)
+        sio = SocketIO(url=server.url, reactor=reactor)
+        _disconnected, is_disconnected = collect(sio, 'disconnected')
+        _updates, updated = collect(sio, 'com.goabode.device.update')
+
+        sio.start()
+        assert updated.wait(5)
+        updated.clear()
+
+        server.drop()
+
+        assert is_disconnected.wait(5)
+        assert updated.wait(5)
+        assert server.connections == 2
+
+    def test_blocking_work_off_reactor(self, server, reactor):
+        """Connecting and callbacks do not stall other connections."""
+        slow, fast = (SocketIO(url=server.url, reactor=reactor) for _ in range(2))
+        release = threading.Event()
+        slow.on('started', release.wait)
+        threads = []
+        fast.on('started', lambda: threads.append(threading.current_thread().name))
+        _updates, updated = collect(fast, 'com.goabode.device.update')
+        fast.on(
+            'com.goabode.device.update',
+            lambda *args: threads.append(threading.current_thread().name),
+        )
+
+        slow.start()
+        fast.start()
+        try:
+            assert updated.wait(5)
+        finally:
+            release.set()
+        assert 'SocketIOReactor' not in threads
+        assert len(threads) == 2
+
+    def test_proxy(self, server, reactor, monkeypatch):
+        """Connections are made through the configured proxy."""
+        proxy = SERVER.Proxy()
+        monkeypatch.setenv('http_proxy', proxy.url)
+        monkeypatch.delenv('no_proxy', raising=False)
+        sio = SocketIO(url=server.url, reactor=reactor)
+        _updates, updated = collect(sio, 'com.goabode.device.update')
+
+        sio.start()
+        try:
+            assert updated.wait(5)
+        finally:
+            proxy.close()
+        (request,) = proxy.requests
+        assert request.startswith(f'CONNECT {server.url.split("/")[2]} ')
+
+
+class TestChannel:
+    def test_partial_writes(self):
+        """Writes beyond what the socket accepts are buffered and flushed."""
+        local, remote = socket.socketpair()
+        blocked = threading.Event()
+        channel = Channel(lomond.WebSocket('ws://example.com/'), on_blocked=blocked.set)
+        local.setblocking(False)
+        channel.sock = local
+        payload = bytes(range(256)) * 40_000
+
+        channel.write(payload)
+
+        assert blocked.is_set()
+        received = bytearray()
+
+        def read():
+            while len(received) < len(payload):
+                received.extend(remote.recv(65536))
+
+        reader = threading.Thread(target=read)
+        reader.start()
+        while not channel.flush():
+            time.sleep(0.001)
+        reader.join(5)
+        assert received == payload
+        channel.close()
+        remote.close()
+
+    def test_recv_would_block(self):
+        """Reading with nothing to read returns None."""
+        local, remote = socket.socketpair()
+        channel = Channel(lomond.WebSocket('ws://example.com/'))
+        local.setblocking(False)
+        channel.sock = local
+        assert channel.recv() is None
+        remote.sendall(b'data')
+        assert channel.recv() == b'data'
+        channel.close()
+        remote.close()
@@ -0,0 +1,177 @@
+"""Test the SocketIO client's packet handling."""
+
+import threading
+import time
+
+import pytest
+from lomond import events
+
+from jaraco.abode.reactor import Reactor
+from jaraco.abode.socketio import SocketIO
+
+from . import server as SERVER
+
+
+def feed(sio, *texts):
+    for text in texts:
+        sio._on_websocket_event(events.Text(text))
+
+
+@pytest.fixture
+def sio():
+    sio = SocketIO(url='ws://localhost/socket.io/')
+    yield sio
+    sio._cancel_heartbeat()
+
+
+@pytest.fixture
+def reactor():
+    reactor = Reactor()
+    yield reactor
+    reactor.stop()
+
+
+def open_packet(interval, timeout):
+    return f'0{{"sid":"abc","upgrades":[],"pingInterval":{interval},"pingTimeout":{timeout}}}'
+
+
+class TestSocketIO:
+    def test_connect(self, sio):
+        feed(sio, SERVER.OPEN, '40')
+        assert sio._engineio_connected
+        assert sio._socketio_connected
+
+    def test_unknown_codes(self, sio):
+        feed(sio, '9', '49', '')
+        assert not sio._engineio_connected
+
+    def test_event(self, sio):
+        received = []
+        sio.on('com.goabode.device.update', received.append)
+        feed(sio, SERVER.OPEN, '40', '42["com.goabode.device.update","ZW:1"]')
+        assert received == [['ZW:1']]
+
+    def test_subclass_handlers(self):
+        class Pongs(SocketIO):
+            pongs = 0
+
+            def _on_engineio_pong(self, message):
+                self.pongs += 1
+
+        sio = Pongs(url='ws://localhost/socket.io/')
+        feed(sio, '3', '3')
+        assert sio.pongs == 2
+
+    def test_event_ack_and_namespace(self, sio):
+        received = []
+        sio.on('com.goabode.gateway.mode', received.append)
+        feed(
+            sio,
+            '4212["com.goabode.gateway.mode","home"]',
+            '42/abode,["com.goabode.gateway.mode","away"]',
+            '42/abode,3["com.goabode.gateway.mode","standby"]',
+        )
+        assert received == [['home'], ['away'], ['standby']]
+
+    def test_raw_event(self, sio):
+        raw = []
+        sio.on('event', raw.append)
+        feed(sio, '42["com.goabode.gateway.mode","home"]', '42{"not": "a list"}')
+        assert raw == ['["com.goabode.gateway.mode","home"]']
+
+    def test_binary_event(self, reactor):
+        snapshot = (
+            '451-["com.goabode.camera.snapshot",'
+            '{"id":"XF:1","image":{"_placeholder":true,"num":0}}]'
+        )
+        image = bytes(range(256)) * 100
+        server = SERVER.Server(frames=[SERVER.OPEN, '40', snapshot, b'\x04' + image])
+        sio = SocketIO(url=server.url, reactor=reactor)
+        received = []
+        done = threading.Event()
+
+        def on_snapshot(args):
+            received.append(args)
+            done.set()
+
+        sio.on('com.goabode.camera.snapshot', on_snapshot)
+        sio.start()
+        try:
+            assert done.wait(5)
+        finally:
+            server.close()
+
+        ((payload,),) = received
+        assert payload['id'] == 'XF:1'
+        assert isinstance(payload['image'], memoryview)
+        assert payload['image'] == image
+
+    def test_binary_frames_without_packet(self, sio):
+        received = []
+        sio.on('com.goabode.gateway.mode', received.append)
+        sio._on_websocket_event(events.Binary(b'\x04stray'))
+        feed(sio, '452-["com.goabode.gateway.mode",{"_placeholder":true,"num":1}]')
+        sio._on_websocket_event(events.Binary(b'\x04first'))
+        assert not received
+        sio._on_websocket_event(events.Binary(b'\x04second'))
+        assert received == [[b'second']]
+
+    def test_malformed_binary_ack(self, sio, caplog):
+        received = []
+        sio.on('com.goabode.gateway.mode', received.append)
+        feed(sio, '461-[not json', '42["com.goabode.gateway.mode","home"]')
+        assert 'Unable to decode binary ack' in caplog.text
+        assert received == [['home']]
+
+    def test_heartbeat(self, reactor):
+        server = SERVER.Server(frames=[open_packet(50, 1000), '40'], replies={'2': '3'})
+        sio = SocketIO(url=server.url, reactor=reactor)
+        pongs = threading.Event()
+        sio.on('pong', pongs.set)
+        sio.start()
+        try:
+            # pings are due every 50 ms, driven by the reactor's timers
+            assert pongs.wait(1)
+        finally:
+            server.close()
+        assert sio.heartbeat.latency < 1
+        assert '2' in server.received
+
+    def test_heartbeat_threaded(self):
+        server = SERVER.Server(frames=[open_packet(50, 1000), '40'], replies={'2': '3'})
+        sio = SocketIO(url=server.url)
+        pongs = threading.Event()
+        sio.on('pong', pongs.set)
+        sio.start()
+        try:
+            # pinged when due, from the heartbeat scheduler
+            assert pongs.wait(1)
+        finally:
+            sio.stop()
+            server.close()
+        assert '2' in server.received
+
+    def test_heartbeat_timeout_threaded(self):
+        server = SERVER.Server(frames=[open_packet(50, 100), '40'])
+        sio = SocketIO(url=server.url)
+        disconnected = threading.Event()
+        sio.on('disconnected', disconnected.set)
+        sio.start()
+        try:
+            assert disconnected.wait(1)
+        finally:
+            sio.stop()
+            server.close()
+
+    def test_heartbeat_timeout(self, reactor):
+        server = SERVER.Server(frames=[open_packet(50, 100), '40'])
+        sio = SocketIO(url=server.url, reactor=reactor)
+        disconnected = threading.Event()
+        sio.on('disconnected', disconnected.set)
+        start = time.monotonic()
+        sio.start()
+        try:
+            assert disconnected.wait(5)
+        finally:
+            server.close()
+        assert time.monotonic() - start < 5
@@ -0,0 +1,73 @@
+"""Test connection pooling and reuse."""
+
+import concurrent.futures
+import http.server
+import threading
+
+import pytest
+
+from jaraco.abode.transport import Transport
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(responses):
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+    host, port = server.server_address
+    url = f'http://{host}:{port}/'
+    responses.add_passthru(url)
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+def test_connection_reuse(server):
+    transport = Transport()
+    session = transport.session()
+    for _ in range(3):
+        assert session.get(server).text == 'ok'
+    stats = transport.stats
+    assert (stats.hits, stats.misses) == (2, 1)
+
+
+def test_no_keep_alive(server):
+    transport = Transport(keep_alive=False)
+    session = transport.session()
+    for _ in range(3):
+        session.get(server)
+    assert transport.stats.misses == 3
+
+
+def test_shared_pool(server):
+    transport = Transport()
+    transport.session().get(server)
+    transport.session().get(server)
+    assert transport.stats.hits == 1
+
+
+def test_default_timeout():
+    assert Transport().adapter.timeout is None
+    transport = Transport(timeout=0.5)
+    assert transport.adapter.timeout == 0.5
+
+
+def test_concurrent_stats(server):
+    transport = Transport(pool_maxsize=4)
+    session = transport.session()
+    with concurrent.futures.ThreadPoolExecutor(4) as pool:
+        list(pool.map(lambda _: session.get(server), range(40)))
+    assert transport.stats.requests == 40